@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from xml.sax.saxutils import XMLGenerator
+
+from textnode import TextType
+
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+ATOM_NS = "http://www.w3.org/2005/Atom"
+# the files write_all puts at the root of the output directory
+ARTIFACT_FILES = ("sitemap.xml", "feed.xml", "links.json")
+
+
+class PageRecord:
+    def __init__(self, title, source_path, dest_path, url, links, updated, tags=None):
+        self.title = title
+        self.source_path = source_path
+        self.dest_path = dest_path
+        self.url = url
+        self.links = links
+        self.updated = updated
+        self.tags = tags if tags is not None else []
+
+    def __repr__(self):
+        return f"PageRecord({self.title}, {self.url}, {len(self.links)} links)"
+
+
+def dest_path_to_url(dest_root, dest_path):
+    # docs/blog/tom/index.html -> /blog/tom/
+    rel_path = os.path.relpath(dest_path, dest_root).replace(os.sep, "/")
+    if rel_path == "index.html":
+        return "/"
+    if rel_path.endswith("/index.html"):
+        return "/" + rel_path[: -len("index.html")]
+    return "/" + rel_path
+
+
+class BuildArtifacts:
+    # collects per-page data while pages are generated so the sitemap, feed
+    # and link manifest can be written without re-reading docs/
+    def __init__(self, dest_root, basepath="/", site_url="", commit_times=None):
+        self.dest_root = dest_root
+        self.basepath = basepath
+        self.site_url = site_url.rstrip("/")
+        # source path -> time of its last git commit
+        self.commit_times = commit_times or {}
+        self.pages = []
+
+    def add_page(self, title, source_path, dest_path, links, meta=None):
+        url = dest_path_to_url(self.dest_root, dest_path)
+        # prefer the frontmatter date, then the last commit, over the file's
+        # modification time, which every fresh checkout changes
+        updated = meta.published() if meta is not None else None
+        if updated is None:
+            updated = self.commit_times.get(os.path.normpath(source_path))
+        if updated is None:
+            mtime = os.path.getmtime(source_path)
+            updated = datetime.fromtimestamp(mtime, timezone.utc)
+        updated = updated.replace(microsecond=0)
+        tags = meta.tags if meta is not None else []
+        record = PageRecord(title, source_path, dest_path, url, links, updated, tags)
+        self.pages.append(record)
+        return record
+
+    def absolute_url(self, url):
+        return self.site_url + self.basepath.rstrip("/") + url
+
+    def write_all(self, feed_section="/blog/", feed_title="Blog"):
+        self.write_sitemap(os.path.join(self.dest_root, "sitemap.xml"))
+        self.write_feed(
+            os.path.join(self.dest_root, "feed.xml"), feed_section, feed_title
+        )
+        self.write_link_manifest(os.path.join(self.dest_root, "links.json"))
+
+    def write_sitemap(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            xml = XMLGenerator(file, "utf-8", short_empty_elements=True)
+            xml.startDocument()
+            xml.startElement("urlset", {"xmlns": SITEMAP_NS})
+            for page in sorted(self.pages, key=lambda p: p.url):
+                xml.startElement("url", {})
+                _text_element(xml, "loc", self.absolute_url(page.url))
+                _text_element(xml, "lastmod", page.updated.strftime("%Y-%m-%d"))
+                xml.endElement("url")
+            xml.endElement("urlset")
+            xml.endDocument()
+
+    def feed_entries(self, section):
+        entries = [p for p in self.pages if p.url.startswith(section)]
+        entries = [p for p in entries if p.url != section]
+        return sorted(entries, key=lambda p: (p.updated, p.url), reverse=True)
+
+    def write_feed(self, path, section="/blog/", title="Blog"):
+        # the feed is only rewritten when one of its entries changed
+        entries = self.feed_entries(section)
+        # the absolute urls depend on the site url and basepath as well
+        digest = _entries_digest(entries, self.site_url, self.basepath, section, title)
+        if _read_feed_digest(path) == digest:
+            return False
+
+        with open(path, "w", encoding="utf-8") as file:
+            xml = XMLGenerator(file, "utf-8", short_empty_elements=True)
+            xml.startDocument()
+            file.write(f"<!-- entries: {digest} -->\n")
+            xml.startElement("feed", {"xmlns": ATOM_NS})
+            _text_element(xml, "title", title)
+            _text_element(xml, "id", self.absolute_url(section))
+            xml.startElement(
+                "link", {"href": self.absolute_url(section), "rel": "alternate"}
+            )
+            xml.endElement("link")
+            updated = entries[0].updated if entries else datetime.now(timezone.utc)
+            _text_element(xml, "updated", updated.isoformat())
+            for page in entries:
+                xml.startElement("entry", {})
+                _text_element(xml, "title", page.title)
+                _text_element(xml, "id", self.absolute_url(page.url))
+                xml.startElement("link", {"href": self.absolute_url(page.url)})
+                xml.endElement("link")
+                _text_element(xml, "updated", page.updated.isoformat())
+                xml.endElement("entry")
+            xml.endElement("feed")
+            xml.endDocument()
+        return True
+
+    def write_link_manifest(self, path):
+        manifest = {}
+        for page in sorted(self.pages, key=lambda p: p.url):
+            manifest[page.url] = {
+                "source": page.source_path,
+                "links": [
+                    {
+                        "type": "image" if text_type == TextType.IMAGE else "link",
+                        "target": url,
+                        "line": line,
+                    }
+                    for text_type, url, line in page.links
+                ],
+            }
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(manifest, file, indent=2)
+
+
+def load_link_manifest(path):
+    # the links.json of an earlier build: url -> {"source", "links"}
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _text_element(xml, tag, text):
+    xml.startElement(tag, {})
+    xml.characters(text)
+    xml.endElement(tag)
+
+
+def _entries_digest(entries, *settings):
+    digest = hashlib.sha256()
+    digest.update("\0".join(settings).encode() + b"\n")
+    for page in entries:
+        digest.update(f"{page.title}\0{page.url}\0{page.updated}\n".encode())
+    return digest.hexdigest()
+
+
+def _read_feed_digest(path):
+    # the digest comment sits right after the xml declaration
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            file.readline()
+            line = file.readline().strip()
+    except FileNotFoundError:
+        return None
+    if line.startswith("<!-- entries: ") and line.endswith(" -->"):
+        return line[len("<!-- entries: ") : -len(" -->")]
+    return None
@@ -0,0 +1,43 @@
+import glob
+import timeit
+from unittest import mock
+
+import htmlnode
+from markdown_blocks import markdown_to_html_node
+
+# Compares serializing every page in content/ with and without escaping.
+# Run from the repository root: python3 src/bench_escape.py
+
+
+def identity(text):
+    return text
+
+
+def main(number=200):
+    trees = []
+    for path in sorted(glob.glob("content/**/*.md", recursive=True)):
+        with open(path, "r") as file:
+            trees.append(markdown_to_html_node(file.read()))
+
+    def serialize():
+        for tree in trees:
+            tree.to_html()
+
+    with mock.patch.multiple(
+        htmlnode,
+        escape_text=identity,
+        escape_code=identity,
+        escape_attribute=identity,
+    ):
+        baseline = min(timeit.repeat(serialize, number=number, repeat=5))
+    escaped = min(timeit.repeat(serialize, number=number, repeat=5))
+
+    per_run = 1000 / number
+    print(f"pages: {len(trees)}, runs: {number}")
+    print(f"unescaped: {baseline * per_run:.3f} ms per site")
+    print(f"escaped:   {escaped * per_run:.3f} ms per site")
+    print(f"overhead:  {(escaped / baseline - 1) * 100:+.1f}%")
+
+
+if __name__ == "__main__":
+    main()
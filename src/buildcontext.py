@@ -0,0 +1,66 @@
+import os
+
+
+class OutputTarget:
+    # an extra output tree written from the same rendered pages, differing
+    # only in the basepath spliced into root-relative urls
+    def __init__(self, basepath, dest_root, artifacts=None):
+        self.basepath = basepath
+        self.dest_root = dest_root
+        self.artifacts = artifacts
+
+    def path_for(self, dest_path, primary_root):
+        return os.path.join(self.dest_root, os.path.relpath(dest_path, primary_root))
+
+
+class BuildContext:
+    # optional collaborators shared by every page of a single site build
+    def __init__(
+        self,
+        artifacts=None,
+        link_checker=None,
+        images=None,
+        minify=False,
+        assets=None,
+        layouts=None,
+        cache=None,
+        cache_salt="",
+        errors=None,
+        dest_root="docs",
+        targets=(),
+        translations=None,
+        partials=None,
+        journal=None,
+        page_index=None,
+        memory=None,
+        timings=None,
+        transforms=None,
+    ):
+        self.artifacts = artifacts
+        self.link_checker = link_checker
+        self.images = images
+        self.minify = minify
+        self.assets = assets
+        self.layouts = layouts
+        self.cache = cache
+        # anything outside the page itself that can change its output
+        self.cache_salt = cache_salt
+        # a BuildErrors collector when failures should not stop the build
+        self.errors = errors
+        # root of the primary output tree and any extra OutputTargets
+        self.dest_root = dest_root
+        self.targets = targets
+        # a TranslationIndex for multi-language builds
+        self.translations = translations
+        # a PartialCache shared by every page that uses shortcodes
+        self.partials = partials
+        # a BuildJournal of finished pages when the build can be resumed
+        self.journal = journal
+        # a PageIndex of every page, for resolving links between sources
+        self.page_index = page_index
+        # a MemoryReport that profiles every rendered page
+        self.memory = memory
+        # PageTimings recorded for the --plan estimate
+        self.timings = timings
+        # a TransformPipeline run over every rendered page's node tree
+        self.transforms = transforms
@@ -0,0 +1,79 @@
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+
+# every module logs through this logger; nothing is printed directly
+log = logging.getLogger("sitegenerator")
+
+# how often the progress bar may redraw, in seconds
+PROGRESS_INTERVAL = 0.1
+
+
+class JSONLinesFormatter(logging.Formatter):
+    # one JSON object per record for CI log processors
+    def format(self, record):
+        entry = {
+            "time": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry)
+
+
+def setup_logging(verbosity=0, json_lines=False, stream=None):
+    # records go through a queue so the build thread never waits on the
+    # terminal; the listener thread does the formatting and writing
+    stream = stream if stream is not None else sys.stderr
+    handler = logging.StreamHandler(stream)
+    if json_lines:
+        handler.setFormatter(JSONLinesFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(message)s"))
+
+    records = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, handler)
+    log.handlers = [logging.handlers.QueueHandler(records)]
+    log.propagate = False
+    log.setLevel(logging.DEBUG if verbosity > 0 else logging.INFO)
+    listener.start()
+    return listener
+
+
+class Progress:
+    # a throttled single-line progress bar, only drawn on a terminal when
+    # per-file logging is off
+    def __init__(self, total, label="pages", stream=None, enabled=None, width=30):
+        self.total = total
+        self.label = label
+        self.stream = stream if stream is not None else sys.stderr
+        if enabled is None:
+            enabled = self.stream.isatty() and not log.isEnabledFor(logging.DEBUG)
+        self.enabled = enabled
+        self.width = width
+        self.done = 0
+        self._last_draw = 0.0
+
+    def advance(self, count=1):
+        self.done += count
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if now - self._last_draw >= PROGRESS_INTERVAL or self.done == self.total:
+            self._last_draw = now
+            self.draw()
+
+    def draw(self):
+        filled = self.width * self.done // self.total if self.total else self.width
+        bar = "#" * filled + " " * (self.width - filled)
+        self.stream.write(f"\r[{bar}] {self.done}/{self.total} {self.label}")
+        self.stream.flush()
+
+    def finish(self):
+        if self.enabled:
+            self.draw()
+            self.stream.write("\n")
+            self.stream.flush()
@@ -0,0 +1,136 @@
+import hashlib
+import os
+import tempfile
+
+
+def cache_key(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode()
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def code_digest(directory=None):
+    # the generator's own modules, so a cache kept between runs or shared
+    # across runners never serves pages rendered by older code
+    if directory is None:
+        directory = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".py") or name.startswith("test_"):
+            continue
+        with open(os.path.join(directory, name), "rb") as file:
+            source = file.read()
+        digest.update(f"{name}\0".encode())
+        digest.update(hashlib.sha256(source).digest())
+    return digest.hexdigest()
+
+
+def atomic_write(path, data):
+    # write to a temp file in the same directory, then rename over the target
+    # so readers (and other CI runners on a shared mount) never see a partial blob
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class RemoteBackend:
+    # interface for a shared cache behind the local store
+    def get(self, key):
+        raise NotImplementedError
+
+    def put(self, key, data):
+        raise NotImplementedError
+
+
+class LocalDirectoryBackend(RemoteBackend):
+    # stands in for a remote cache using another directory, e.g. a shared mount
+    def __init__(self, root):
+        self.root = root
+
+    def get(self, key):
+        try:
+            with open(os.path.join(self.root, key), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, data):
+        atomic_write(os.path.join(self.root, key), data)
+
+
+class CacheStore:
+    # a directory of blobs named by their content-derived key, with an LRU
+    # size cap; blob mtimes record last use
+    def __init__(self, root, max_bytes=None, remote=None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.remote = remote
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+            os.utime(path)
+            self.hits += 1
+            return data
+        except FileNotFoundError:
+            pass
+        if self.remote is not None:
+            data = self.remote.get(key)
+            if data is not None:
+                atomic_write(path, data)
+                self.hits += 1
+                return data
+        self.misses += 1
+        return None
+
+    def put(self, key, data):
+        atomic_write(self.path(key), data)
+        if self.remote is not None:
+            self.remote.put(key, data)
+
+    def get_text(self, key):
+        data = self.get(key)
+        return data.decode() if data is not None else None
+
+    def put_text(self, key, text):
+        self.put(key, text.encode())
+
+    def gc(self):
+        # drop least recently used blobs until the store fits in max_bytes
+        if self.max_bytes is None or not os.path.isdir(self.root):
+            return 0
+        blobs = []
+        total = 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                blobs.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        removed = 0
+        for _, size, path in sorted(blobs):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,210 @@
+import os
+import subprocess
+from datetime import datetime, timezone
+from urllib.parse import urljoin, urlsplit
+
+from artifacts import dest_path_to_url
+from copystatic import MARKDOWN_EXTENSIONS
+from frontmatter import scan_metadata
+from linkcheck import is_internal, normalize_path
+from textnode import TextType
+
+# inputs every page shares; a change to any of them means a full build
+SHARED_INPUTS = ("template.html", "layouts/", "partials/")
+
+
+class ChangeSet:
+    # paths changed since a git revision; a rename is a delete plus an add
+    def __init__(self, added=(), modified=(), deleted=()):
+        self.added = list(added)
+        self.modified = list(modified)
+        self.deleted = list(deleted)
+
+    def changed(self):
+        return self.added + self.modified
+
+    def __len__(self):
+        return len(self.added) + len(self.modified) + len(self.deleted)
+
+    def __repr__(self):
+        return (
+            f"ChangeSet(+{len(self.added)} ~{len(self.modified)} "
+            f"-{len(self.deleted)})"
+        )
+
+
+def parse_name_status(output):
+    # the NUL separated output of git diff --name-status -z
+    changes = ChangeSet()
+    fields = output.split("\0")
+    i = 0
+    while i < len(fields) and fields[i]:
+        status = fields[i][0]
+        if status in "RC":
+            old_path, new_path = fields[i + 1], fields[i + 2]
+            if status == "R":
+                changes.deleted.append(old_path)
+            changes.added.append(new_path)
+            i += 3
+            continue
+        path = fields[i + 1]
+        if status == "A":
+            changes.added.append(path)
+        elif status == "D":
+            changes.deleted.append(path)
+        else:
+            changes.modified.append(path)
+        i += 2
+    return changes
+
+
+def git_changes(rev, paths):
+    # changes between rev and the working tree, untracked files included
+    def git(*args):
+        return subprocess.run(
+            ["git", *args, "--", *paths], capture_output=True, text=True, check=True
+        ).stdout
+
+    changes = parse_name_status(
+        git("diff", "--name-status", "-z", "-M", "--relative", rev)
+    )
+    untracked = git("ls-files", "--others", "--exclude-standard", "-z")
+    changes.added.extend(path for path in untracked.split("\0") if path)
+    return changes
+
+
+def parse_commit_times(output):
+    # the output of git log --format=%x01%ct --name-only -z, newest commit
+    # first: path -> time of the last commit that touched it
+    times = {}
+    for commit in output.split("\x01")[1:]:
+        timestamp, _, names = commit.partition("\0")
+        updated = datetime.fromtimestamp(int(timestamp), timezone.utc)
+        for path in names.split("\0"):
+            path = path.strip("\n")
+            if path:
+                times.setdefault(os.path.normpath(path), updated)
+    return times
+
+
+def git_commit_times(paths):
+    # stable "updated" times for pages without a date, unlike mtimes, which
+    # a fresh checkout resets; empty outside a git checkout
+    try:
+        output = subprocess.run(
+            ["git", "log", "--format=%x01%ct", "--name-only", "-z", "--relative"]
+            + ["--", *paths],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+    return parse_commit_times(output)
+
+
+def full_build_reason(changes):
+    for path in changes.changed() + changes.deleted:
+        if path in SHARED_INPUTS or path.startswith(SHARED_INPUTS):
+            return f"{path} changed"
+    return None
+
+
+def dest_path_for(source_path, content_root, dest_root):
+    # content/blog/tom/index.md -> docs/blog/tom/index.html
+    rel_path = os.path.relpath(source_path, content_root)
+    return os.path.join(dest_root, os.path.splitext(rel_path)[0] + ".html")
+
+
+def _under(path, root):
+    return path.startswith(root.rstrip("/") + "/")
+
+
+class IncrementalPlan:
+    def __init__(self, rebuild, remove, static_copy, static_remove):
+        # sources of the pages to render again
+        self.rebuild = rebuild
+        # outputs of deleted and unpublished pages
+        self.remove = remove
+        # static files, relative to static/, to copy or delete
+        self.static_copy = static_copy
+        self.static_remove = static_remove
+
+
+def plan_incremental(
+    changes,
+    pages,
+    manifest,
+    content_root="content",
+    static_root="static",
+    dest_root="docs",
+):
+    # maps changed paths to affected outputs; manifest is the links.json of
+    # the existing build, which says which pages link to what
+    sources = {source_path for source_path, _ in pages}
+    rebuild = set()
+    remove = []
+    static_copy = []
+    static_remove = []
+    touched = set()
+    for path in changes.changed():
+        if _under(path, content_root) and path in sources:
+            rebuild.add(path)
+        elif _under(path, content_root) and path.endswith(MARKDOWN_EXTENSIONS):
+            # a page that is no longer published, e.g. now a draft
+            dest_path = dest_path_for(path, content_root, dest_root)
+            remove.append(dest_path)
+            touched.add(normalize_path(dest_path_to_url(dest_root, dest_path)))
+        elif _under(path, content_root):
+            # a page bundle resource, copied by sync_resources; the pages
+            # embedding it carry its image size
+            dest_path = os.path.join(dest_root, os.path.relpath(path, content_root))
+            touched.add(normalize_path(dest_path_to_url(dest_root, dest_path)))
+        elif _under(path, static_root):
+            rel_path = os.path.relpath(path, static_root).replace(os.sep, "/")
+            static_copy.append(rel_path)
+            touched.add(normalize_path("/" + rel_path))
+    for path in changes.deleted:
+        if _under(path, content_root) and not path.endswith(MARKDOWN_EXTENSIONS):
+            # a page bundle resource
+            dest_path = os.path.join(dest_root, os.path.relpath(path, content_root))
+            remove.append(dest_path)
+            touched.add(normalize_path(dest_path_to_url(dest_root, dest_path)))
+        elif _under(path, content_root):
+            dest_path = dest_path_for(path, content_root, dest_root)
+            remove.append(dest_path)
+            touched.add(normalize_path(dest_path_to_url(dest_root, dest_path)))
+        elif _under(path, static_root):
+            rel_path = os.path.relpath(path, static_root).replace(os.sep, "/")
+            static_remove.append(rel_path)
+            touched.add(normalize_path("/" + rel_path))
+
+    # pages that embed a changed static file or bundle resource (image
+    # sizes) or link to a page that is gone; relative targets, such as a
+    # bundle's photo.png, are resolved against the page's url
+    for url, entry in manifest.items():
+        if entry["source"] not in sources:
+            continue
+        for link in entry["links"]:
+            if not is_internal(link["target"]):
+                continue
+            target = urlsplit(urljoin(url, link["target"])).path
+            if normalize_path(target) in touched:
+                rebuild.add(entry["source"])
+                break
+    return IncrementalPlan(rebuild, remove, static_copy, static_remove)
+
+
+def restore_pages(pages, manifest, dest_root="docs"):
+    # (source, dest, title, links, meta) of pages kept from the earlier
+    # build, read from their frontmatter and the links manifest
+    for source_path, dest_path in pages:
+        meta = scan_metadata(source_path)
+        if meta.draft:
+            continue
+        entry = manifest.get(dest_path_to_url(dest_root, dest_path), {"links": []})
+        links = [
+            (TextType(link["type"]), link["target"], link["line"])
+            for link in entry["links"]
+        ]
+        yield source_path, dest_path, meta.title or "", links, meta
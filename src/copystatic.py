@@ -1,38 +1,70 @@
+import json
 import os
-import pathlib
+import re
 import shutil
-import sys
+import time
 
-from markdown_blocks import extract_title, markdown_to_html_node
+from buildlog import Progress, log
+from cache import cache_key
+from errors import BuildFailure
+from frontmatter import parse_frontmatter, scan_metadata
+from htmlnode import escape_text
+from journal import entry_page
+from markdown_blocks import (
+    RenderContext,
+    extract_title,
+    markdown_to_html,
+    markdown_to_html_node,
+)
+from outline import Outline
+from siteignore import load_ignore_rules
+from taxonomy import listing_to_html
+from template import LayoutCache
+from textnode import TextType
 
+MARKDOWN_EXTENSIONS = (".md", ".markdown")
 
-def copy_directory_contents(src_dir, dst_dir):
+URL_ATTRIBUTE = re.compile(r'\b(href|src|srcset)="(/[^"]*)"')
+
+
+def copy_directory_contents(
+    src_dir, dst_dir, assets=None, errors=None, clean=True, keep=()
+):
     # Logging start of operation
-    print(f"starting copy from '{src_dir}' to '{dst_dir}'")
+    log.debug(f"starting copy from '{src_dir}' to '{dst_dir}'")
 
     # Delete all contents of destination dir if it exists
-    if os.path.exists(dst_dir) and os.path.isdir(dst_dir):
-        print(f"Cleaning destination dir: {dst_dir}")
+    # resumed builds keep the pages already written
+    if clean and os.path.exists(dst_dir) and os.path.isdir(dst_dir):
+        log.debug(f"Cleaning destination dir: {dst_dir}")
         try:
-            shutil.rmtree(dst_dir)
-            print(f"Successfully cleaned {dst_dir}")
+            if keep:
+                clean_directory(dst_dir, keep)
+            else:
+                shutil.rmtree(dst_dir)
+            log.debug(f"Successfully cleaned {dst_dir}")
         except Exception as e:
-            print(f"Error cleaning {dst_dir}: {e}")
-            sys.exit(1)
+            failure = BuildFailure(dst_dir, f"Error cleaning {dst_dir}: {e}")
+            # keep-going builds copy over whatever could not be removed
+            if errors is None:
+                raise failure from e
+            log.error(str(failure))
+            errors.record(failure)
 
     # Create destination dir
     try:
         os.makedirs(dst_dir, exist_ok=True)
-        print(f"Created destination dir: {dst_dir}")
+        log.debug(f"Created destination dir: {dst_dir}")
     except Exception as e:
-        print(f"Error creating {dst_dir}: {e}")
-        sys.exit(1)
+        raise BuildFailure(dst_dir, f"Error creating {dst_dir}: {e}") from e
+
+    # relative paths of every copied file, used to index static assets
+    copied_files = []
 
     # Helper function to Recursively copy all contents
     def copy_recursive(curr_src, curr_dst):
         # Ensure destination dir exists
-        if not os.path.exists(curr_dst):
-            os.mkdir(curr_dst)
+        os.makedirs(curr_dst, exist_ok=True)
 
         # List all items in the current src dir
         items = os.listdir(curr_src)
@@ -42,63 +74,439 @@ def copy_directory_contents(src_dir, dst_dir):
 
             # Check if it's a file
             if os.path.isfile(src_path):
+                # fingerprinted builds copy to the content-hashed name
+                if assets is not None:
+                    rel_path = os.path.relpath(src_path, src_dir).replace(os.sep, "/")
+                    dst_path = os.path.join(dst_dir, assets[rel_path])
                 # Copy the file
                 shutil.copy(src_path, dst_path)
-                print(f"Copied file: {src_path} -> {dst_path}")
+                copied_files.append(os.path.relpath(src_path, src_dir))
+                log.debug(
+                    f"Copied file: {src_path} -> {dst_path}",
+                    extra={"fields": {"event": "copy", "path": dst_path}},
+                )
 
             # its not a file so we create it and copy its contents recursively
             else:
-                print(f"Creating dir: {dst_path}")
-                os.mkdir(dst_path)
+                log.debug(f"Creating dir: {dst_path}")
                 copy_recursive(src_path, dst_path)
 
     copy_recursive(src_dir, dst_dir)
-    print(f"\nSuccessfully copied all contents from '{src_dir}' to '{dst_dir}'")
+    log.debug(f"Successfully copied all contents from '{src_dir}' to '{dst_dir}'")
+    return [path.replace(os.sep, "/") for path in copied_files]
 
 
-def generate_page(from_path, template_path, dest_path, basepath):
-    print(
-        f"Generating page from: {from_path}\nto: {dest_path}\nusing the {template_path} template"
-    )
-    markdown_text = ""
-    template_file = ""
-    try:
-        with open(from_path, "r") as file:
-            markdown_text = file.read()
-        with open(template_path, "r") as file:
-            template_file = file.read()
-    except FileNotFoundError:
-        print(f"Error: the file {from_path} was not found")
-        sys.exit(1)
+def basepath_parts(html, assets=None):
+    # split a page at every root-relative href/src/srcset url, so that
+    # basepath.join(parts) is the page for any basepath; fingerprinted asset
+    # names are swapped in during the same single pass
+    parts = []
+    current = []
+
+    def rewrite(url):
+        if not url.startswith("/") or url.startswith("//"):
+            current.append(url)
+            return
+        path = url[1:]
+        if assets is not None:
+            # keep any ?query or #fragment after the asset path
+            split_at = len(path.split("?", 1)[0].split("#", 1)[0])
+            path = assets.get(path[:split_at], path[:split_at]) + path[split_at:]
+        parts.append("".join(current))
+        current.clear()
+        current.append(path)
+
+    position = 0
+    for match in URL_ATTRIBUTE.finditer(html):
+        current.append(html[position : match.start(2)])
+        value = match.group(2)
+        if match.group(1) == "srcset":
+            for i, candidate in enumerate(value.split(", ")):
+                if i > 0:
+                    current.append(", ")
+                url, _, descriptor = candidate.partition(" ")
+                rewrite(url)
+                if descriptor:
+                    current.append(f" {descriptor}")
+        else:
+            rewrite(value)
+        position = match.end(2)
+    current.append(html[position:])
+    parts.append("".join(current))
+    return parts
+
+
+def rewrite_urls(html, basepath, assets=None):
+    # prefix root-relative href/src/srcset urls with the basepath
+    return basepath.join(basepath_parts(html, assets))
+
+
+# every slot a template can use, so unused ones never render as {{ Name }}
+DEFAULT_SLOTS = {
+    "Alternates": "",
+    "WordCount": "",
+    "ReadingTime": "",
+    "TableOfContents": "",
+}
+
+
+def page_parts(template, title, content_html, build=None, slots=None):
+    values = dict(DEFAULT_SLOTS, Title=escape_text(title), Content=content_html)
+    values.update(slots or {})
+    filled = template.render(values)
+    return basepath_parts(filled, build.assets if build else None)
 
-    html_string = markdown_to_html_node(markdown_text).to_html()
-    page_title = extract_title(markdown_text)
-    filled = template_file.replace("{{ Title }}", page_title)
-    filled = filled.replace("{{ Content }}", html_string)
-    filled = filled.replace('href="/', f'href="{basepath}')
-    filled = filled.replace('src="/', f'src="{basepath}')
 
+def write_page(dest_path, html):
     dir_path = os.path.dirname(dest_path)
     if dir_path != "":
         os.makedirs(dir_path, exist_ok=True)
+    with open(dest_path, "w") as file:
+        file.write(html)
+
+
+def write_outputs(dest_path, basepath, parts, build=None):
+    # the page for the primary tree, then for every extra output target
+    write_page(dest_path, basepath.join(parts))
+    if build is None:
+        return
+    for target in build.targets:
+        target_path = target.path_for(dest_path, build.dest_root)
+        write_page(target_path, target.basepath.join(parts))
+
+
+def generate_page(from_path, template_path, dest_path, basepath, build=None):
+    log.debug(
+        f"Generating page from: {from_path} to: {dest_path}",
+        extra={"fields": {"event": "page", "source": from_path, "path": dest_path}},
+    )
+    # any error is reported against the page and the block being rendered
+    context = RenderContext(
+        images=build.images if build is not None else None,
+        partials=build.partials if build is not None else None,
+        pages=build.page_index if build is not None else None,
+        source_path=from_path,
+        outline=Outline(),
+    )
     try:
-        with open(dest_path, "w") as file:
-            file.write(filled)
+        return _generate_page(
+            from_path, template_path, dest_path, basepath, build, context
+        )
     except Exception as e:
-        print(f"Error writing to file path: {e}")
+        raise BuildFailure.from_exception(from_path, e, context) from e
+
+
+def _generate_page(from_path, template_path, dest_path, basepath, build, context):
+    minify = build is not None and build.minify
+    with open(from_path, "r") as file:
+        markdown_text = file.read()
+
+    meta, body, header_lines = parse_frontmatter(markdown_text)
+    if meta.draft:
+        log.debug(f"Skipping draft: {from_path}")
+        return None
+    layouts = build.layouts if build is not None else None
+    if layouts is None:
+        layouts = LayoutCache(minify=minify)
+    template = page_template(layouts, from_path, template_path, meta)
+
+    alternates = ""
+    if build is not None and build.translations is not None:
+        alternates = build.translations.alternates_html(from_path)
+    partials_digest = ""
+    if build is not None and build.partials is not None:
+        partials_digest = build.partials.digest_for(body)
+    # .md links resolve to wherever their target pages are now
+    pages_digest = ""
+    if build is not None and build.page_index is not None and ".md" in body:
+        pages_digest = build.page_index.digest()
+
+    journal = build.journal if build is not None else None
+    if journal is not None:
+        dest_paths = [dest_path] + [
+            target.path_for(dest_path, build.dest_root) for target in build.targets
+        ]
+        entry = journal.completed(from_path, markdown_text, dest_paths)
+        if entry is not None:
+            # finished before the build was interrupted
+            page_title, links, meta = entry_page(entry)
+            register_page(from_path, dest_path, page_title, links, meta, build)
+            return meta
+
+    key = None
+    cached = None
+    if build is not None and build.cache is not None:
+        transforms = build.transforms
+        key = cache_key(
+            from_path,
+            markdown_text,
+            template.digest(),
+            alternates,
+            partials_digest,
+            pages_digest,
+            transforms.digest() if transforms else "",
+            str(minify),
+            str(build.assets),
+            build.cache_salt,
+        )
+        cached = build.cache.get_text(key)
+
+    if cached is not None:
+        # unchanged page: reuse the output and metadata of an earlier build
+        entry = json.loads(cached)
+        page_title = entry["title"]
+        parts = entry["parts"]
+        links = [(TextType(t), url, line) for t, url, line in entry["links"]]
+        if build.images is not None:
+            # make sure any resized variants are published into this build
+            for text_type, url, _ in links:
+                if text_type == TextType.IMAGE:
+                    build.images.attributes(url, from_path)
+    else:
+        page_title, parts = render_page_parts(
+            body, meta, header_lines, template, context, build, alternates
+        )
+        links = context.links
+        if key is not None:
+            entry = {
+                "title": page_title,
+                "parts": parts,
+                "links": [[t.value, url, line] for t, url, line in links],
+            }
+            build.cache.put_text(key, json.dumps(entry))
+    write_outputs(dest_path, basepath, parts, build)
+    if journal is not None:
+        journal.record(from_path, markdown_text, page_title, links, meta)
+    register_page(from_path, dest_path, page_title, links, meta, build)
+    return meta
+
+
+def page_template(layouts, from_path, template_path, meta):
+    # a frontmatter template wins over the section layout and the default
+    if meta.template is not None:
+        template_path = layouts.resolve_path(meta.template)
+    else:
+        template_path = layouts.layout_for(from_path, template_path)
+    return layouts.load(template_path)
 
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    print(
-        f"Generating page from: {dir_path_content}\nto: {dest_dir_path}\n using {template_path} template"
+def render_page_parts(
+    body, meta, header_lines, template, context, build=None, alternates=""
+):
+    # (title, basepath parts) of a page body, shared by builds and the
+    # preview daemon
+    minify = build is not None and build.minify
+    transforms = build.transforms if build is not None else None
+    context.first_line = header_lines + 1
+    if build is not None and build.memory is not None:
+        html_string = build.memory.render(
+            context.source_path, body, context, minify, transforms
+        )
+    elif transforms:
+        # transforms need the node tree the direct renderer skips
+        node = transforms.apply(markdown_to_html_node(body, context), context)
+        html_string = node.to_html(minify)
+    else:
+        html_string = markdown_to_html(body, context, minify)
+    page_title = meta.title or extract_title(body)
+    slots = dict(context.outline.slots(), Alternates=alternates)
+    return page_title, page_parts(template, page_title, html_string, build, slots)
+
+
+def register_page(from_path, dest_path, page_title, links, meta, build):
+    # hand a written page to the sitemap, feed and link checker
+    if build is None:
+        return
+    if build.artifacts is not None:
+        build.artifacts.add_page(page_title, from_path, dest_path, links, meta)
+    for target in build.targets:
+        if target.artifacts is not None:
+            target_path = target.path_for(dest_path, build.dest_root)
+            target.artifacts.add_page(page_title, from_path, target_path, links, meta)
+    if build.link_checker is not None:
+        build.link_checker.submit(from_path, dest_path, links)
+
+
+def is_markdown(path):
+    return path.endswith(MARKDOWN_EXTENSIONS)
+
+
+def is_draft(source_path):
+    # only the frontmatter is read; a malformed header is left for
+    # generate_page to report
+    try:
+        return scan_metadata(source_path).draft
+    except ValueError:
+        return False
+
+
+def walk_content(dir_path_content, dest_dir_path, rules=None):
+    # walk the content tree once: markdown files are paired with their
+    # .html output, every other file is a bundle resource copied next to
+    # it, and ignored files and directories are skipped without descending
+    if rules is None:
+        rules = load_ignore_rules(dir_path_content)
+    pages = []
+    resources = []
+
+    def walk(directory, rel_dir, dest_dir):
+        with os.scandir(directory) as scanned:
+            entries = sorted(scanned, key=lambda entry: entry.name)
+        for entry in entries:
+            rel_path = rel_dir + entry.name
+            is_dir = entry.is_dir()
+            if rules.ignored(rel_path, is_dir):
+                continue
+            dest_path = os.path.join(dest_dir, entry.name)
+            if is_dir:
+                walk(entry.path, rel_path + "/", dest_path)
+            elif not is_markdown(entry.name):
+                resources.append((entry.path, dest_path))
+            elif is_draft(entry.path):
+                log.debug(f"Skipping draft: {entry.path}")
+            else:
+                pages.append((entry.path, os.path.splitext(dest_path)[0] + ".html"))
+
+    walk(dir_path_content, "", dest_dir_path)
+    return pages, resources
+
+
+def discover_pages(dir_path_content, dest_dir_path, rules=None):
+    return walk_content(dir_path_content, dest_dir_path, rules)[0]
+
+
+def sync_file(src_path, dst_path):
+    # copy unless the destination already has the same size and is newer
+    src_stat = os.stat(src_path)
+    try:
+        dst_stat = os.stat(dst_path)
+        if (
+            dst_stat.st_size == src_stat.st_size
+            and dst_stat.st_mtime >= src_stat.st_mtime
+        ):
+            return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+    shutil.copy2(src_path, dst_path)
+    return True
+
+
+def sync_resources(resources, build=None):
+    # page bundle files go next to their page in every output tree
+    copied = 0
+    for src_path, dest_path in resources:
+        dest_paths = [dest_path]
+        if build is not None:
+            for target in build.targets:
+                dest_paths.append(target.path_for(dest_path, build.dest_root))
+        for path in dest_paths:
+            if sync_file(src_path, path):
+                log.debug(
+                    f"Copied resource: {src_path} -> {path}",
+                    extra={"fields": {"event": "copy", "path": path}},
+                )
+                copied += 1
+    return copied
+
+
+def generate_pages_recursive(
+    dir_path_content, template_path, dest_dir_path, basepath, build=None, pages=None
+):
+    log.debug(
+        f"Generating pages from: {dir_path_content} to: {dest_dir_path} "
+        f"using {template_path} template"
     )
-    source_dirs = os.listdir(dir_path_content)
-    for dir in source_dirs:
-        source_path = os.path.join(dir_path_content, dir)
-        if os.path.isfile(source_path):
-            dest_path_obj = pathlib.Path(os.path.join(dest_dir_path, dir))
-            dest_new_file_path = dest_path_obj.with_suffix(".html")
-            generate_page(source_path, template_path, dest_new_file_path, basepath)
-        else:
-            dest_subdir = os.path.join(dest_dir_path, dir)
-            generate_pages_recursive(source_path, template_path, dest_subdir, basepath)
+    if pages is None:
+        pages, resources = walk_content(dir_path_content, dest_dir_path)
+        sync_resources(resources, build)
+    progress = Progress(len(pages))
+    timings = build.timings if build is not None else None
+    for source_path, dest_path in pages:
+        started = time.perf_counter()
+        try:
+            generate_page(source_path, template_path, dest_path, basepath, build)
+            if timings is not None:
+                timings.record(source_path, time.perf_counter() - started)
+        except BuildFailure as failure:
+            # keep-going builds record the failure and carry on
+            if build is None or build.errors is None:
+                raise
+            log.error(str(failure))
+            build.errors.record(failure)
+        progress.advance()
+    progress.finish()
+
+
+def generate_listings(
+    listings, template_path, dest_dir_path, basepath, build, state, taken_urls=()
+):
+    # render tag, archive and paginated index pages, skipping any whose
+    # entries are unchanged since the previous build, and delete the ones
+    # the previous build wrote that no longer exist
+    template = build.layouts.load(template_path)
+    basepaths = [basepath] + [target.basepath for target in build.targets]
+    salt = cache_key(*basepaths, str(build.assets), template.digest())
+    rendered = 0
+    for listing in listings:
+        dest_path = os.path.join(dest_dir_path, listing.url.strip("/"), "index.html")
+        target_paths = [
+            target.path_for(dest_path, dest_dir_path) for target in build.targets
+        ]
+        if state.is_current(listing, dest_path, salt) and all(
+            os.path.exists(path) for path in target_paths
+        ):
+            continue
+        log.debug(
+            f"Generating listing: {listing.url}",
+            extra={"fields": {"event": "listing", "path": dest_path}},
+        )
+        html_string = listing_to_html(listing)
+        parts = page_parts(template, listing.title, html_string, build)
+        write_outputs(dest_path, basepath, parts, build)
+        state.record(listing, salt)
+        rendered += 1
+
+    current = {listing.url for listing in listings}
+    for url in [url for url in state.digests if url not in current]:
+        state.forget(url)
+        # a hand-written page now owns the url and has been written there
+        if url in taken_urls:
+            continue
+        dest_path = os.path.join(dest_dir_path, url.strip("/"), "index.html")
+        roots = [(dest_path, dest_dir_path)] + [
+            (target.path_for(dest_path, dest_dir_path), target.dest_root)
+            for target in build.targets
+        ]
+        for path, root in roots:
+            if os.path.exists(path):
+                log.debug(f"Removing listing: {path}")
+                os.remove(path)
+                remove_empty_parents(path, root)
+    return rendered
+
+
+def clean_directory(directory, keep):
+    # deletes everything under directory except the files at the relative
+    # paths in keep, generated outputs the build decides about itself
+    for root, dirs, files in os.walk(directory, topdown=False):
+        for name in files:
+            path = os.path.join(root, name)
+            rel_path = os.path.relpath(path, directory).replace(os.sep, "/")
+            if rel_path not in keep:
+                os.remove(path)
+        for name in dirs:
+            path = os.path.join(root, name)
+            if os.path.islink(path):
+                os.remove(path)
+            elif not os.listdir(path):
+                os.rmdir(path)
+
+
+def remove_empty_parents(path, root):
+    directory = os.path.dirname(path)
+    while os.path.normpath(directory) != os.path.normpath(root):
+        if os.listdir(directory):
+            break
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
@@ -0,0 +1,231 @@
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+
+from buildcontext import BuildContext
+from buildlog import log
+from cache import cache_key
+from copystatic import page_template, render_page_parts, walk_content
+from errors import BuildFailure
+from frontmatter import parse_frontmatter
+from linkcheck import PageIndex
+from markdown_blocks import RenderContext
+from outline import Outline
+from partials import PartialCache
+from planner import newest_mtime
+from template import LayoutCache
+
+# rendered previews kept in memory, least recently used dropped first
+MAX_ENTRIES = 256
+# the source path of a preview sent as markdown alone
+PREVIEW_NAME = "preview.md"
+
+
+class PreviewRenderer:
+    # renders pages the way a build does, keeping layouts, partials and
+    # the page index warm between requests. Template, layout and partial
+    # edits are noticed by mtime and drop the warm state.
+    def __init__(
+        self,
+        content_dir="content",
+        template_path="template.html",
+        layouts_dir="layouts",
+        partials_dir="partials",
+        dest_root="docs",
+        basepath="/",
+        minify=False,
+        transforms=None,
+        max_entries=MAX_ENTRIES,
+    ):
+        self.content_dir = content_dir
+        self.template_path = template_path
+        self.layouts_dir = layouts_dir
+        self.partials_dir = partials_dir
+        self.dest_root = dest_root
+        self.basepath = basepath
+        self.minify = minify
+        self.transforms = transforms
+        self.max_entries = max_entries
+        self.rendered = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.requests = 0
+        self.reloads = 0
+        self.started = time.monotonic()
+        # markdown rendering holds the GIL anyway, and the partial cache
+        # tracks the expansion in progress, so renders run one at a time
+        self.lock = threading.Lock()
+        self.build = None
+        self.templates_mtime = None
+        self.reload()
+
+    def reload(self):
+        self.build = BuildContext(
+            minify=self.minify,
+            layouts=LayoutCache(self.layouts_dir, self.content_dir, self.minify),
+            partials=PartialCache(self.partials_dir),
+            dest_root=self.dest_root,
+            transforms=self.transforms,
+        )
+        pages, _ = walk_content(self.content_dir, self.dest_root)
+        self.build.page_index = PageIndex(pages, self.dest_root)
+        self.templates_mtime = self.newest_template_mtime()
+        self.rendered.clear()
+        self.reloads += 1
+
+    def newest_template_mtime(self):
+        return newest_mtime([self.template_path, self.layouts_dir, self.partials_dir])
+
+    def render(self, source_path, markdown=None, basepath=None):
+        # markdown is an unsaved buffer for source_path; without it the file
+        # on disk is rendered
+        if markdown is None:
+            with open(source_path, "r") as file:
+                markdown = file.read()
+        basepath = basepath if basepath is not None else self.basepath
+        with self.lock:
+            self.requests += 1
+            if self.newest_template_mtime() != self.templates_mtime:
+                log.info("templates changed, reloading")
+                self.reload()
+            build = self.build
+            context = RenderContext(
+                partials=build.partials,
+                pages=build.page_index,
+                source_path=source_path,
+                outline=Outline(),
+            )
+            try:
+                meta, body, header_lines = parse_frontmatter(markdown)
+                template = page_template(
+                    build.layouts, source_path, self.template_path, meta
+                )
+                pages_digest = build.page_index.digest() if ".md" in body else ""
+                key = cache_key(
+                    source_path,
+                    markdown,
+                    template.digest(),
+                    build.partials.digest_for(body),
+                    pages_digest,
+                    self.transforms.digest() if self.transforms else "",
+                    basepath,
+                )
+                if key in self.rendered:
+                    self.hits += 1
+                    self.rendered.move_to_end(key)
+                    return self.rendered[key]
+                self.misses += 1
+                title, parts = render_page_parts(
+                    body, meta, header_lines, template, context, build
+                )
+            except Exception as e:
+                raise BuildFailure.from_exception(source_path, e, context) from e
+            page = {"title": title, "html": basepath.join(parts)}
+            self.rendered[key] = page
+            if len(self.rendered) > self.max_entries:
+                self.rendered.popitem(last=False)
+            return page
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self.rendered),
+                "reloads": self.reloads,
+                "partial_renders": self.build.partials.renders,
+                "pages": len(self.build.page_index.urls),
+                "uptime_seconds": round(time.monotonic() - self.started, 3),
+            }
+
+    def handle(self, request):
+        # one decoded request -> one response, never raises
+        started = time.perf_counter()
+        try:
+            op = request.get("op", "render")
+            if op == "render":
+                path = request.get("path")
+                if path is None:
+                    if "markdown" not in request:
+                        raise ValueError("render needs a markdown string or a path")
+                    # a page at the content root, for layout lookup and
+                    # relative .md links
+                    path = os.path.join(self.content_dir, PREVIEW_NAME)
+                response = self.render(
+                    path, request.get("markdown"), request.get("basepath")
+                )
+            elif op == "stats":
+                response = self.stats()
+            elif op == "reload":
+                with self.lock:
+                    self.reload()
+                response = {}
+            else:
+                raise ValueError(f"unknown op {op!r}")
+        except (BuildFailure, OSError, ValueError) as e:
+            return {"ok": False, "error": str(e)}
+        response = dict(response, ok=True)
+        response["ms"] = round((time.perf_counter() - started) * 1000, 3)
+        return response
+
+
+class RenderRequestHandler(socketserver.StreamRequestHandler):
+    # JSON lines: one request object per line, one response line each, for
+    # as long as the client keeps the connection open
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("expected a JSON object")
+            except ValueError as e:
+                response = {"ok": False, "error": f"bad request: {e}"}
+            else:
+                response = self.server.renderer.handle(request)
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class RenderServer(socketserver.ThreadingUnixStreamServer):
+    # a thread per connection, so a slow client never blocks the others
+    daemon_threads = True
+
+    def __init__(self, socket_path, renderer):
+        self.socket_path = socket_path
+        self.renderer = renderer
+        # a socket file left behind by a daemon that was killed
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, RenderRequestHandler)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+class RenderClient:
+    # keeps one connection open, for editor integrations and tests
+    def __init__(self, socket_path):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(socket_path)
+        self.file = self.socket.makefile("rwb")
+
+    def request(self, **request):
+        self.file.write(json.dumps(request).encode() + b"\n")
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("render daemon closed the connection")
+        return json.loads(line)
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
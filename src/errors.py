@@ -0,0 +1,62 @@
+import json
+import os
+
+
+class BuildFailure(Exception):
+    # a page (or directory) that could not be built, with where it failed
+    def __init__(self, path, message, block_index=None, line=None):
+        self.path = path
+        self.message = message
+        self.block_index = block_index
+        self.line = line
+        super().__init__(str(self))
+
+    @classmethod
+    def from_exception(cls, path, error, context=None):
+        message = str(error) or type(error).__name__
+        if context is None or context.block_index is None:
+            return cls(path, message)
+        return cls(path, message, context.block_index, context.line)
+
+    def __str__(self):
+        if self.block_index is None:
+            return f"{self.path}: {self.message}"
+        return f"{self.path}:{self.line}: block {self.block_index}: {self.message}"
+
+    def to_dict(self):
+        return {
+            "path": self.path,
+            "block": self.block_index,
+            "line": self.line,
+            "message": self.message,
+        }
+
+
+class BuildErrors:
+    # failures collected by a --keep-going build
+    def __init__(self):
+        self.failures = []
+
+    def record(self, failure):
+        self.failures.append(failure)
+
+    def __len__(self):
+        return len(self.failures)
+
+    def report(self):
+        lines = [f"{len(self.failures)} page(s) failed to build:"]
+        lines.extend(f"  {failure}" for failure in self.failures)
+        return "\n".join(lines)
+
+    def save(self, path):
+        # written on every keep-going run so a clean run clears the list
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as file:
+            json.dump([failure.to_dict() for failure in self.failures], file, indent=2)
+
+    @staticmethod
+    def load_failed_paths(path):
+        if not os.path.exists(path):
+            return []
+        with open(path, "r") as file:
+            return [failure["path"] for failure in json.load(file)]
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import cache_key
+
+# number of hex digits of the content hash kept in fingerprinted names
+HASH_LENGTH = 10
+
+
+def file_hash(path):
+    # stream the file through sha256 so large assets never sit in memory
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprinted_name(rel_path, digest):
+    # css/index.css -> css/index.<hash>.css
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{digest[:HASH_LENGTH]}{ext}"
+
+
+def git_blob_ids(paths):
+    # path -> git blob id of every tracked file under paths whose working
+    # copy matches the index; git knows these without reading the files,
+    # so they identify content even on a fresh checkout with new mtimes
+    def git(*args):
+        return subprocess.run(
+            ["git", *args, "--", *paths], capture_output=True, text=True, check=True
+        ).stdout
+
+    try:
+        staged = git("ls-files", "-s", "-z")
+        dirty = set(git("diff", "--name-only", "--relative", "-z").split("\0"))
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+    blob_ids = {}
+    for line in staged.split("\0"):
+        if not line:
+            continue
+        info, _, path = line.partition("\t")
+        if path not in dirty:
+            blob_ids[os.path.normpath(path)] = info.split()[1]
+    return blob_ids
+
+
+class HashCache:
+    # sha256 of files keyed by path, trusted while size and mtime match.
+    # With a CacheStore and git blob ids, hashes are also shared through
+    # the store keyed by content, so other CI runners skip reading files.
+    def __init__(self, path, store=None, blob_ids=None):
+        self.path = path
+        self.store = store
+        self.blob_ids = blob_ids or {}
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r") as file:
+                self.entries = json.load(file)
+
+    def hash(self, file_path):
+        stat = os.stat(file_path)
+        known = self.entries.get(file_path)
+        if known is not None and known[:2] == [stat.st_size, stat.st_mtime]:
+            return known[2]
+        key = None
+        digest = None
+        blob_id = self.blob_ids.get(os.path.normpath(file_path))
+        if self.store is not None and blob_id is not None:
+            key = cache_key("sha256-of-blob", blob_id)
+            digest = self.store.get_text(key)
+        if digest is None:
+            digest = file_hash(file_path)
+            if key is not None:
+                self.store.put_text(key, digest)
+        self.entries[file_path] = [stat.st_size, stat.st_mtime, digest]
+        return digest
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w") as file:
+            json.dump(self.entries, file)
+
+
+def list_files(src_dir):
+    rel_paths = []
+    for root, _, files in os.walk(src_dir):
+        for name in files:
+            rel_path = os.path.relpath(os.path.join(root, name), src_dir)
+            rel_paths.append(rel_path.replace(os.sep, "/"))
+    return sorted(rel_paths)
+
+
+def fingerprint_directory(src_dir, cache, workers=None):
+    # map every file under src_dir to its content-hashed name
+    rel_paths = list_files(src_dir)
+    paths = [os.path.join(src_dir, rel_path) for rel_path in rel_paths]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        digests = list(executor.map(cache.hash, paths))
+    return {
+        rel_path: fingerprinted_name(rel_path, digest)
+        for rel_path, digest in zip(rel_paths, digests)
+    }
+
+
+def write_manifest(path, assets):
+    with open(path, "w") as file:
+        json.dump(assets, file, indent=2, sort_keys=True)
@@ -0,0 +1,126 @@
+from datetime import datetime, timezone
+
+# how much of a file the metadata scan reads before giving up on a title
+SCAN_LIMIT = 8192
+
+FENCES = {"---": ":", "+++": "="}
+
+
+class PageMeta:
+    def __init__(
+        self, title=None, date=None, tags=None, draft=False, template=None, extra=None
+    ):
+        self.title = title
+        self.date = date
+        self.tags = tags if tags is not None else []
+        self.draft = draft
+        self.template = template
+        self.extra = extra if extra is not None else {}
+
+    def __eq__(self, other):
+        return vars(self) == vars(other)
+
+    def __repr__(self):
+        return f"PageMeta({self.title}, {self.date}, {self.tags}, draft={self.draft})"
+
+    def published(self):
+        # the frontmatter date as an aware datetime, or None
+        if self.date is None:
+            return None
+        published = datetime.fromisoformat(self.date)
+        if published.tzinfo is None:
+            published = published.replace(tzinfo=timezone.utc)
+        return published
+
+
+def parse_value(raw):
+    value = raw.strip()
+    if value.startswith("[") and value.endswith("]"):
+        return [parse_value(item) for item in value[1:-1].split(",") if item.strip()]
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    if value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    return value
+
+
+def meta_from_fields(fields):
+    tags = fields.pop("tags", [])
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    return PageMeta(
+        title=fields.pop("title", None),
+        date=fields.pop("date", None),
+        tags=tags,
+        draft=fields.pop("draft", False) is True,
+        template=fields.pop("template", None),
+        extra=fields,
+    )
+
+
+def parse_header_lines(lines, separator):
+    # YAML-lite (key: value, "- item" lists) and TOML-lite (key = value)
+    fields = {}
+    last_key = None
+    for line in lines:
+        stripped = line.strip()
+        if stripped == "" or stripped.startswith("#"):
+            continue
+        if separator == ":" and stripped.startswith("- ") and last_key is not None:
+            if not isinstance(fields[last_key], list):
+                fields[last_key] = []
+            fields[last_key].append(parse_value(stripped[2:]))
+            continue
+        key, found, value = stripped.partition(separator)
+        if not found:
+            raise ValueError(f"invalid frontmatter line: {line!r}")
+        last_key = key.strip()
+        fields[last_key] = parse_value(value) if value.strip() else []
+    return fields
+
+
+def parse_frontmatter(markdown):
+    # returns (PageMeta, body, number of lines taken by the frontmatter)
+    lines = markdown.split("\n")
+    fence = lines[0].strip() if lines else ""
+    if fence not in FENCES:
+        return PageMeta(), markdown, 0
+    for end in range(1, len(lines)):
+        if lines[end].strip() == fence:
+            fields = parse_header_lines(lines[1:end], FENCES[fence])
+            body = "\n".join(lines[end + 1 :])
+            return meta_from_fields(fields), body, end + 1
+    raise ValueError(f"frontmatter opened with {fence} is never closed")
+
+
+def scan_metadata(path, limit=SCAN_LIMIT):
+    # read only the header bytes of a page: the frontmatter block and, when
+    # it has no title, lines up to the first "# " heading
+    header = []
+    fence = None
+    meta = PageMeta()
+    read = 0
+    with open(path, "r") as file:
+        for line in file:
+            if read == 0 and line.strip() in FENCES:
+                read += len(line)
+                fence = line.strip()
+                continue
+            read += len(line)
+            if fence is not None:
+                if line.strip() == fence:
+                    meta = meta_from_fields(parse_header_lines(header, FENCES[fence]))
+                    fence = None
+                    if meta.title is not None:
+                        return meta
+                    continue
+                header.append(line)
+            elif line.strip().startswith("# "):
+                meta.title = line.strip().lstrip("#").strip()
+                return meta
+            # the limit only bounds the title search, never the frontmatter
+            if read >= limit and fence is None:
+                break
+    if fence is not None:
+        raise ValueError(f"frontmatter opened with {fence} is never closed")
+    return meta
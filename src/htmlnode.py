@@ -1,3 +1,66 @@
+import re
+
+WHITESPACE = re.compile(r"\s+")
+
+# Escaping checks for each special character before replacing it, so text
+# without any (the common case) costs three substring scans and no copies.
+# Chained str.replace is used over str.translate, which is far slower in
+# CPython when characters map to multi-character entities.
+
+
+def escape_text(text):
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+def escape_code(text):
+    # code keeps quotes and whitespace, so it shares the text escapes
+    return escape_text(text)
+
+
+def escape_attribute(value):
+    value = escape_text(value)
+    if '"' in value:
+        value = value.replace('"', "&quot;")
+    return value
+
+
+def props_to_html(props):
+    html_string = ""
+    if props:
+        for k, v in props.items():
+            html_string = html_string + f' {k}="{escape_attribute(str(v))}"'
+    return html_string
+
+
+def leaf_to_html(tag, value, props, minify=False):
+    # shared by LeafNode.to_html and the direct markdown renderer
+    # all leaf nodes must have a value
+    if value is None or (value == "" and tag != "img"):
+        raise ValueError("LeafNode must have a value")
+
+    value = str(value)
+    # collapse whitespace runs while serializing, except inside <pre>
+    if minify and tag != "pre":
+        value = WHITESPACE.sub(" ", value)
+    if tag == "code":
+        value = escape_code(value)
+    else:
+        value = escape_text(value)
+
+    # if there is no tag return the value as raw text
+    if tag is None:
+        return value
+
+    # render html tag
+    return f"<{tag}{props_to_html(props)}>{value}</{tag}>"
+
+
 class HTMLNode:
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
@@ -5,15 +68,11 @@ class HTMLNode:
         self.children = children
         self.props = props
 
-    def to_html(self):
+    def to_html(self, minify=False):
         raise NotImplementedError
 
     def props_to_html(self):
-        html_string = ""
-        if self.props:
-            for k, v in self.props.items():
-                html_string = html_string + f' {k}="{v}"'
-        return html_string
+        return props_to_html(self.props)
 
     def __repr__(self):
         html_string = f"tag: {self.tag}\nvalue: {self.value}\nchildren: {self.children}\nprops: {self.props}"
@@ -24,17 +83,8 @@ class LeafNode(HTMLNode):
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
-    def to_html(self):
-        # all leaf nodes must have a value
-        if self.value is None or (self.value == "" and self.tag != "img"):
-            raise ValueError("LeafNode must have a value")
-
-        # if there is no tag return the value as raw text
-        if self.tag is None:
-            return self.value
-
-        # render html tag
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+    def to_html(self, minify=False):
+        return leaf_to_html(self.tag, self.value, self.props, minify)
 
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
@@ -44,16 +94,18 @@ class ParentNode(HTMLNode):
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def to_html(self, minify=False):
         if self.tag is None:
             raise ValueError("ParentNode must have a tag")
 
         if self.children is None or len(self.children) == 0:
             raise ValueError("ParentNode must have children")
 
+        # whitespace inside <pre> is significant, so minifying stops there
+        minify_children = minify and self.tag != "pre"
         children_html = ""
         for child in self.children:
-            children_html += child.to_html()
+            children_html += child.to_html(minify_children)
 
         return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
 
@@ -0,0 +1,108 @@
+import os
+import shutil
+
+from artifacts import dest_path_to_url
+from copystatic import walk_content
+from htmlnode import escape_attribute
+from siteignore import load_ignore_rules
+
+
+class TranslationIndex:
+    # the pages of every content/<lang>/ tree keyed by their path inside the
+    # tree, e.g. "blog/tom/index.md"; the first language is the default and
+    # is written to the root of the output, the others under /<lang>/
+    def __init__(self, languages, content_root="content", dest_root="docs"):
+        self.languages = list(languages)
+        self.default = self.languages[0]
+        self.content_root = content_root
+        self.dest_root = dest_root
+        # key -> {lang: (source_path, dest_path)}
+        self.pages = {}
+        self.key_by_source = {}
+        # bundle resources of every language tree
+        self.resources = []
+        self._alternates = {}
+        rules = load_ignore_rules(content_root)
+        for lang in self.languages:
+            content_dir = os.path.join(content_root, lang)
+            pages, resources = walk_content(content_dir, self.dest_dir(lang), rules)
+            self.resources.extend(resources)
+            for source_path, dest_path in pages:
+                key = os.path.relpath(source_path, content_dir).replace(os.sep, "/")
+                self.pages.setdefault(key, {})[lang] = (source_path, dest_path)
+                self.key_by_source[source_path] = key
+
+    def dest_dir(self, lang):
+        if lang == self.default:
+            return self.dest_root
+        return os.path.join(self.dest_root, lang)
+
+    def translated_pages(self):
+        # (source, dest) of every page that exists in its own language,
+        # default language first
+        pages = []
+        for lang in self.languages:
+            for key in sorted(self.pages):
+                if lang in self.pages[key]:
+                    pages.append(self.pages[key][lang])
+        return pages
+
+    def fallbacks(self):
+        # (default dest, language dest) for pages a language has not translated
+        pairs = []
+        default_root = self.dest_dir(self.default)
+        for lang in self.languages[1:]:
+            for key in sorted(self.pages):
+                translations = self.pages[key]
+                if lang in translations or self.default not in translations:
+                    continue
+                default_dest = translations[self.default][1]
+                rel_path = os.path.relpath(default_dest, default_root)
+                pairs.append(
+                    (default_dest, os.path.join(self.dest_dir(lang), rel_path))
+                )
+        return pairs
+
+    def alternates_html(self, source_path):
+        # hreflang links to every translation of the page, or "" when it
+        # has none; fallback copies are not listed since they are duplicates
+        key = self.key_by_source.get(source_path)
+        if key is None or len(self.pages[key]) < 2:
+            return ""
+        if key not in self._alternates:
+            translations = self.pages[key]
+            links = []
+            for lang in self.languages:
+                if lang in translations:
+                    links.append((lang, translations[lang][1]))
+            if self.default in translations:
+                links.append(("x-default", translations[self.default][1]))
+            self._alternates[key] = "".join(
+                f'<link rel="alternate" hreflang="{lang}" '
+                f'href="{escape_attribute(dest_path_to_url(self.dest_root, dest))}" />'
+                for lang, dest in links
+            )
+        return self._alternates[key]
+
+
+def copy_fallbacks(fallbacks, build):
+    # untranslated pages reuse the default language's output byte for byte
+    # in every output tree instead of being rendered again
+    copied = 0
+    for default_dest, dest_path in fallbacks:
+        pairs = [(default_dest, dest_path)]
+        for target in build.targets:
+            pairs.append(
+                (
+                    target.path_for(default_dest, build.dest_root),
+                    target.path_for(dest_path, build.dest_root),
+                )
+            )
+        for src_path, dst_path in pairs:
+            # drafts and failed pages have no output to copy
+            if not os.path.exists(src_path):
+                continue
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            shutil.copyfile(src_path, dst_path)
+        copied += 1
+    return copied
@@ -0,0 +1,189 @@
+import json
+import os
+import shutil
+import struct
+from urllib.parse import urlsplit
+
+from fingerprint import HashCache
+from linkcheck import is_internal
+
+# enough bytes for the PNG, GIF and WebP headers; JPEG is scanned further
+HEADER_SIZE = 32
+
+
+def read_image_size(path):
+    # read (width, height) from the file header without decoding the image
+    with open(path, "rb") as file:
+        head = file.read(HEADER_SIZE)
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return _webp_size(head)
+        if head[:2] == b"\xff\xd8":
+            file.seek(2)
+            return _jpeg_size(file)
+    return None
+
+
+def _webp_size(head):
+    chunk = head[12:16]
+    if chunk == b"VP8X":
+        width = int.from_bytes(head[24:27], "little") + 1
+        height = int.from_bytes(head[27:30], "little") + 1
+        return width, height
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    return None
+
+
+def _jpeg_size(file):
+    # walk the marker segments until the first start-of-frame
+    while True:
+        marker = file.read(2)
+        if len(marker) != 2 or marker[0] != 0xFF:
+            return None
+        if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7:
+            continue
+        length = struct.unpack(">H", file.read(2))[0]
+        if 0xC0 <= marker[1] <= 0xCF and marker[1] not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">xHH", file.read(5))
+            return width, height
+        file.seek(length - 2, os.SEEK_CUR)
+
+
+def pillow_resizer(src_path, dst_path, width):
+    # optional resizer, only usable when Pillow is installed
+    from PIL import Image
+
+    with Image.open(src_path) as image:
+        height = round(image.height * width / image.width)
+        image.resize((width, height)).save(dst_path)
+
+
+class ImagePipeline:
+    # adds width/height (and optional srcset variants) to <img> tags, keyed
+    # by the content hash of each image so unchanged images are never redone
+    def __init__(
+        self, static_dir, dest_dir, cache_dir, resizer=None, widths=(), hashes=None
+    ):
+        self.static_dir = static_dir
+        self.dest_dir = dest_dir
+        self.cache_dir = cache_dir
+        self.resizer = resizer
+        self.widths = sorted(widths)
+        self.store_path = os.path.join(cache_dir, "images.json")
+        self.store = {"images": {}}
+        if hashes is None:
+            hashes = HashCache(os.path.join(cache_dir, "hashes.json"))
+        self.hashes = hashes
+        self.attributes_by_url = {}
+        # other output trees that get the same variants, see OutputTarget
+        self.mirror_dirs = []
+        # page bundle files, source path -> output path, for images given
+        # by a src relative to their page
+        self.resources = {}
+        if os.path.exists(self.store_path):
+            with open(self.store_path, "r") as file:
+                self.store = json.load(file)
+
+    def attributes(self, url, source_path=None):
+        # source_path is the page the image appears on
+        key = url
+        if not url.startswith("/"):
+            key = (url, os.path.dirname(source_path) if source_path else None)
+        if key not in self.attributes_by_url:
+            self.attributes_by_url[key] = self._attributes(url, source_path)
+        return self.attributes_by_url[key]
+
+    def _attributes(self, url, source_path):
+        if not is_internal(url):
+            return {}
+        path = urlsplit(url).path
+        if path.startswith("/"):
+            src_path = os.path.join(self.static_dir, path.lstrip("/"))
+            publish_dir = os.path.dirname(os.path.join(self.dest_dir, path[1:]))
+        elif source_path is not None:
+            # an image in the page bundle, copied next to the page
+            src_path = os.path.normpath(
+                os.path.join(os.path.dirname(source_path), path)
+            )
+            dest_path = self.resources.get(src_path)
+            if dest_path is None:
+                return {}
+            publish_dir = os.path.dirname(dest_path)
+        else:
+            return {}
+        if not os.path.isfile(src_path):
+            return {}
+
+        info = self._image_info(src_path)
+        if info is None:
+            return {}
+        attributes = {"width": str(info["width"]), "height": str(info["height"])}
+        if info["variants"]:
+            srcset = []
+            for width, cached_name in info["variants"]:
+                name = self._publish_variant(cached_name, publish_dir)
+                srcset.append(f"{posix_dirname(url)}{name} {width}w")
+            srcset.append(f"{url} {info['width']}w")
+            attributes["srcset"] = ", ".join(srcset)
+        return attributes
+
+    def _image_info(self, src_path):
+        digest = self.hashes.hash(src_path)
+        widths = self.widths if self.resizer is not None else []
+        info = self.store["images"].get(digest)
+        if info is None:
+            size = read_image_size(src_path)
+            if size is None:
+                return None
+            info = {"width": size[0], "height": size[1], "widths": None}
+            self.store["images"][digest] = info
+        if info["widths"] != widths:
+            info["variants"] = self._make_variants(src_path, digest, info["width"])
+            info["widths"] = widths
+        return info
+
+    def _make_variants(self, src_path, digest, width):
+        if self.resizer is None:
+            return []
+        stem, ext = os.path.splitext(os.path.basename(src_path))
+        variants = []
+        for variant_width in self.widths:
+            if variant_width >= width:
+                break
+            # the digest in the name keeps an output tree that is not wiped
+            # from serving the variant of an earlier version of the image
+            name = f"{stem}-{variant_width}w-{digest[:8]}{ext}"
+            cached = os.path.join(self.cache_dir, f"{digest}-{name}")
+            if not os.path.exists(cached):
+                os.makedirs(self.cache_dir, exist_ok=True)
+                self.resizer(src_path, cached, variant_width)
+            variants.append([variant_width, f"{digest}-{name}"])
+        return variants
+
+    def _publish_variant(self, cached_name, publish_dir):
+        # publish_dir is in the primary tree, mirrors get the same path
+        name = cached_name.split("-", 1)[1]
+        rel_dir = os.path.relpath(publish_dir, self.dest_dir)
+        for dest_dir in [self.dest_dir] + self.mirror_dirs:
+            dst_path = os.path.join(dest_dir, rel_dir, name)
+            if not os.path.exists(dst_path):
+                shutil.copy(os.path.join(self.cache_dir, cached_name), dst_path)
+        return name
+
+    def save(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self.store_path, "w") as file:
+            json.dump(self.store, file)
+        self.hashes.save()
+
+
+def posix_dirname(url):
+    return url[: url.rfind("/") + 1]
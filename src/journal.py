@@ -0,0 +1,85 @@
+import json
+import os
+
+from cache import atomic_write, cache_key
+from frontmatter import PageMeta
+from textnode import TextType
+
+
+class BuildJournal:
+    # an append-only log of the pages the current build has finished, so an
+    # interrupted build can be resumed; the first line holds a key of every
+    # setting and shared input the pages depend on
+    def __init__(self, path, config):
+        self.path = path
+        self.config = config
+        self.entries = {}
+        self.resumed = 0
+        self._file = None
+
+    def load(self):
+        # read the entries of an earlier run with the same config; returns
+        # False when there is nothing to resume from
+        if not os.path.exists(self.path):
+            return False
+        entries = {}
+        with open(self.path, "r") as file:
+            lines = file.read().split("\n")
+        try:
+            header = json.loads(lines[0])
+        except json.JSONDecodeError:
+            return False
+        if header.get("config") != self.config:
+            return False
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # the build was killed while writing this line
+                break
+            entries[entry["source"]] = entry
+        self.entries = entries
+        return True
+
+    def start(self):
+        # rewrite the journal with the entries kept by load(), dropping any
+        # torn last line, then append to it as pages finish
+        lines = [json.dumps({"config": self.config})]
+        lines.extend(json.dumps(entry) for entry in self.entries.values())
+        atomic_write(self.path, ("\n".join(lines) + "\n").encode())
+        self._file = open(self.path, "a")
+        return self
+
+    def completed(self, source_path, markdown_text, dest_paths):
+        # the journal entry of a page that is still up to date, or None
+        entry = self.entries.get(source_path)
+        if entry is None or entry["hash"] != cache_key(markdown_text):
+            return None
+        if not all(os.path.exists(path) for path in dest_paths):
+            return None
+        self.resumed += 1
+        return entry
+
+    def record(self, source_path, markdown_text, title, links, meta):
+        entry = {
+            "source": source_path,
+            "hash": cache_key(markdown_text),
+            "title": title,
+            "links": [[t.value, url, line] for t, url, line in links],
+            "meta": vars(meta),
+        }
+        # one write per line; a flushed line survives the process being
+        # killed, and a torn one is dropped on the next load
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def entry_page(entry):
+    # (title, links, meta) of a journaled page
+    links = [(TextType(t), url, line) for t, url, line in entry["links"]]
+    return entry["title"], links, PageMeta(**entry["meta"])
@@ -0,0 +1,166 @@
+import hashlib
+import os
+import posixpath
+import queue
+import threading
+from urllib.parse import urljoin, urlsplit
+
+from artifacts import dest_path_to_url
+from textnode import TextType
+
+
+class BrokenLink:
+    def __init__(self, source_path, line, text_type, target):
+        self.source_path = source_path
+        self.line = line
+        self.text_type = text_type
+        self.target = target
+
+    def __eq__(self, other):
+        return (
+            self.source_path == other.source_path
+            and self.line == other.line
+            and self.text_type == other.text_type
+            and self.target == other.target
+        )
+
+    def __str__(self):
+        kind = "image" if self.text_type == TextType.IMAGE else "link"
+        return f"{self.source_path}:{self.line}: broken {kind} {self.target}"
+
+    def __repr__(self):
+        return f"BrokenLink({self.source_path}, {self.line}, {self.target})"
+
+
+def is_internal(url):
+    parts = urlsplit(url)
+    return parts.scheme == "" and parts.netloc == "" and parts.path != ""
+
+
+def normalize_path(path):
+    # /blog/tom/, /blog/tom and /blog/tom/index.html all point at one page
+    path = posixpath.normpath(path)
+    if path.endswith("/index.html"):
+        path = path[: -len("/index.html")]
+    if path in ("", ".", "/index.html"):
+        return "/"
+    return path
+
+
+def is_markdown_link(url):
+    # a relative link to another page's source, e.g. ../tom/index.md#intro
+    parts = urlsplit(url)
+    return (
+        is_internal(url)
+        and not parts.path.startswith("/")
+        and parts.path.endswith(".md")
+    )
+
+
+class PageIndex:
+    # content source path -> url of the generated page, built once from the
+    # discovery walk so relative .md links resolve with one dict lookup
+    def __init__(self, pages=(), dest_root="docs"):
+        self.urls = {}
+        for source_path, dest_path in pages:
+            url = dest_path_to_url(dest_root, dest_path)
+            self.urls[os.path.normpath(source_path)] = url
+        self._digest = None
+
+    def resolve(self, source_path, url):
+        # the page url for a .md link written in source_path, or None
+        path, separator, fragment = url.partition("#")
+        target = os.path.normpath(os.path.join(os.path.dirname(source_path), path))
+        page_url = self.urls.get(target)
+        if page_url is None:
+            return None
+        return page_url + separator + fragment
+
+    def digest(self):
+        # changes whenever a page is added, removed or moved
+        if self._digest is None:
+            digest = hashlib.sha256()
+            for source_path, url in sorted(self.urls.items()):
+                digest.update(f"{source_path}\0{url}\n".encode())
+            self._digest = digest.hexdigest()
+        return self._digest
+
+
+class PathIndex:
+    # the set of every URL path the build produces, built once per build
+    def __init__(self, paths=()):
+        self.paths = set()
+        for path in paths:
+            self.add(path)
+
+    def add(self, path):
+        self.paths.add(normalize_path("/" + path.lstrip("/")))
+
+    def __contains__(self, path):
+        return normalize_path(path) in self.paths
+
+    def __len__(self):
+        return len(self.paths)
+
+    @classmethod
+    def for_build(cls, dest_root, page_dest_paths, static_files, generated=()):
+        # generated names files the build writes itself, e.g. feed.xml
+        index = cls(static_files)
+        for path in generated:
+            index.add(path)
+        for dest_path in page_dest_paths:
+            index.add(dest_path_to_url(dest_root, dest_path))
+        return index
+
+
+class LinkChecker:
+    # validates internal links on a background thread while pages render
+    def __init__(self, index, dest_root):
+        self.index = index
+        self.dest_root = dest_root
+        self.broken = []
+        # the resolved path of each broken link, in the same order
+        self._targets = []
+        self.checked = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def submit(self, source_path, dest_path, links):
+        self._queue.put((source_path, dest_path, links))
+
+    def close(self, later_paths=()):
+        # later_paths are written after the pages, such as tag and archive
+        # listings; links that only they satisfy are not broken
+        self._queue.put(None)
+        self._thread.join()
+        for path in later_paths:
+            self.index.add(path)
+        self.broken = [
+            link
+            for link, target in zip(self.broken, self._targets)
+            if target not in self.index
+        ]
+        self.broken.sort(key=lambda b: (b.source_path, b.line))
+        return self.broken
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            self.check_page(*item)
+
+    def check_page(self, source_path, dest_path, links):
+        page_url = dest_path_to_url(self.dest_root, dest_path)
+        for text_type, url, line in links:
+            if not is_internal(url):
+                continue
+            self.checked += 1
+            target = urlsplit(urljoin(page_url, url)).path
+            if target not in self.index:
+                self.broken.append(BrokenLink(source_path, line, text_type, url))
+                self._targets.append(target)
@@ -1,15 +1,600 @@
+import argparse
+import json
+import shutil
+import signal
+import subprocess
+import os
 import sys
+import time
 
-from copystatic import copy_directory_contents, generate_pages_recursive
+from artifacts import ARTIFACT_FILES, BuildArtifacts, load_link_manifest
+from buildcontext import BuildContext, OutputTarget
+from copystatic import (
+    copy_directory_contents,
+    sync_resources,
+    walk_content,
+    generate_listings,
+    generate_pages_recursive,
+    register_page,
+    remove_empty_parents,
+)
+from buildlog import log, setup_logging
+from daemon import PreviewRenderer, RenderServer
+from changes import (
+    full_build_reason,
+    git_changes,
+    git_commit_times,
+    plan_incremental,
+    restore_pages,
+)
+from cache import CacheStore, LocalDirectoryBackend, cache_key, code_digest
+from errors import BuildErrors, BuildFailure
+from fingerprint import (
+    HashCache,
+    fingerprint_directory,
+    git_blob_ids,
+    list_files,
+    write_manifest,
+)
+from i18n import TranslationIndex, copy_fallbacks
+from images import ImagePipeline, pillow_resizer
+from journal import BuildJournal
+from linkcheck import LinkChecker, PageIndex, PathIndex
+from memreport import SORT_KEYS, MemoryReport
+from partials import PartialCache
+from planner import PageTimings, plan_build, url_to_output
+from taxonomy import ListingState, TaxonomyIndex
+from template import LayoutCache
+from transforms import TransformPipeline, load_transform
+
+FAILED_PAGES_PATH = ".cache/failed-pages.json"
+JOURNAL_PATH = ".cache/journal.jsonl"
+TIMINGS_PATH = ".cache/timings.json"
+# what a --since build asks git about
+CHANGE_PATHS = ["content", "static", "template.html", "layouts", "partials"]
+# files whose hashes the cache store can share between CI runners
+HASHED_PATHS = ["static", "content", "layouts", "partials", "template.html"]
+# the arguments that change what a page renders to
+OUTPUT_ARGUMENTS = (
+    "basepath",
+    "site_url",
+    "minify",
+    "fingerprint",
+    "image_widths",
+    "target",
+    "languages",
+    "transform",
+)
+
+
+def parse_target(value):
+    basepath, found, dest_root = value.partition("=")
+    if not found or not basepath or not dest_root:
+        raise argparse.ArgumentTypeError(f"expected BASEPATH=DIR, got {value!r}")
+    return basepath, dest_root
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the static site into docs/")
+    # default to root if no basepath is passed
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--site-url", default="", help="absolute origin used in sitemap and feed"
+    )
+    parser.add_argument(
+        "--check-links",
+        action="store_true",
+        help="fail the build when an internal link or image target is missing",
+    )
+    parser.add_argument(
+        "--target",
+        type=parse_target,
+        action="append",
+        default=[],
+        metavar="BASEPATH=DIR",
+        help="also write the site to DIR for BASEPATH, reusing the same rendering",
+    )
+    parser.add_argument(
+        "--languages",
+        default="",
+        help="comma separated content/<lang>/ trees built together, default first",
+    )
+    parser.add_argument(
+        "--minify", action="store_true", help="write whitespace-minified html"
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="copy static files to content-hashed names and rewrite references",
+    )
+    parser.add_argument(
+        "--image-widths",
+        default="",
+        help="comma separated widths of downscaled image variants (needs Pillow)",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=10,
+        help="posts per tag, archive and blog index page",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="content-addressed build cache; unchanged pages are reused from it",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        help="evict least recently used cache entries beyond this size",
+    )
+    parser.add_argument(
+        "--remote-cache-dir",
+        help="shared directory (e.g. a CI mount) backing the local cache",
+    )
+    parser.add_argument(
+        "--keep-going",
+        action="store_true",
+        help="build every page that can be built and report all failures at the end",
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="rebuild only the pages that failed in the last --keep-going build",
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="report what a build would render, copy and delete, without writing",
+    )
+    parser.add_argument(
+        "--since",
+        metavar="REV",
+        help="rebuild only what changed since a git revision into the existing docs/",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue an interrupted build from its journal of finished pages",
+    )
+    parser.add_argument(
+        "--transform",
+        action="append",
+        default=[],
+        metavar="MODULE:NAME",
+        help="run a Transform over every page's node tree; repeat for more, "
+        "all of them share one traversal",
+    )
+    parser.add_argument(
+        "--serve",
+        metavar="SOCKET",
+        help="run a render daemon answering JSON-lines preview requests on a "
+        "Unix socket instead of building",
+    )
+    parser.add_argument(
+        "--memory-report",
+        nargs="?",
+        const=".cache/memory-report.json",
+        metavar="PATH",
+        help="trace allocations and node counts per rendered page into a JSON report",
+    )
+    parser.add_argument(
+        "--memory-sort",
+        choices=sorted(SORT_KEYS),
+        default="peak",
+        help="order of the memory report",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="count",
+        default=0,
+        help="log every copied file and generated page",
+    )
+    parser.add_argument(
+        "--log-format",
+        choices=["text", "json"],
+        default="text",
+        help="json writes one structured record per line for CI",
+    )
+    args = parser.parse_args()
+    try:
+        args.transforms = TransformPipeline(
+            [load_transform(spec) for spec in args.transform]
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+def plan_since(args, pages):
+    # (IncrementalPlan, links manifest) for a --since build, or (None, None)
+    # when a full build is needed
+    def full_build(reason):
+        log.info(f"--since {args.since}: {reason}, doing a full build")
+        return None, None
+
+    if args.languages:
+        return full_build("multi-language builds are always built in full")
+    manifest_path = os.path.join("docs", "links.json")
+    if not os.path.exists(manifest_path):
+        return full_build("no earlier build in docs/")
+    try:
+        changes = git_changes(args.since, CHANGE_PATHS)
+    except (OSError, subprocess.CalledProcessError) as e:
+        detail = getattr(e, "stderr", None) or str(e)
+        return full_build(f"git diff failed: {detail.strip()}")
+    reason = full_build_reason(changes)
+    if reason is not None:
+        return full_build(reason)
+    manifest = load_link_manifest(manifest_path)
+    plan = plan_incremental(changes, pages, manifest)
+    if args.fingerprint and (plan.static_copy or plan.static_remove):
+        return full_build("fingerprinted static files changed")
+    return plan, manifest
+
+
+def apply_incremental_changes(plan, build):
+    # bring the existing output trees up to date without wiping them
+    trees = [("docs", None)] + [(target.dest_root, target) for target in build.targets]
+    for root, target in trees:
+        for rel_path in plan.static_copy:
+            dest_path = os.path.join(root, rel_path)
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            shutil.copy(os.path.join("static", rel_path), dest_path)
+        removed = [os.path.join(root, rel_path) for rel_path in plan.static_remove]
+        for dest_path in plan.remove:
+            removed.append(
+                dest_path if target is None else target.path_for(dest_path, "docs")
+            )
+        for path in removed:
+            if os.path.exists(path):
+                os.remove(path)
+                remove_empty_parents(path, root)
+
+
+def journal_config(args, hashes):
+    # a resumed build must match the interrupted one in its settings and in
+    # everything every page shares: templates, partials and static files
+    settings = json.dumps({name: getattr(args, name) for name in OUTPUT_ARGUMENTS})
+    shared = []
+    for directory in ("layouts", "partials", "static"):
+        for path in list_files(directory):
+            full_path = os.path.join(directory, path)
+            shared.append(f"{full_path}:{hashes.hash(full_path)}")
+    return cache_key(settings, hashes.hash("template.html"), *shared)
+
+
+def plan_site(args):
+    # --plan: compare sources against docs/ by size and mtime, write nothing
+    started = time.monotonic()
+    manifest_path = os.path.join("docs", "links.json")
+    manifest = None
+    if os.path.exists(manifest_path):
+        manifest = load_link_manifest(manifest_path)
+    listing_urls = ()
+    if os.path.exists(".cache/listings.json"):
+        listing_urls = ListingState(".cache/listings.json").digests.keys()
+    plan = plan_build(
+        "content",
+        "static",
+        "docs",
+        ["template.html", "layouts", "partials"],
+        PageTimings(TIMINGS_PATH),
+        manifest,
+        listing_urls,
+    )
+    for source_path in plan.render:
+        log.debug(f"render {source_path}")
+    for rel_path in plan.copy:
+        log.debug(f"copy {rel_path}")
+    for rel_path in plan.delete_pages + plan.delete_assets:
+        log.debug(f"delete {rel_path}")
+    log.info(
+        plan.summary(),
+        extra={
+            "fields": {
+                "event": "plan",
+                "render": len(plan.render),
+                "unchanged": len(plan.unchanged),
+                "delete_pages": len(plan.delete_pages),
+                "copy": len(plan.copy),
+                "delete_assets": len(plan.delete_assets),
+                "estimated_seconds": round(plan.estimated_seconds, 3),
+            }
+        },
+    )
+    log.info(f"planned in {time.monotonic() - started:.2f}s")
+    return 0
+
+
+def serve_previews(args):
+    # --serve: keep templates and caches warm for editor and CMS previews
+    renderer = PreviewRenderer(
+        "content",
+        "template.html",
+        "layouts",
+        "partials",
+        "docs",
+        args.basepath,
+        args.minify,
+        args.transforms or None,
+    )
+    server = RenderServer(args.serve, renderer)
+
+    def stop(signum, frame):
+        # a supervisor's SIGTERM shuts down like Ctrl-C, removing the socket
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    log.info(f"render daemon listening on {args.serve}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        log.info("render daemon stopped", extra={"fields": renderer.stats()})
+    finally:
+        server.server_close()
+    return 0
+
+
+def build_site(args):
+    # returns the process exit code
+    if args.plan:
+        return plan_site(args)
+    if args.serve:
+        return serve_previews(args)
+    started = time.monotonic()
+    basepath = args.basepath
+    languages = [lang for lang in args.languages.split(",") if lang]
+    commit_times = git_commit_times(["content"])
+    build = BuildContext(
+        artifacts=BuildArtifacts("docs", basepath, args.site_url, commit_times),
+        minify=args.minify,
+        layouts=LayoutCache("layouts", "content", args.minify, languages),
+        partials=PartialCache("partials"),
+        timings=PageTimings(TIMINGS_PATH),
+        transforms=args.transforms or None,
+        targets=[
+            OutputTarget(
+                target_basepath,
+                root,
+                BuildArtifacts(root, target_basepath, args.site_url, commit_times),
+            )
+            for target_basepath, root in args.target
+        ],
+    )
+    fallbacks = []
+    if languages:
+        build.translations = TranslationIndex(languages, "content", "docs")
+        pages = build.translations.translated_pages()
+        fallbacks = build.translations.fallbacks()
+        resources = build.translations.resources
+    else:
+        pages, resources = walk_content("content", "docs")
+    build.page_index = PageIndex(pages, "docs")
+    # every page of the site, before --since or --retry-failed narrow the
+    # list down to the ones rendered this run
+    all_pages = pages + fallbacks
+
+    retry = args.retry_failed
+    if args.keep_going or retry:
+        build.errors = BuildErrors()
+    plan, manifest = None, None
+    if args.since and not retry:
+        plan, manifest = plan_since(args, pages)
+    store = None
+    blob_ids = {}
+    if args.cache_dir:
+        remote = None
+        if args.remote_cache_dir:
+            remote = LocalDirectoryBackend(args.remote_cache_dir)
+        max_bytes = args.cache_max_mb * 1024 * 1024 if args.cache_max_mb else None
+        store = CacheStore(args.cache_dir, max_bytes, remote)
+        blob_ids = git_blob_ids(HASHED_PATHS)
+    hashes = HashCache(".cache/hashes.json", store, blob_ids)
+    resume = False
+    if not retry and plan is None:
+        build.journal = BuildJournal(JOURNAL_PATH, journal_config(args, hashes))
+        resume = args.resume and build.journal.load()
+        if args.resume and not resume:
+            log.info("no journal matches this build, starting from scratch")
+    if args.fingerprint:
+        build.assets = fingerprint_directory("static", hashes)
+    listing_state = ListingState(".cache/listings.json")
+    if retry:
+        # docs/ already holds the last build; only the failed pages are redone
+        static_files = list_files("static")
+        static_copied = 0
+    elif plan is not None:
+        apply_incremental_changes(plan, build)
+        static_files = list_files("static")
+        static_copied = len(plan.static_copy)
+    else:
+        # the listings of the last build survive the wipe, so the ones whose
+        # entries are unchanged are not rendered again
+        keep = {url_to_output(url) for url in listing_state.digests}
+        # so does the feed, which records a digest of its entries
+        keep.add("feed.xml")
+        static_files = copy_directory_contents(
+            "static", "docs", build.assets, build.errors, not resume, keep
+        )
+        for target in build.targets:
+            copy_directory_contents(
+                "static", target.dest_root, build.assets, build.errors, not resume, keep
+            )
+        static_copied = len(static_files)
+    resources_copied = sync_resources(resources, build)
+    if build.assets is not None:
+        for root in ["docs"] + [target.dest_root for target in build.targets]:
+            write_manifest(os.path.join(root, "asset-manifest.json"), build.assets)
+
+    widths = [int(width) for width in args.image_widths.split(",") if width]
+    resizer = pillow_resizer if widths else None
+    build.images = ImagePipeline(
+        "static", "docs", ".cache/images", resizer, widths, hashes
+    )
+    build.images.mirror_dirs = [target.dest_root for target in build.targets]
+    build.images.resources = {
+        os.path.normpath(source_path): dest_path for source_path, dest_path in resources
+    }
+    if store is not None:
+        build.cache = store
+        # pages embed image dimensions, so static files and page bundle
+        # files are part of the key
+        static_hashes = [
+            f"{path}:{hashes.hash(os.path.join('static', path))}"
+            for path in list_files("static")
+        ]
+        static_hashes += [
+            f"{source_path}:{hashes.hash(source_path)}" for source_path, _ in resources
+        ]
+        build.cache_salt = cache_key(code_digest(), args.image_widths, *static_hashes)
+    if retry:
+        failed = set(BuildErrors.load_failed_paths(FAILED_PAGES_PATH))
+        kept = [page for page in pages if page[0] not in failed]
+        pages = [page for page in pages if page[0] in failed]
+        # the pages that built last time keep their sitemap, feed and link
+        # records, so the artifacts can be written again with the retried ones
+        manifest_path = os.path.join("docs", "links.json")
+        manifest = {}
+        if os.path.exists(manifest_path):
+            manifest = load_link_manifest(manifest_path)
+        for page in restore_pages(kept, manifest, "docs"):
+            register_page(*page, build)
+        log.info(f"retrying {len(pages)} failed pages")
+    if plan is not None:
+        unchanged = [page for page in pages if page[0] not in plan.rebuild]
+        pages = [page for page in pages if page[0] in plan.rebuild]
+        for page in restore_pages(unchanged, manifest, "docs"):
+            register_page(*page, build)
+        log.info(
+            f"--since {args.since}: rebuilding {len(pages)} pages, "
+            f"keeping {len(unchanged)}"
+        )
+
+    if args.check_links:
+        dest_paths = [dest_path for _, dest_path in all_pages]
+        resource_files = [
+            os.path.relpath(dest_path, "docs").replace(os.sep, "/")
+            for _, dest_path in resources
+        ]
+        generated = list(ARTIFACT_FILES)
+        if build.assets is not None:
+            generated.append("asset-manifest.json")
+        index = PathIndex.for_build(
+            "docs", dest_paths, static_files + resource_files, generated
+        )
+        build.link_checker = LinkChecker(index, "docs").start()
+
+    if args.memory_report:
+        # pages reused from the cache or the journal are not rendered, so
+        # they do not appear in the report
+        build.memory = MemoryReport().start()
+    if build.journal is not None:
+        build.journal.start()
+    try:
+        generate_pages_recursive(
+            "content", "template.html", "docs", basepath, build, pages
+        )
+    finally:
+        if build.journal is not None:
+            build.journal.close()
+        if build.memory is not None:
+            build.memory.stop()
+    if build.memory is not None:
+        build.memory.write_json(args.memory_report, args.memory_sort)
+        log.info(build.memory.table(args.memory_sort))
+        log.info(f"memory report written to {args.memory_report}")
+    if resume:
+        log.info(f"resumed: {build.journal.resumed} pages were already built")
+    if fallbacks:
+        copy_fallbacks(fallbacks, build)
+        log.info(f"{len(fallbacks)} untranslated pages fall back to {languages[0]}")
+
+    # every page is registered by now, rendered or restored
+    build.artifacts.write_all()
+    for target in build.targets:
+        target.artifacts.write_all()
+    taxonomy = TaxonomyIndex(build.artifacts.pages)
+    listings = taxonomy.listings(args.page_size)
+    listings_rendered = generate_listings(
+        listings,
+        "template.html",
+        "docs",
+        basepath,
+        build,
+        listing_state,
+        taxonomy.taken_urls,
+    )
+    listing_state.save()
+    build.images.save()
+    build.timings.save()
+    if build.cache is not None:
+        build.cache.gc()
+        log.info(
+            f"build cache: {build.cache.hits} hits, {build.cache.misses} misses",
+            extra={"fields": {"hits": build.cache.hits, "misses": build.cache.misses}},
+        )
+
+    exit_code = 0
+    if build.link_checker is not None:
+        broken = build.link_checker.close([listing.url for listing in listings])
+        for link in broken:
+            log.error(
+                str(link),
+                extra={
+                    "fields": {
+                        "event": "broken_link",
+                        "source": link.source_path,
+                        "line": link.line,
+                        "target": link.target,
+                    }
+                },
+            )
+        log.info(
+            f"checked {build.link_checker.checked} internal links, {len(broken)} broken"
+        )
+        if broken:
+            exit_code = 1
+
+    if build.errors is not None:
+        build.errors.save(FAILED_PAGES_PATH)
+        if build.errors:
+            log.error(build.errors.report())
+            exit_code = 1
+
+    elapsed = time.monotonic() - started
+    log.info(
+        f"built {len(build.artifacts.pages)} pages, {listings_rendered} listings, "
+        f"copied {static_copied} static files and {resources_copied} page "
+        f"resources in {elapsed:.2f}s",
+        extra={
+            "fields": {
+                "event": "summary",
+                "pages": len(build.artifacts.pages),
+                "listings": listings_rendered,
+                "static_files": static_copied,
+                "resources": resources_copied,
+                "seconds": round(elapsed, 3),
+            }
+        },
+    )
+    return exit_code
 
 
 def main():
-    # default to root if no arg is passed
-    basepath = "/"
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
-    copy_directory_contents("static", "docs")
-    generate_pages_recursive("content", "template.html", "docs", basepath)
+    args = parse_args()
+    listener = setup_logging(args.verbose, args.log_format == "json")
+    try:
+        exit_code = build_site(args)
+    except BuildFailure as failure:
+        log.error(f"build failed: {failure}")
+        exit_code = 1
+    except KeyboardInterrupt:
+        log.error("interrupted, run again with --resume to continue")
+        exit_code = 130
+    finally:
+        listener.stop()
+    sys.exit(exit_code)
 
 
 if __name__ == "__main__":
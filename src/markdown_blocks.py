@@ -1,8 +1,79 @@
+import re
 from enum import Enum
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from buildlog import log
+from htmlnode import LeafNode, ParentNode, escape_attribute, leaf_to_html
 from inline_markdown import text_to_textnodes
-from textnode import text_node_to_html_node
+from linkcheck import is_markdown_link
+from textnode import TextType, text_node_to_leaf_parts
+
+# {{< name key="value" >}} on a block of its own expands partials/name.md
+SHORTCODE = re.compile(r'\{\{<\s*([\w-]+)((?:\s+[\w-]+="[^"]*")*)\s*>\}\}')
+SHORTCODE_ARGUMENT = re.compile(r'([\w-]+)="([^"]*)"')
+
+
+class RenderContext:
+    # optional per-page state that is filled in while a page is rendered
+    def __init__(
+        self,
+        images=None,
+        first_line=1,
+        partials=None,
+        pages=None,
+        source_path=None,
+        outline=None,
+    ):
+        self.images = images
+        # a PartialCache that expands shortcodes
+        self.partials = partials
+        # a PageIndex and the page's own source path, to resolve .md links
+        self.pages = pages
+        self.source_path = source_path
+        # an Outline that counts words and gives headings their ids
+        self.outline = outline
+        # line of the source file the markdown body starts on
+        self.first_line = first_line
+        self.links = []
+        self.block = ""
+        self.line = first_line
+        # 0-based index of the block being rendered, for error reports
+        self.block_index = None
+
+    def start_block(self, line, block):
+        self.block = block
+        self.line = line + self.first_line - 1
+        self.block_index = 0 if self.block_index is None else self.block_index + 1
+
+    def line_of(self, url):
+        # the line inside the current block that holds the target
+        for i, block_line in enumerate(self.block.split("\n")):
+            if f"({url})" in block_line:
+                return self.line + i
+        return self.line
+
+    def record_link(self, text_type, url, written=None):
+        # written is the url as it appears in the source, if it was resolved
+        self.links.append((text_type, url, self.line_of(written or url)))
+
+    def resolve_link(self, url):
+        if self.pages is None or self.source_path is None:
+            return url
+        if not is_markdown_link(url):
+            return url
+        resolved = self.pages.resolve(self.source_path, url)
+        if resolved is None:
+            log.warning(
+                f"{self.source_path}:{self.line_of(url)}: unresolved link {url}",
+                extra={
+                    "fields": {
+                        "event": "unresolved_link",
+                        "source": self.source_path,
+                        "target": url,
+                    }
+                },
+            )
+            return url
+        return resolved
 
 
 class BlockType(Enum):
@@ -12,6 +83,7 @@ class BlockType(Enum):
     QUOTE = "quote"
     ULIST = "unordered_list"
     OLIST = "ordered_list"
+    SHORTCODE = "shortcode"
 
 
 def extract_title(markdown):
@@ -27,6 +99,9 @@ def block_to_block_type(block):
     # split the block into lines so we can check per-line patterns
     lines = block.split("\n")
 
+    if block.startswith("{{<") and SHORTCODE.fullmatch(block):
+        return BlockType.SHORTCODE
+
     # checking to see if the block is a heading
     if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
         return BlockType.HEADING
@@ -68,6 +143,19 @@ def markdown_to_blocks(markdown):
     return list(filter(lambda x: x != "", stripped))
 
 
+def markdown_to_blocks_with_lines(markdown):
+    # same as markdown_to_blocks but keeps the 1-based line each block starts on
+    blocks = []
+    line = 1
+    for section in markdown.split("\n\n"):
+        stripped = section.strip()
+        if stripped != "":
+            leading = section[: len(section) - len(section.lstrip())]
+            blocks.append((line + leading.count("\n"), stripped))
+        line += section.count("\n") + 2
+    return blocks
+
+
 def count_heading(line):
     count = 0
     for i in range(len(line)):
@@ -79,98 +167,180 @@ def count_heading(line):
     return count
 
 
-def text_to_children(text):
-    # parse inline markdown into TextNodes
-    text_nodes = text_to_textnodes(text)
-
-    # convert each TextNode to an HTMLNode
+def text_to_leaf_parts(text, context=None):
+    # parse inline markdown into (tag, value, props) for each TextNode, so
+    # both the node tree and the direct renderer share one inline pass
+    parts = []
+    for tn in text_to_textnodes(text):
+        if context is not None and tn.text_type in (TextType.LINK, TextType.IMAGE):
+            written = tn.url
+            if tn.text_type == TextType.LINK:
+                tn.url = context.resolve_link(tn.url)
+            context.record_link(tn.text_type, tn.url, written)
+        tag, value, props = text_node_to_leaf_parts(tn)
+        if tn.text_type == TextType.IMAGE and context is not None and context.images:
+            props.update(context.images.attributes(tn.url, context.source_path))
+        parts.append((tag, value, props))
+        if context is not None and context.outline is not None:
+            context.outline.count_words(value)
+    return parts
+
+
+def heading_id(tag, parts, context):
+    # the anchor id of a heading when the page collects an outline
+    if context is None or context.outline is None or tag[0] != "h":
+        return None
+    text = "".join(value for _, value, _ in parts)
+    return context.outline.add_heading(int(tag[1]), text)
+
+
+def text_to_children(text, context=None):
+    # convert each inline TextNode to an HTMLNode
     children = []
-    for tn in text_nodes:
-        child = text_node_to_html_node(tn)
-        children.append(child)
+    for tag, value, props in text_to_leaf_parts(text, context):
+        children.append(LeafNode(tag, value, props))
 
     # return list of HTMLNode children
     return children
 
 
-def markdown_to_html_node(markdown):
-    div_node = ParentNode("div", children=[])
-    blocks = markdown_to_blocks(markdown)
-    for block in blocks:
-        block_type = block_to_block_type(block)
-
-        if block_type == BlockType.HEADING:
-            heading_number = count_heading(block)
-            heading_text = block.lstrip("#").strip()
-            head_node = ParentNode(
-                f"h{heading_number}", children=text_to_children(heading_text)
-            )
-            div_node.children.append(head_node)  # type: ignore
-
-        elif block_type == BlockType.PARAGRAPH:
-            lines = block.split("\n")
-            paragraph_text = " ".join(lines)
-            par_node = ParentNode("p", children=text_to_children(paragraph_text))
-            div_node.children.append(par_node)  # type: ignore
-
-        elif block_type == BlockType.CODE:
-            lines = block.split("\n")
-            # drop the first and last ```
-            inner_lines = lines[1:-1]
-
-            val = "\n".join(inner_lines) + "\n"
-            code_node = LeafNode("code", val)
-            pre_node = ParentNode("pre", children=[code_node])
-            div_node.children.append(pre_node)  # type: ignore
-        elif block_type == BlockType.QUOTE:
-            lines = block.split("\n")
-            clean_lines = []
-            for line in lines:
-                clean_lines.append(line.lstrip(">").lstrip())
-            clean_text = " ".join(clean_lines)
-
-            bquote_node = ParentNode(
-                "blockquote", children=text_to_children(clean_text)
-            )
-            div_node.children.append(bquote_node)  # type: ignore
+def block_to_parts(block):
+    # returns the block's tag and the inline texts (or code) it holds:
+    # headings, paragraphs and quotes hold one text, lists one per item
+    block_type = block_to_block_type(block)
 
-        elif block_type == BlockType.ULIST:
-            lines = block.split("\n")
-            clean_lines = []
-            for line in lines:
-                if not line.strip():
-                    continue
-                clean_lines.append(line.lstrip("- "))
+    if block_type == BlockType.SHORTCODE:
+        # the partial's name and its arguments
+        match = SHORTCODE.fullmatch(block)
+        return "shortcode", [match.group(1), dict(SHORTCODE_ARGUMENT.findall(block))]
 
-            li_nodes = []
-            for item in clean_lines:
-                li_node = ParentNode("li", children=text_to_children(item))
-                li_nodes.append(li_node)
-            ul_node = ParentNode("ul", children=li_nodes)
-            div_node.children.append(ul_node)  # type: ignore
-
-        elif block_type == BlockType.OLIST:
-            lines = block.split("\n")
-            clean_lines = []
-            count = 1
-            for line in lines:
-                if not line.strip():
-                    continue
-                prefix = f"{count}."
-                stripped = line.strip()
-                if stripped.startswith(prefix):
-                    without_num = stripped[len(prefix) :]
-                    clean_lines.append(without_num.lstrip())
-                else:
-                    clean_lines.append(stripped)
-                count += 1
+    if block_type == BlockType.HEADING:
+        heading_number = count_heading(block)
+        return f"h{heading_number}", [block.lstrip("#").strip()]
+
+    if block_type == BlockType.PARAGRAPH:
+        lines = block.split("\n")
+        return "p", [" ".join(lines)]
+
+    if block_type == BlockType.CODE:
+        lines = block.split("\n")
+        # drop the first and last ```
+        inner_lines = lines[1:-1]
+        return "pre", ["\n".join(inner_lines) + "\n"]
+
+    if block_type == BlockType.QUOTE:
+        lines = block.split("\n")
+        clean_lines = []
+        for line in lines:
+            clean_lines.append(line.lstrip(">").lstrip())
+        return "blockquote", [" ".join(clean_lines)]
+
+    if block_type == BlockType.ULIST:
+        lines = block.split("\n")
+        clean_lines = []
+        for line in lines:
+            if not line.strip():
+                continue
+            clean_lines.append(line.lstrip("- "))
+        return "ul", clean_lines
 
+    # the only block type left is an ordered list
+    lines = block.split("\n")
+    clean_lines = []
+    count = 1
+    for line in lines:
+        if not line.strip():
+            continue
+        prefix = f"{count}."
+        stripped = line.strip()
+        if stripped.startswith(prefix):
+            without_num = stripped[len(prefix) :]
+            clean_lines.append(without_num.lstrip())
+        else:
+            clean_lines.append(stripped)
+        count += 1
+    return "ol", clean_lines
+
+
+def scan_blocks(markdown, context=None):
+    # yields (tag, items) per block, keeping the context on the current block
+    for line, block in markdown_to_blocks_with_lines(markdown):
+        if context is not None:
+            context.start_block(line, block)
+        yield block_to_parts(block)
+
+
+def expand_shortcode(items, context):
+    name, args = items
+    if context is None or context.partials is None:
+        raise ValueError(f"shortcode {name!r} used without a partials directory")
+    partial = context.partials.expand(name, args, context.images)
+    # the partial's links are reported at the line of the shortcode
+    for text_type, url, _ in partial.links:
+        context.links.append((text_type, url, context.line))
+    return partial
+
+
+def markdown_to_html_node(markdown, context=None):
+    div_node = ParentNode("div", children=[])
+    for tag, items in scan_blocks(markdown, context):
+        if tag == "shortcode":
+            partial = expand_shortcode(items, context)
+            div_node.children.extend(partial.node.children)
+        elif tag == "pre":
+            code_node = LeafNode("code", items[0])
+            div_node.children.append(ParentNode("pre", children=[code_node]))
+        elif tag in ("ul", "ol"):
             li_nodes = []
-            for item in clean_lines:
-                li_node = ParentNode("li", children=text_to_children(item))
+            for item in items:
+                li_node = ParentNode("li", children=text_to_children(item, context))
                 li_nodes.append(li_node)
-
-            ol_node = ParentNode("ol", children=li_nodes)
-            div_node.children.append(ol_node)  # type: ignore
+            div_node.children.append(ParentNode(tag, children=li_nodes))
+        else:
+            parts = text_to_leaf_parts(items[0], context)
+            children = [LeafNode(*part) for part in parts]
+            anchor = heading_id(tag, parts, context)
+            props = {"id": anchor} if anchor is not None else None
+            div_node.children.append(ParentNode(tag, children, props))
 
     return div_node
+
+
+def inline_html(text, context, minify):
+    return leaf_parts_html(text_to_leaf_parts(text, context), minify)
+
+
+def leaf_parts_html(parts, minify):
+    if not parts:
+        raise ValueError("ParentNode must have children")
+    return "".join(
+        leaf_to_html(tag, value, props, minify) for tag, value, props in parts
+    )
+
+
+def markdown_to_html(markdown, context=None, minify=False):
+    # renders straight to a string without building the HTMLNode tree;
+    # the output is byte-identical to markdown_to_html_node(...).to_html()
+    html = []
+    for tag, items in scan_blocks(markdown, context):
+        if tag == "shortcode":
+            html.append(expand_shortcode(items, context).inner_html(minify))
+        elif tag == "pre":
+            # whitespace inside <pre> is significant, so it is never minified
+            html.append(f"<pre>{leaf_to_html('code', items[0], None)}</pre>")
+        elif tag in ("ul", "ol"):
+            if not items:
+                raise ValueError("ParentNode must have children")
+            html.append(f"<{tag}>")
+            for item in items:
+                html.append(f"<li>{inline_html(item, context, minify)}</li>")
+            html.append(f"</{tag}>")
+        else:
+            parts = text_to_leaf_parts(items[0], context)
+            anchor = heading_id(tag, parts, context)
+            props = f' id="{escape_attribute(anchor)}"' if anchor is not None else ""
+            html.append(f"<{tag}{props}>{leaf_parts_html(parts, minify)}</{tag}>")
+
+    if not html:
+        raise ValueError("ParentNode must have children")
+    return "<div>" + "".join(html) + "</div>"
@@ -0,0 +1,154 @@
+import json
+import os
+import tracemalloc
+
+from htmlnode import LeafNode, ParentNode
+from markdown_blocks import markdown_to_html_node
+from textnode import TextNode
+
+SORT_KEYS = {
+    "peak": lambda page: page.peak,
+    "nodes": lambda page: page.nodes,
+    "size": lambda page: page.output_bytes,
+}
+
+
+class PageMemory:
+    def __init__(
+        self,
+        source_path,
+        parse_peak,
+        serialize_peak,
+        text_nodes,
+        leaf_nodes,
+        parent_nodes,
+        output_bytes,
+    ):
+        self.source_path = source_path
+        self.parse_peak = parse_peak
+        self.serialize_peak = serialize_peak
+        self.text_nodes = text_nodes
+        self.leaf_nodes = leaf_nodes
+        self.parent_nodes = parent_nodes
+        self.output_bytes = output_bytes
+
+    @property
+    def peak(self):
+        return max(self.parse_peak, self.serialize_peak)
+
+    @property
+    def nodes(self):
+        return self.leaf_nodes + self.parent_nodes
+
+    def to_dict(self):
+        return {
+            "source": self.source_path,
+            "peak_bytes": self.peak,
+            "parse_peak_bytes": self.parse_peak,
+            "serialize_peak_bytes": self.serialize_peak,
+            "text_nodes": self.text_nodes,
+            "leaf_nodes": self.leaf_nodes,
+            "parent_nodes": self.parent_nodes,
+            "output_bytes": self.output_bytes,
+        }
+
+    def __repr__(self):
+        return f"PageMemory({self.source_path}, peak={self.peak}, nodes={self.nodes})"
+
+
+class CountInstances:
+    # counts the instances of each class created while active, including
+    # the intermediate TextNodes the inline splitters throw away, by
+    # wrapping each class's own __init__ until exit
+    def __init__(self, *classes):
+        self.classes = classes
+        self.counts = dict.fromkeys(classes, 0)
+        self._originals = {}
+
+    def __enter__(self):
+        for cls in self.classes:
+            self._originals[cls] = cls.__dict__["__init__"]
+            cls.__init__ = self._counted(cls, self._originals[cls])
+        return self
+
+    def __exit__(self, *exc_info):
+        for cls, original in self._originals.items():
+            cls.__init__ = original
+        self._originals.clear()
+
+    def _counted(self, cls, original):
+        def __init__(instance, *args, **kwargs):
+            if type(instance) is cls:
+                self.counts[cls] += 1
+            original(instance, *args, **kwargs)
+
+        return __init__
+
+
+class MemoryReport:
+    # renders pages through the node tree under tracemalloc, recording the
+    # peak traced allocations of building and of serializing each tree
+    def __init__(self):
+        self.pages = []
+
+    def start(self):
+        tracemalloc.start()
+        return self
+
+    def stop(self):
+        tracemalloc.stop()
+
+    def _traced(self, function, *args):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        result = function(*args)
+        return result, tracemalloc.get_traced_memory()[1] - before
+
+    def render(
+        self, source_path, markdown, context=None, minify=False, transforms=None
+    ):
+        with CountInstances(TextNode, LeafNode, ParentNode) as created:
+            node, parse_peak = self._traced(markdown_to_html_node, markdown, context)
+            if transforms:
+                # nodes a transform builds in place of others count as well
+                node, transform_peak = self._traced(transforms.apply, node, context)
+                parse_peak = max(parse_peak, transform_peak)
+        html, serialize_peak = self._traced(node.to_html, minify)
+        self.pages.append(
+            PageMemory(
+                source_path,
+                parse_peak,
+                serialize_peak,
+                created.counts[TextNode],
+                created.counts[LeafNode],
+                created.counts[ParentNode],
+                len(html.encode()),
+            )
+        )
+        return html
+
+    def sorted_pages(self, sort_by="peak"):
+        return sorted(self.pages, key=SORT_KEYS[sort_by], reverse=True)
+
+    def table(self, sort_by="peak", limit=10):
+        lines = [
+            f"{'peak KiB':>9} {'parse':>9} {'to_html':>9} "
+            f"{'text':>6} {'leaf':>6} {'parent':>6} {'out KiB':>8}  page"
+        ]
+        for page in self.sorted_pages(sort_by)[:limit]:
+            lines.append(
+                f"{page.peak / 1024:9.1f} {page.parse_peak / 1024:9.1f} "
+                f"{page.serialize_peak / 1024:9.1f} {page.text_nodes:6} "
+                f"{page.leaf_nodes:6} {page.parent_nodes:6} "
+                f"{page.output_bytes / 1024:8.1f}  {page.source_path}"
+            )
+        return "\n".join(lines)
+
+    def write_json(self, path, sort_by="peak"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        report = {
+            "sorted_by": sort_by,
+            "pages": [page.to_dict() for page in self.sorted_pages(sort_by)],
+        }
+        with open(path, "w") as file:
+            json.dump(report, file, indent=2)
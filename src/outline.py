@@ -0,0 +1,66 @@
+from htmlnode import escape_attribute, escape_text
+from taxonomy import slugify
+
+WORDS_PER_MINUTE = 200
+
+
+class Outline:
+    # word count and heading outline of one page, collected by the block
+    # walk while the page is rendered
+    def __init__(self, words_per_minute=WORDS_PER_MINUTE):
+        self.words_per_minute = words_per_minute
+        self.words = 0
+        # (level, text, id) in document order
+        self.headings = []
+        self._ids = set()
+
+    def count_words(self, text):
+        self.words += len(text.split())
+
+    def add_heading(self, level, text):
+        # ids are slugs of the heading text, suffixed -1, -2, ... on repeats
+        base = slugify(text) or "section"
+        anchor = base
+        suffix = 0
+        while anchor in self._ids:
+            suffix += 1
+            anchor = f"{base}-{suffix}"
+        self._ids.add(anchor)
+        self.headings.append((level, text, anchor))
+        return anchor
+
+    def reading_minutes(self):
+        return max(1, round(self.words / self.words_per_minute))
+
+    def toc_html(self):
+        # nested lists of the headings below the page title
+        entries = [heading for heading in self.headings if heading[0] > 1]
+        if not entries:
+            return ""
+        html = []
+        levels = []
+        for level, text, anchor in entries:
+            if levels and level <= levels[-1]:
+                html.append("</li>")
+            while len(levels) > 1 and level <= levels[-2]:
+                html.append("</ul></li>")
+                levels.pop()
+            # a heading between two open levels joins the deeper list
+            if levels and level < levels[-1]:
+                levels[-1] = level
+            if not levels or level > levels[-1]:
+                html.append("<ul>")
+                levels.append(level)
+            html.append(f'<li><a href="#{escape_attribute(anchor)}">')
+            html.append(f"{escape_text(text)}</a>")
+        html.append("</li></ul>" * len(levels))
+        return f'<nav class="toc">{"".join(html)}</nav>'
+
+    def slots(self):
+        # template values for {{ WordCount }}, {{ ReadingTime }} (minutes)
+        # and {{ TableOfContents }}
+        return {
+            "WordCount": str(self.words),
+            "ReadingTime": str(self.reading_minutes()),
+            "TableOfContents": self.toc_html(),
+        }
@@ -0,0 +1,118 @@
+import hashlib
+import os
+import re
+
+from cache import cache_key
+from markdown_blocks import (
+    SHORTCODE,
+    BlockType,
+    RenderContext,
+    block_to_block_type,
+    markdown_to_blocks,
+    markdown_to_html_node,
+)
+
+# a line that may start a shortcode, to skip the block scan for most pages
+SHORTCODE_LINE = re.compile(r"^\{\{<", re.MULTILINE)
+# {{ name }} in a partial is replaced by the shortcode argument of that name
+ARGUMENT_SLOT = re.compile(r"\{\{\s*([\w-]+)\s*\}\}")
+
+
+def shortcode_names(markdown):
+    # the partials a markdown file expands: only blocks the renderer treats
+    # as shortcodes, not the syntax shown inside a code block
+    if not SHORTCODE_LINE.search(markdown):
+        return []
+    return [
+        SHORTCODE.fullmatch(block).group(1)
+        for block in markdown_to_blocks(markdown)
+        if block_to_block_type(block) == BlockType.SHORTCODE
+    ]
+
+
+class Partial:
+    # one expansion of a partial: its blocks as nodes, the links they hold
+    # and the html serialized on first use
+    def __init__(self, node, links):
+        self.node = node
+        self.links = links
+        self._html = {}
+
+    def inner_html(self, minify=False):
+        if minify not in self._html:
+            # drop the <div> wrapper, the blocks are spliced into the page
+            self._html[minify] = self.node.to_html(minify)[
+                len("<div>") : -len("</div>")
+            ]
+        return self._html[minify]
+
+
+class PartialCache:
+    # renders each partial once per build for every distinct set of
+    # arguments, keyed by the partial's source hash
+    def __init__(self, partials_dir="partials"):
+        self.partials_dir = partials_dir
+        self._sources = {}
+        self._digests = {}
+        self._dependencies = {}
+        self._expanded = {}
+        self._expanding = []
+        self.renders = 0
+
+    def source(self, name):
+        if name not in self._sources:
+            path = os.path.join(self.partials_dir, name + ".md")
+            if not os.path.isfile(path):
+                raise ValueError(f"unknown partial {name!r}, expected {path}")
+            with open(path, "r") as file:
+                self._sources[name] = file.read()
+        return self._sources[name]
+
+    def digest(self, name):
+        if name not in self._digests:
+            source = self.source(name)
+            self._digests[name] = hashlib.sha256(source.encode()).hexdigest()
+        return self._digests[name]
+
+    def dependencies(self, name):
+        # the partial and every partial it expands, transitively
+        if name not in self._dependencies:
+            names = {name}
+            pending = [name]
+            while pending:
+                for used in shortcode_names(self.source(pending.pop())):
+                    if used not in names:
+                        names.add(used)
+                        pending.append(used)
+            self._dependencies[name] = names
+        return self._dependencies[name]
+
+    def digest_for(self, markdown):
+        # identifies every partial a page uses, so editing one only changes
+        # the cache keys of the pages that depend on it
+        names = set()
+        for name in shortcode_names(markdown):
+            names |= self.dependencies(name)
+        if not names:
+            return ""
+        return cache_key(*(f"{name}:{self.digest(name)}" for name in sorted(names)))
+
+    def expand(self, name, args, images=None):
+        key = (self.digest(name), tuple(sorted(args.items())))
+        if key not in self._expanded:
+            if name in self._expanding:
+                chain = " -> ".join(self._expanding + [name])
+                raise ValueError(f"partial includes itself: {chain}")
+            self._expanding.append(name)
+            try:
+                markdown = ARGUMENT_SLOT.sub(
+                    lambda match: args.get(match.group(1), match.group(0)),
+                    self.source(name),
+                )
+                context = RenderContext(images=images, partials=self)
+                node = markdown_to_html_node(markdown, context)
+            finally:
+                self._expanding.pop()
+            self._expanded[key] = Partial(node, context.links)
+            self.renders += 1
+        return self._expanded[key]
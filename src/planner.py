@@ -0,0 +1,184 @@
+import json
+import os
+import re
+import statistics
+
+from artifacts import ARTIFACT_FILES
+from copystatic import is_markdown
+from siteignore import load_ignore_rules
+
+# outputs a build writes besides pages and static files
+GENERATED_FILES = {*ARTIFACT_FILES, "asset-manifest.json"}
+# resized image variants, e.g. images/tom-480w-1a2b3c4d.png
+IMAGE_VARIANT = re.compile(r"-\d+w-[0-9a-f]{8}\.[^./]+$")
+# the guess for a page that has never been timed
+DEFAULT_PAGE_SECONDS = 0.005
+
+
+class PageTimings:
+    # seconds each page took to generate in the last build that touched it
+    def __init__(self, path):
+        self.path = path
+        self.seconds = {}
+        if os.path.exists(path):
+            with open(path, "r") as file:
+                self.seconds = json.load(file)
+
+    def record(self, source_path, seconds):
+        self.seconds[source_path] = round(seconds, 6)
+
+    def estimate(self, source_path):
+        if source_path in self.seconds:
+            return self.seconds[source_path]
+        if self.seconds:
+            return statistics.median(self.seconds.values())
+        return DEFAULT_PAGE_SECONDS
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w") as file:
+            json.dump(self.seconds, file, indent=2, sort_keys=True)
+
+
+def scan_tree(root, rules=None):
+    # relative path -> (size, mtime) of every file under root, one scandir
+    # per directory and no second stat per file; ignored directories are
+    # not descended into
+    files = {}
+    if not os.path.isdir(root):
+        return files
+    stack = [(root, "")]
+    while stack:
+        directory, prefix = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                is_dir = entry.is_dir()
+                if rules is not None and rules.ignored(prefix + entry.name, is_dir):
+                    continue
+                if is_dir:
+                    stack.append((entry.path, prefix + entry.name + "/"))
+                else:
+                    stat = entry.stat()
+                    files[prefix + entry.name] = (stat.st_size, stat.st_mtime)
+    return files
+
+
+def newest_mtime(paths):
+    newest = 0.0
+    for path in paths:
+        if os.path.isdir(path):
+            for _, mtime in scan_tree(path).values():
+                newest = max(newest, mtime)
+        elif os.path.exists(path):
+            newest = max(newest, os.stat(path).st_mtime)
+    return newest
+
+
+def url_to_output(url):
+    # /blog/tom/ -> blog/tom/index.html, the inverse of dest_path_to_url
+    if url.endswith("/"):
+        return url.lstrip("/") + "index.html"
+    return url.lstrip("/")
+
+
+class BuildPlan:
+    def __init__(self):
+        self.render = []
+        self.unchanged = []
+        self.delete_pages = []
+        self.copy = []
+        self.delete_assets = []
+        self.estimated_seconds = 0.0
+
+    def summary(self):
+        return (
+            f"plan: render {len(self.render)} pages ({len(self.unchanged)} "
+            f"unchanged), delete {len(self.delete_pages)} pages, copy "
+            f"{len(self.copy)} assets, delete {len(self.delete_assets)} assets, "
+            f"estimated {self.estimated_seconds:.2f}s"
+        )
+
+
+def plan_build(
+    content_dir="content",
+    static_dir="static",
+    dest_dir="docs",
+    shared_inputs=("template.html",),
+    timings=None,
+    manifest=None,
+    listing_urls=(),
+    rules=None,
+):
+    # what a build would render, copy and delete, judged by size and mtime
+    # against the existing outputs; reads metadata only and writes nothing,
+    # so drafts count as pages to render
+    if rules is None:
+        rules = load_ignore_rules(content_dir)
+    content = scan_tree(content_dir, rules)
+    static = scan_tree(static_dir)
+    outputs = scan_tree(dest_dir)
+    # every page is stale once a template, layout or partial is newer
+    shared_mtime = newest_mtime(shared_inputs)
+    plan = BuildPlan()
+
+    page_outputs = set()
+    resources = {}
+    for rel_path, (size, mtime) in sorted(content.items()):
+        if not is_markdown(rel_path):
+            resources[rel_path] = (size, mtime)
+            continue
+        source_path = os.path.join(content_dir, rel_path)
+        output = os.path.splitext(rel_path)[0] + ".html"
+        page_outputs.add(output)
+        existing = outputs.get(output)
+        if existing is None or existing[1] < max(mtime, shared_mtime):
+            plan.render.append(source_path)
+        else:
+            plan.unchanged.append(source_path)
+
+    listing_outputs = {url.strip("/") + "/index.html" for url in listing_urls}
+    if manifest is not None:
+        # the stored manifest of the last build knows each page's source;
+        # sources are joined onto content_dir, so slicing the prefix off
+        # avoids a relpath per page
+        prefix = os.path.join(content_dir, "")
+        for url, entry in sorted(manifest.items()):
+            source = entry["source"]
+            if source.startswith(prefix):
+                rel_source = source[len(prefix) :]
+            else:
+                rel_source = os.path.relpath(source, content_dir)
+            if rel_source.replace(os.sep, "/") not in content:
+                plan.delete_pages.append(url_to_output(url))
+    else:
+        for output in sorted(outputs):
+            if output.endswith(".html") and output not in page_outputs:
+                if output not in listing_outputs:
+                    plan.delete_pages.append(output)
+
+    # page bundle resources are copied next to their page like static files
+    copied = dict(static, **resources)
+    for rel_path, (size, mtime) in sorted(copied.items()):
+        existing = outputs.get(rel_path)
+        if existing is None or existing[0] != size or existing[1] < mtime:
+            plan.copy.append(rel_path)
+
+    fingerprinted = set()
+    asset_manifest = os.path.join(dest_dir, "asset-manifest.json")
+    if "asset-manifest.json" in outputs:
+        with open(asset_manifest, "r") as file:
+            fingerprinted = set(json.load(file).values())
+    for output in sorted(outputs):
+        if output.endswith(".html") or output in copied:
+            continue
+        if output in GENERATED_FILES or output in fingerprinted:
+            continue
+        if IMAGE_VARIANT.search(output):
+            continue
+        plan.delete_assets.append(output)
+
+    if timings is not None:
+        plan.estimated_seconds = sum(timings.estimate(p) for p in plan.render)
+    else:
+        plan.estimated_seconds = DEFAULT_PAGE_SECONDS * len(plan.render)
+    return plan
@@ -0,0 +1,61 @@
+import fnmatch
+import os
+import re
+
+# editor swap and backup files, dotfiles (which includes .siteignore itself)
+DEFAULT_PATTERNS = (".*", "*~", "*.swp", "*.swo", "*.tmp", "#*#")
+IGNORE_FILE = ".siteignore"
+
+
+def _compile(regexes):
+    if not regexes:
+        return None
+    return re.compile("|".join(f"(?:{regex})" for regex in regexes))
+
+
+class IgnoreRules:
+    # gitignore-style globs: a pattern without "/" matches a file or
+    # directory name anywhere, one with "/" matches the path from the
+    # content root, and a trailing "/" only matches directories. All
+    # patterns are compiled into a handful of regexes up front.
+    def __init__(self, patterns=()):
+        buckets = {
+            (anchored, dir_only): [] for anchored in (0, 1) for dir_only in (0, 1)
+        }
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if pattern == "":
+                continue
+            dir_only = pattern.endswith("/")
+            pattern = pattern.rstrip("/")
+            anchored = "/" in pattern
+            regex = fnmatch.translate(pattern.lstrip("/"))
+            buckets[(int(anchored), int(dir_only))].append(regex)
+        self.names = _compile(buckets[(0, 0)])
+        self.paths = _compile(buckets[(1, 0)])
+        self.dir_names = _compile(buckets[(0, 1)])
+        self.dir_paths = _compile(buckets[(1, 1)])
+
+    def ignored(self, rel_path, is_dir=False):
+        # rel_path uses "/" and is relative to the content root
+        name = rel_path.rsplit("/", 1)[-1]
+        checks = [(self.names, name), (self.paths, rel_path)]
+        if is_dir:
+            checks += [(self.dir_names, name), (self.dir_paths, rel_path)]
+        return any(regex is not None and regex.match(text) for regex, text in checks)
+
+
+def load_ignore_rules(content_dir):
+    patterns = list(DEFAULT_PATTERNS)
+    path = os.path.join(content_dir, IGNORE_FILE)
+    if os.path.exists(path):
+        with open(path, "r") as file:
+            for line in file:
+                # comments only exist in the file; a literal leading # is
+                # written \#, as in .gitignore
+                if line.startswith("#"):
+                    continue
+                if line.startswith("\\#"):
+                    line = line[1:]
+                patterns.append(line)
+    return IgnoreRules(patterns)
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import re
+
+from htmlnode import escape_attribute, escape_text
+
+# anything but letters and digits of any script
+NON_SLUG = re.compile(r"[\W_]+")
+
+
+def slugify(text):
+    return NON_SLUG.sub("-", text.lower()).strip("-")
+
+
+def short_hash(text):
+    return hashlib.sha256(text.encode()).hexdigest()[:8]
+
+
+def unique_slugs(names):
+    # name -> slug, in sorted order; a name whose slug is empty or already
+    # taken (C# and C++ are both "c") gets a short hash of itself instead
+    slugs = {}
+    taken = set()
+    for name in sorted(names):
+        slug = slugify(name)
+        if not slug or slug in taken:
+            slug = "-".join(filter(None, [slug, short_hash(name)]))
+        taken.add(slug)
+        slugs[name] = slug
+    return slugs
+
+
+class Listing:
+    # one rendered page of a sorted index: a tag, an archive year or the blog
+    def __init__(self, url, title, entries, page, page_count, base_url):
+        self.url = url
+        self.title = title
+        self.entries = entries
+        self.page = page
+        self.page_count = page_count
+        self.base_url = base_url
+
+    def page_url(self, page):
+        if page == 1:
+            return self.base_url
+        return f"{self.base_url}page/{page}/"
+
+    def digest(self):
+        # everything the rendered listing depends on
+        digest = hashlib.sha256()
+        digest.update(f"{self.title}\0{self.page}\0{self.page_count}\n".encode())
+        for entry in self.entries:
+            digest.update(f"{entry.title}\0{entry.url}\0{entry.updated}\n".encode())
+        return digest.hexdigest()
+
+    def __repr__(self):
+        return f"Listing({self.url}, {len(self.entries)} entries)"
+
+
+def paginate(entries, base_url, title, page_size):
+    pages = [entries[i : i + page_size] for i in range(0, len(entries), page_size)]
+    listings = []
+    for number, page_entries in enumerate(pages, start=1):
+        listing = Listing(None, title, page_entries, number, len(pages), base_url)
+        listing.url = listing.page_url(number)
+        listings.append(listing)
+    return listings
+
+
+class TaxonomyIndex:
+    # sorted in-memory indexes over the pages of a section
+    def __init__(self, pages, section="/blog/"):
+        self.section = section
+        posts = [p for p in pages if p.url.startswith(section) and p.url != section]
+        self.by_date = sorted(posts, key=lambda p: (p.updated, p.url), reverse=True)
+        self.by_tag = {}
+        self.by_year = {}
+        for page in self.by_date:
+            for tag in page.tags:
+                self.by_tag.setdefault(tag, []).append(page)
+            self.by_year.setdefault(page.updated.year, []).append(page)
+        self.taken_urls = {page.url for page in pages}
+
+    def listings(self, page_size=10):
+        listings = paginate(self.by_date, self.section, "All posts", page_size)
+        slugs = unique_slugs(self.by_tag)
+        for tag in sorted(self.by_tag):
+            listings.extend(
+                paginate(
+                    self.by_tag[tag],
+                    f"/tags/{slugs[tag]}/",
+                    f"Posts tagged {tag}",
+                    page_size,
+                )
+            )
+        for year in sorted(self.by_year, reverse=True):
+            listings.extend(
+                paginate(
+                    self.by_year[year],
+                    f"/archive/{year}/",
+                    f"Posts from {year}",
+                    page_size,
+                )
+            )
+        # a hand-written page at the same url takes precedence
+        return [listing for listing in listings if listing.url not in self.taken_urls]
+
+
+def listing_to_html(listing):
+    items = []
+    for entry in listing.entries:
+        href = escape_attribute(entry.url)
+        date = entry.updated.strftime("%Y-%m-%d")
+        items.append(
+            f'<li><a href="{href}">{escape_text(entry.title)}</a> '
+            f'<time datetime="{date}">{date}</time></li>'
+        )
+    html = f"<div><h1>{escape_text(listing.title)}</h1><ul>{''.join(items)}</ul>"
+    if listing.page_count > 1:
+        nav = []
+        if listing.page > 1:
+            nav.append(f'<a href="{listing.page_url(listing.page - 1)}">Newer</a>')
+        nav.append(f"<span>Page {listing.page} of {listing.page_count}</span>")
+        if listing.page < listing.page_count:
+            nav.append(f'<a href="{listing.page_url(listing.page + 1)}">Older</a>')
+        html += f"<nav>{' '.join(nav)}</nav>"
+    return html + "</div>"
+
+
+class ListingState:
+    # digests of the listings written by the previous build, so only
+    # listings whose entries changed are rendered again
+    def __init__(self, path):
+        self.path = path
+        self.digests = {}
+        if os.path.exists(path):
+            with open(path, "r") as file:
+                self.digests = json.load(file)
+
+    def is_current(self, listing, dest_path, salt=""):
+        # salt covers what the listing shares with every page, such as the
+        # template and basepath
+        key = f"{salt}:{listing.digest()}"
+        return self.digests.get(listing.url) == key and os.path.exists(dest_path)
+
+    def record(self, listing, salt=""):
+        self.digests[listing.url] = f"{salt}:{listing.digest()}"
+
+    def forget(self, url):
+        self.digests.pop(url, None)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w") as file:
+            json.dump(self.digests, file, indent=2, sort_keys=True)
@@ -0,0 +1,199 @@
+import hashlib
+import os
+import re
+
+SLOT_PATTERN = re.compile(r"\{\{ (\w+) \}\}")
+# elements whose whitespace is significant or is code
+PRESERVED = re.compile(
+    r"<(pre|script|style|textarea)[\s>].*?</\1\s*>", re.DOTALL | re.IGNORECASE
+)
+WHITESPACE = re.compile(r"\s+")
+TAG_PATTERN = re.compile(r"(\{%.*?%\})")
+EXTENDS_TAG = re.compile(r'\{% extends "([^"]+)" %\}')
+BLOCK_TAG = re.compile(r"\{% block (\w+) %\}")
+INCLUDE_TAG = re.compile(r'\{% include "([^"]+)" %\}')
+
+# compiled layout chains keyed by (combined hash of their files, minify),
+# shared by every LayoutCache in the process
+_compiled_layouts = {}
+
+
+class Template:
+    # a template split once into literal text and {{ Slot }} names so every
+    # page is rendered with a single join instead of repeated replace calls
+    def __init__(self, literals, slots):
+        self.literals = literals
+        self.slots = slots
+        self._digest = None
+
+    def render(self, values):
+        parts = [self.literals[0]]
+        for name, literal in zip(self.slots, self.literals[1:]):
+            parts.append(values.get(name, f"{{{{ {name} }}}}"))
+            parts.append(literal)
+        return "".join(parts)
+
+    def digest(self):
+        # identifies the compiled template in cache keys
+        if self._digest is None:
+            text = "\0".join(self.literals + self.slots)
+            self._digest = hashlib.sha256(text.encode()).hexdigest()
+        return self._digest
+
+    def __repr__(self):
+        return f"Template(slots: {self.slots})"
+
+
+def minify_html(html):
+    # collapse whitespace runs to one space, leaving <pre>, <script>,
+    # <style> and <textarea> untouched; a run between two tags is kept as
+    # a space since it renders between inline elements
+    pieces = []
+    position = 0
+    for match in PRESERVED.finditer(html):
+        pieces.append(WHITESPACE.sub(" ", html[position : match.start()]))
+        pieces.append(match.group(0))
+        position = match.end()
+    pieces.append(WHITESPACE.sub(" ", html[position:]))
+    return "".join(pieces).strip()
+
+
+def compile_template(text, minify=False):
+    if minify:
+        text = minify_html(text)
+    pieces = SLOT_PATTERN.split(text)
+    return Template(pieces[0::2], pieces[1::2])
+
+
+def parse_layout(text):
+    # split a layout into literal text, ("block", name, children) and
+    # ("include", path) nodes, plus the layout it extends (or None)
+    extends = None
+    root = []
+    stack = [("root", root)]
+    for piece in TAG_PATTERN.split(text):
+        if not (piece.startswith("{%") and piece.endswith("%}")):
+            if piece:
+                stack[-1][1].append(piece)
+            continue
+        if EXTENDS_TAG.fullmatch(piece):
+            extends = EXTENDS_TAG.fullmatch(piece).group(1)
+        elif BLOCK_TAG.fullmatch(piece):
+            children = []
+            name = BLOCK_TAG.fullmatch(piece).group(1)
+            stack[-1][1].append(("block", name, children))
+            stack.append((name, children))
+        elif piece == "{% endblock %}":
+            if len(stack) == 1:
+                raise ValueError("{% endblock %} without a matching {% block %}")
+            stack.pop()
+        elif INCLUDE_TAG.fullmatch(piece):
+            stack[-1][1].append(("include", INCLUDE_TAG.fullmatch(piece).group(1)))
+        else:
+            raise ValueError(f"unknown layout tag: {piece}")
+    if len(stack) != 1:
+        raise ValueError(f"block {stack[-1][0]} is never closed")
+    return extends, root
+
+
+def collect_blocks(nodes, blocks):
+    # the most derived layout wins, so existing entries are kept
+    for node in nodes:
+        if isinstance(node, tuple) and node[0] == "block":
+            blocks.setdefault(node[1], node[2])
+            collect_blocks(node[2], blocks)
+
+
+class LayoutCache:
+    # resolves per-section layouts and their extends/include chains once
+    # per build, compiling each chain to a flat Template
+    def __init__(
+        self, layouts_dir="layouts", content_dir="content", minify=False, languages=()
+    ):
+        self.layouts_dir = layouts_dir
+        self.content_dir = content_dir
+        # content/<lang>/blog shares layouts/blog.html with every language
+        self.languages = set(languages)
+        self.minify = minify
+        self._sources = {}
+        self._templates = {}
+        self._layout_by_dir = {}
+
+    def resolve_path(self, name):
+        # layout names are looked up in layouts/ first, then as given
+        in_layouts = os.path.join(self.layouts_dir, name)
+        if os.path.isfile(in_layouts):
+            return in_layouts
+        return name
+
+    def source(self, path):
+        if path not in self._sources:
+            with open(path, "r") as file:
+                self._sources[path] = file.read()
+        return self._sources[path]
+
+    def layout_for(self, source_path, default_path):
+        # content/blog/tom/index.md uses layouts/blog/tom.html, then
+        # layouts/blog.html, then the default template
+        directory = os.path.dirname(source_path)
+        if directory not in self._layout_by_dir:
+            layout = default_path
+            rel_dir = os.path.relpath(directory, self.content_dir)
+            language, _, rest = rel_dir.replace(os.sep, "/").partition("/")
+            if language in self.languages:
+                rel_dir = rest
+            while rel_dir not in ("", ".") and not rel_dir.startswith(".."):
+                candidate = os.path.join(self.layouts_dir, rel_dir + ".html")
+                if os.path.isfile(candidate):
+                    layout = candidate
+                    break
+                rel_dir = os.path.dirname(rel_dir)
+            self._layout_by_dir[directory] = layout
+        return self._layout_by_dir[directory]
+
+    def load(self, path):
+        if path not in self._templates:
+            self._templates[path] = self._compile_chain(path)
+        return self._templates[path]
+
+    def _compile_chain(self, path):
+        chain = []
+        blocks = {}
+        seen = set()
+        while path is not None:
+            if path in seen:
+                raise ValueError(f"layout {path} extends itself")
+            seen.add(path)
+            extends, nodes = parse_layout(self.source(path))
+            chain.append(path)
+            collect_blocks(nodes, blocks)
+            path = self.resolve_path(extends) if extends is not None else None
+
+        files = []
+        text = self._flatten(nodes, blocks, files, set())
+        digest = hashlib.sha256()
+        for file_path in chain + files:
+            digest.update(self.source(file_path).encode())
+        key = (digest.hexdigest(), self.minify)
+        if key not in _compiled_layouts:
+            _compiled_layouts[key] = compile_template(text, self.minify)
+        return _compiled_layouts[key]
+
+    def _flatten(self, nodes, blocks, files, including):
+        parts = []
+        for node in nodes:
+            if isinstance(node, str):
+                parts.append(node)
+            elif node[0] == "block":
+                children = blocks.get(node[1], node[2])
+                parts.append(self._flatten(children, blocks, files, including))
+            else:
+                include_path = self.resolve_path(node[1])
+                if include_path in including:
+                    raise ValueError(f"layout {include_path} includes itself")
+                files.append(include_path)
+                _, included = parse_layout(self.source(include_path))
+                parts.append(
+                    self._flatten(included, blocks, files, including | {include_path})
+                )
+        return "".join(parts)
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+from artifacts import BuildArtifacts, dest_path_to_url
+from textnode import TextType
+
+
+class TestArtifacts(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.source = os.path.join(self.root, "index.md")
+        with open(self.source, "w") as file:
+            file.write("# Post\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_artifacts(self, site_url="https://example.com", basepath="/site/"):
+        artifacts = BuildArtifacts(self.root, basepath, site_url)
+        artifacts.add_page(
+            "Home", self.source, os.path.join(self.root, "index.html"), []
+        )
+        artifacts.add_page(
+            "Tom & co",
+            self.source,
+            os.path.join(self.root, "blog", "tom", "index.html"),
+            [(TextType.LINK, "/", 3), (TextType.IMAGE, "/images/tom.png", 5)],
+        )
+        return artifacts
+
+    def read(self, name):
+        with open(os.path.join(self.root, name)) as file:
+            return file.read()
+
+    def test_dest_path_to_url(self):
+        test_cases = [
+            ("index.html", "/"),
+            ("blog/tom/index.html", "/blog/tom/"),
+            ("contact.html", "/contact.html"),
+        ]
+        for rel_path, expected in test_cases:
+            with self.subTest(rel_path=rel_path):
+                dest = os.path.join(self.root, rel_path)
+                self.assertEqual(dest_path_to_url(self.root, dest), expected)
+
+    def test_sitemap(self):
+        self.make_artifacts().write_all()
+        sitemap = self.read("sitemap.xml")
+        self.assertIn("<loc>https://example.com/site/</loc>", sitemap)
+        self.assertIn("<loc>https://example.com/site/blog/tom/</loc>", sitemap)
+
+    def test_feed_only_contains_section_and_escapes(self):
+        self.make_artifacts().write_all()
+        feed = self.read("feed.xml")
+        self.assertEqual(feed.count("<entry>"), 1)
+        self.assertIn("<title>Tom &amp; co</title>", feed)
+
+    def test_feed_not_rewritten_when_entries_unchanged(self):
+        path = os.path.join(self.root, "feed.xml")
+        self.assertTrue(self.make_artifacts().write_feed(path))
+        self.assertFalse(self.make_artifacts().write_feed(path))
+
+        artifacts = self.make_artifacts()
+        artifacts.pages[1].title = "Tom"
+        self.assertTrue(artifacts.write_feed(path))
+
+    def test_feed_rewritten_for_new_site_url_or_basepath(self):
+        path = os.path.join(self.root, "feed.xml")
+        self.make_artifacts().write_feed(path)
+        self.assertTrue(self.make_artifacts("https://other.org").write_feed(path))
+        self.assertIn("https://other.org/site/blog/tom/", self.read("feed.xml"))
+        self.assertTrue(self.make_artifacts("https://other.org", "/").write_feed(path))
+
+    def test_updated_falls_back_to_commit_time(self):
+        committed = datetime(2026, 3, 1, tzinfo=timezone.utc)
+        artifacts = BuildArtifacts(self.root, commit_times={self.source: committed})
+        record = artifacts.add_page("Home", self.source, self.source, [])
+        self.assertEqual(record.updated, committed)
+        # a fresh checkout changes the mtime but not the feed
+        path = os.path.join(self.root, "feed.xml")
+        artifacts.write_feed(path, "/")
+        os.utime(self.source, (0, 0))
+        again = BuildArtifacts(self.root, commit_times={self.source: committed})
+        again.add_page("Home", self.source, self.source, [])
+        self.assertFalse(again.write_feed(path, "/"))
+
+    def test_link_manifest(self):
+        self.make_artifacts().write_all()
+        manifest = self.read("links.json")
+        self.assertIn('"target": "/images/tom.png"', manifest)
+        self.assertIn('"type": "image"', manifest)
+
+
+if __name__ == "__main__":
+    unittest.main()
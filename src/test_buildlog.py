@@ -0,0 +1,55 @@
+import io
+import json
+import unittest
+from unittest import mock
+
+import buildlog
+from buildlog import Progress, log, setup_logging
+
+
+class TestBuildLog(unittest.TestCase):
+    def run_logging(self, verbosity, json_lines):
+        stream = io.StringIO()
+        listener = setup_logging(verbosity, json_lines, stream)
+        log.debug("per file detail")
+        log.info("summary", extra={"fields": {"pages": 3}})
+        listener.stop()
+        return stream.getvalue().splitlines()
+
+    def test_quiet_by_default(self):
+        self.assertEqual(self.run_logging(0, False), ["summary"])
+
+    def test_verbose_shows_detail(self):
+        self.assertEqual(self.run_logging(1, False), ["per file detail", "summary"])
+
+    def test_json_lines(self):
+        lines = self.run_logging(0, True)
+        self.assertEqual(len(lines), 1)
+        record = json.loads(lines[0])
+        self.assertEqual(record["level"], "info")
+        self.assertEqual(record["message"], "summary")
+        self.assertEqual(record["pages"], 3)
+
+
+class TestProgress(unittest.TestCase):
+    def test_disabled_writes_nothing(self):
+        stream = io.StringIO()
+        progress = Progress(3, stream=stream, enabled=False)
+        for _ in range(3):
+            progress.advance()
+        progress.finish()
+        self.assertEqual(stream.getvalue(), "")
+
+    def test_redraws_are_throttled(self):
+        stream = io.StringIO()
+        progress = Progress(100, stream=stream, enabled=True, width=10)
+        with mock.patch.object(buildlog.time, "monotonic", return_value=1000.0):
+            for _ in range(100):
+                progress.advance()
+        # the first update and the final one draw, everything between is skipped
+        self.assertEqual(stream.getvalue().count("\r"), 2)
+        self.assertTrue(stream.getvalue().endswith("[##########] 100/100 pages"))
+
+
+if __name__ == "__main__":
+    unittest.main()
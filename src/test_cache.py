@@ -0,0 +1,70 @@
+import os
+import tempfile
+import time
+import unittest
+
+from cache import CacheStore, LocalDirectoryBackend, cache_key, code_digest
+
+
+class TestCacheStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "cache")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cache_key(self):
+        self.assertEqual(cache_key("a", "b"), cache_key("a", b"b"))
+        self.assertNotEqual(cache_key("ab", "c"), cache_key("a", "bc"))
+
+    def test_code_digest(self):
+        os.makedirs(self.root)
+        with open(os.path.join(self.root, "render.py"), "w") as file:
+            file.write("x = 1\n")
+        with open(os.path.join(self.root, "test_render.py"), "w") as file:
+            file.write("y = 1\n")
+        before = code_digest(self.root)
+        with open(os.path.join(self.root, "test_render.py"), "w") as file:
+            file.write("y = 2\n")
+        self.assertEqual(code_digest(self.root), before)
+        with open(os.path.join(self.root, "render.py"), "w") as file:
+            file.write("x = 2\n")
+        self.assertNotEqual(code_digest(self.root), before)
+
+    def test_put_and_get(self):
+        store = CacheStore(self.root)
+        key = cache_key("page")
+        self.assertIsNone(store.get(key))
+        store.put_text(key, "<p>hi</p>")
+        self.assertEqual(store.get_text(key), "<p>hi</p>")
+        self.assertEqual((store.hits, store.misses), (1, 1))
+        self.assertEqual(os.listdir(os.path.dirname(store.path(key))), [key])
+
+    def test_gc_evicts_least_recently_used(self):
+        store = CacheStore(self.root, max_bytes=20)
+        keys = [cache_key(str(i)) for i in range(3)]
+        for i, key in enumerate(keys):
+            store.put(key, b"x" * 10)
+            os.utime(store.path(key), (time.time() - 100 + i, time.time() - 100 + i))
+        # reading the oldest blob makes it the most recently used
+        store.get(keys[0])
+
+        self.assertEqual(store.gc(), 1)
+        self.assertIsNotNone(store.get(keys[0]))
+        self.assertIsNone(store.get(keys[1]))
+        self.assertIsNotNone(store.get(keys[2]))
+
+    def test_remote_backend(self):
+        remote = LocalDirectoryBackend(os.path.join(self.tmp.name, "shared"))
+        key = cache_key("page")
+        CacheStore(self.root, remote=remote).put(key, b"data")
+
+        # a fresh runner with an empty local store pulls from the remote
+        other = CacheStore(os.path.join(self.tmp.name, "other"), remote=remote)
+        self.assertEqual(other.get(key), b"data")
+        self.assertTrue(os.path.exists(other.path(key)))
+
+
+if __name__ == "__main__":
+    unittest.main()
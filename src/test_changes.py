@@ -0,0 +1,135 @@
+import os
+import tempfile
+import unittest
+
+from changes import (
+    ChangeSet,
+    dest_path_for,
+    full_build_reason,
+    parse_commit_times,
+    parse_name_status,
+    plan_incremental,
+    restore_pages,
+)
+from textnode import TextType
+
+PAGES = [
+    ("content/index.md", "docs/index.html"),
+    ("content/blog/tom/index.md", "docs/blog/tom/index.html"),
+    ("content/blog/glorfindel/index.md", "docs/blog/glorfindel/index.html"),
+]
+
+MANIFEST = {
+    "/": {
+        "source": "content/index.md",
+        "links": [{"type": "link", "target": "/contact", "line": 3}],
+    },
+    "/blog/tom/": {
+        "source": "content/blog/tom/index.md",
+        "links": [{"type": "image", "target": "/images/tom.png", "line": 5}],
+    },
+    "/blog/glorfindel/": {"source": "content/blog/glorfindel/index.md", "links": []},
+}
+
+
+class TestChanges(unittest.TestCase):
+    def test_parse_name_status(self):
+        output = "M\0content/a.md\0R087\0content/b.md\0content/c.md\0A\0static/x.png\0"
+        changes = parse_name_status(output)
+        self.assertEqual(changes.added, ["content/c.md", "static/x.png"])
+        self.assertEqual(changes.modified, ["content/a.md"])
+        self.assertEqual(changes.deleted, ["content/b.md"])
+        self.assertEqual(len(parse_name_status("")), 0)
+
+    def test_parse_commit_times(self):
+        output = (
+            "\x011700000200\0\ncontent/a.md\0"
+            "\x011700000100\0\ncontent/a.md\0content/b.md\0"
+        )
+        times = parse_commit_times(output)
+        self.assertEqual(times["content/a.md"].timestamp(), 1700000200)
+        self.assertEqual(times["content/b.md"].timestamp(), 1700000100)
+        self.assertEqual(parse_commit_times(""), {})
+
+    def test_full_build_reason(self):
+        self.assertIsNone(full_build_reason(ChangeSet(modified=["content/a.md"])))
+        self.assertEqual(
+            full_build_reason(ChangeSet(modified=["template.html"])),
+            "template.html changed",
+        )
+        self.assertIsNotNone(full_build_reason(ChangeSet(deleted=["partials/a.md"])))
+
+    def test_dest_path_for(self):
+        self.assertEqual(
+            dest_path_for("content/blog/tom/index.md", "content", "docs"),
+            os.path.join("docs", "blog", "tom", "index.html"),
+        )
+
+    def test_plan(self):
+        changes = ChangeSet(
+            modified=["content/blog/glorfindel/index.md", "static/images/tom.png"],
+            deleted=["content/contact/index.md", "static/old.css"],
+        )
+        plan = plan_incremental(changes, PAGES, MANIFEST)
+        # the edited page, the page embedding the changed image and the
+        # page linking to the deleted one
+        self.assertEqual(
+            plan.rebuild,
+            {
+                "content/blog/glorfindel/index.md",
+                "content/blog/tom/index.md",
+                "content/index.md",
+            },
+        )
+        self.assertEqual(plan.remove, [os.path.join("docs", "contact", "index.html")])
+        self.assertEqual(plan.static_copy, ["images/tom.png"])
+        self.assertEqual(plan.static_remove, ["old.css"])
+
+    def test_page_turned_draft_is_removed(self):
+        # a draft is left out of discovery, so it is not among the pages
+        pages = [page for page in PAGES if page[0] != "content/blog/tom/index.md"]
+        changes = ChangeSet(modified=["content/blog/tom/index.md"])
+        plan = plan_incremental(changes, pages, MANIFEST)
+        self.assertEqual(
+            plan.remove, [os.path.join("docs", "blog", "tom", "index.html")]
+        )
+        self.assertNotIn("content/blog/tom/index.md", plan.rebuild)
+
+    def test_bundle_resource_rebuilds_its_page(self):
+        manifest = dict(MANIFEST)
+        manifest["/blog/tom/"] = {
+            "source": "content/blog/tom/index.md",
+            "links": [{"type": "image", "target": "photo.png", "line": 5}],
+        }
+        for changes in [
+            ChangeSet(modified=["content/blog/tom/photo.png"]),
+            ChangeSet(deleted=["content/blog/tom/photo.png"]),
+        ]:
+            with self.subTest(changes=changes.changed() + changes.deleted):
+                plan = plan_incremental(changes, PAGES, manifest)
+                self.assertEqual(plan.rebuild, {"content/blog/tom/index.md"})
+        plan = plan_incremental(
+            ChangeSet(modified=["content/blog/glorfindel/photo.png"]), PAGES, manifest
+        )
+        self.assertEqual(plan.rebuild, set())
+
+    def test_restore_pages(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "index.md")
+            with open(source, "w") as file:
+                file.write("---\ntags: [a]\n---\n# Tom\n\nbody")
+            draft = os.path.join(tmp, "draft.md")
+            with open(draft, "w") as file:
+                file.write("---\ndraft: true\n---\n# Draft")
+            pages = [(source, "docs/blog/tom/index.html"), (draft, "docs/draft.html")]
+            restored = list(restore_pages(pages, MANIFEST))
+        self.assertEqual(len(restored), 1)
+        _, dest, title, links, meta = restored[0]
+        self.assertEqual(
+            (dest, title, meta.tags), ("docs/blog/tom/index.html", "Tom", ["a"])
+        )
+        self.assertEqual(links, [(TextType.IMAGE, "/images/tom.png", 5)])
+
+
+if __name__ == "__main__":
+    unittest.main()
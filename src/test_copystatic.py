@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+from buildcontext import BuildContext, OutputTarget
+from copystatic import (
+    basepath_parts,
+    copy_directory_contents,
+    rewrite_urls,
+    write_outputs,
+)
+
+
+class TestRewriteUrls(unittest.TestCase):
+    def test_basepath(self):
+        html = '<a href="/blog/tom">x</a><img src="/images/tom.png" alt="">'
+        self.assertEqual(
+            rewrite_urls(html, "/site/"),
+            '<a href="/site/blog/tom">x</a><img src="/site/images/tom.png" alt="">',
+        )
+
+    def test_leaves_other_urls_alone(self):
+        html = '<a href="https://example.com/">x</a><a href="//cdn.example.com/a">y</a>'
+        self.assertEqual(rewrite_urls(html, "/site/"), html)
+
+    def test_fingerprinted_assets(self):
+        assets = {"index.css": "index.abc.css", "images/tom.png": "images/tom.def.png"}
+        html = (
+            '<link href="/index.css?v=1" rel="stylesheet" />'
+            '<img src="/images/tom.png" srcset="/images/tom-480w.png 480w, '
+            '/images/tom.png 1200w">'
+        )
+        self.assertEqual(
+            rewrite_urls(html, "/", assets),
+            '<link href="/index.abc.css?v=1" rel="stylesheet" />'
+            '<img src="/images/tom.def.png" srcset="/images/tom-480w.png 480w, '
+            '/images/tom.def.png 1200w">',
+        )
+
+
+class TestBasepathParts(unittest.TestCase):
+    def test_parts_join_to_any_basepath(self):
+        html = '<a href="/blog/">x</a><img srcset="/a.png 480w, /b.png 960w">'
+        parts = basepath_parts(html)
+        self.assertEqual(len(parts), 4)
+        for basepath in ("/", "/site/"):
+            self.assertEqual(basepath.join(parts), rewrite_urls(html, basepath))
+
+    def test_write_outputs_to_every_target(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            docs = os.path.join(tmp, "docs")
+            public = os.path.join(tmp, "public")
+            build = BuildContext(dest_root=docs, targets=[OutputTarget("/", public)])
+            parts = basepath_parts('<a href="/blog/">x</a>')
+            write_outputs(os.path.join(docs, "a", "index.html"), "/site/", parts, build)
+            with open(os.path.join(docs, "a", "index.html")) as file:
+                self.assertEqual(file.read(), '<a href="/site/blog/">x</a>')
+            with open(os.path.join(public, "a", "index.html")) as file:
+                self.assertEqual(file.read(), '<a href="/blog/">x</a>')
+
+
+class TestCopyDirectoryContents(unittest.TestCase):
+    def test_clean_keeps_listed_outputs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            static = os.path.join(tmp, "static")
+            docs = os.path.join(tmp, "docs")
+            for path in [
+                "static/index.css",
+                "docs/old.css",
+                "docs/gone/index.html",
+                "docs/tags/a/index.html",
+            ]:
+                os.makedirs(os.path.dirname(os.path.join(tmp, path)), exist_ok=True)
+                with open(os.path.join(tmp, path), "w") as file:
+                    file.write("x")
+            copied = copy_directory_contents(static, docs, keep={"tags/a/index.html"})
+            self.assertEqual(copied, ["index.css"])
+            found = sorted(
+                os.path.relpath(os.path.join(root, name), docs)
+                for root, _, files in os.walk(docs)
+                for name in files
+            )
+            self.assertEqual(
+                found, ["index.css", os.path.join("tags", "a", "index.html")]
+            )
+            self.assertFalse(os.path.exists(os.path.join(docs, "gone")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+from buildcontext import BuildContext
+from copystatic import generate_page
+from daemon import PreviewRenderer, RenderClient, RenderServer
+from partials import PartialCache
+from template import LayoutCache
+
+
+class PreviewSite:
+    # a small site on disk with a section layout, a partial and a .md link
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("layouts/blog.html", "<main>{{ Content }}</main>")
+        self.write("partials/note.md", "> {{ text }}")
+        self.write("content/index.md", "# Home\n\nSee [tom](blog/tom.md)")
+        self.write("content/blog/tom.md", '# Tom\n\n{{< note text="hi" >}}')
+        self.renderer = PreviewRenderer(
+            self.path("content"),
+            self.path("template.html"),
+            self.path("layouts"),
+            self.path("partials"),
+            self.path("docs"),
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, rel_path):
+        return os.path.join(self.root, rel_path)
+
+    def write(self, rel_path, text):
+        path = self.path(rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(text)
+
+
+class TestPreviewRenderer(PreviewSite, unittest.TestCase):
+    def test_matches_generated_page(self):
+        source = self.path("content/blog/tom.md")
+        build = BuildContext(
+            layouts=LayoutCache(self.path("layouts"), self.path("content")),
+            partials=PartialCache(self.path("partials")),
+            dest_root=self.path("docs"),
+        )
+        dest = self.path("docs/blog/tom.html")
+        generate_page(source, self.path("template.html"), dest, "/site/", build)
+        with open(dest) as file:
+            expected = file.read()
+        page = self.renderer.render(source, basepath="/site/")
+        self.assertEqual(page, {"title": "Tom", "html": expected})
+
+    def test_unsaved_buffer_and_md_links(self):
+        page = self.renderer.render(
+            self.path("content/index.md"), "# Draft\n\n[tom](blog/tom.md)"
+        )
+        self.assertEqual(page["title"], "Draft")
+        self.assertIn('<a href="/blog/tom.html">tom</a>', page["html"])
+
+    def test_markdown_without_path(self):
+        response = self.renderer.handle({"markdown": "# Note\n\n[tom](blog/tom.md)"})
+        self.assertTrue(response["ok"])
+        self.assertEqual(response["title"], "Note")
+        self.assertIn('<a href="/blog/tom.html">tom</a>', response["html"])
+        self.assertFalse(self.renderer.handle({})["ok"])
+
+    def test_cache_hits_and_template_reload(self):
+        source = self.path("content/index.md")
+        self.renderer.render(source)
+        self.renderer.render(source)
+        stats = self.renderer.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+        self.write("template.html", "<h1>{{ Title }}</h1>{{ Content }}")
+        later = time.time() + 10
+        os.utime(self.path("template.html"), (later, later))
+        self.assertTrue(self.renderer.render(source)["html"].startswith("<h1>Home"))
+        self.assertEqual(self.renderer.stats()["reloads"], 2)
+
+    def test_errors_are_responses(self):
+        response = self.renderer.handle(
+            {"path": self.path("content/x.md"), "markdown": "no title"}
+        )
+        self.assertFalse(response["ok"])
+        self.assertIn("no h1 header", response["error"])
+        self.assertFalse(self.renderer.handle({"op": "nope"})["ok"])
+        self.assertFalse(self.renderer.handle({"path": self.path("missing.md")})["ok"])
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "needs Unix domain sockets")
+class TestRenderServer(PreviewSite, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.socket_path = self.path("render.sock")
+        self.server = RenderServer(self.socket_path, self.renderer)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        super().tearDown()
+
+    def test_concurrent_clients(self):
+        responses = []
+
+        def preview(name):
+            client = RenderClient(self.socket_path)
+            try:
+                for _ in range(5):
+                    responses.append(client.request(path=self.path(name)))
+            finally:
+                client.close()
+
+        names = ["content/index.md", "content/blog/tom.md"] * 3
+        threads = [threading.Thread(target=preview, args=(name,)) for name in names]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(responses), 30)
+        self.assertTrue(all(response["ok"] for response in responses))
+        self.assertEqual({response["title"] for response in responses}, {"Home", "Tom"})
+
+        client = RenderClient(self.socket_path)
+        stats = client.request(op="stats")
+        client.close()
+        self.assertEqual((stats["hits"], stats["misses"]), (28, 2))
+
+    def test_bad_request_keeps_connection(self):
+        client = RenderClient(self.socket_path)
+        client.file.write(b"not json\n")
+        client.file.flush()
+        self.assertIn(b"bad request", client.file.readline())
+        response = client.request(path=self.path("content/index.md"))
+        client.close()
+        self.assertTrue(response["ok"])
+        self.assertIn("ms", response)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import json
+import os
+import tempfile
+import unittest
+
+from buildcontext import BuildContext
+from copystatic import generate_page, generate_pages_recursive
+from errors import BuildErrors, BuildFailure
+
+
+class TestBuildErrors(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.template = os.path.join(self.root, "template.html")
+        with open(self.template, "w") as file:
+            file.write("<title>{{ Title }}</title>{{ Content }}")
+        self.content = os.path.join(self.root, "content")
+        os.makedirs(self.content)
+        self.write("good.md", "# Good\n\nfine")
+        self.write("bad.md", "# Bad\n\nfine\n\n- `unclosed")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        with open(os.path.join(self.content, name), "w") as file:
+            file.write(text)
+
+    def test_failure_names_page_block_and_line(self):
+        source = os.path.join(self.content, "bad.md")
+        with self.assertRaises(BuildFailure) as raised:
+            generate_page(source, self.template, os.path.join(self.root, "x"), "/")
+        failure = raised.exception
+        self.assertEqual(
+            (failure.path, failure.block_index, failure.line), (source, 2, 5)
+        )
+        self.assertIn(f"{source}:5: block 2:", str(failure))
+
+    def test_missing_template(self):
+        source = os.path.join(self.content, "good.md")
+        with self.assertRaises(BuildFailure) as raised:
+            generate_page(source, "missing.html", os.path.join(self.root, "x"), "/")
+        self.assertIsNone(raised.exception.block_index)
+
+    def test_keep_going_builds_good_pages(self):
+        dest = os.path.join(self.root, "docs")
+        build = BuildContext(errors=BuildErrors())
+        generate_pages_recursive(self.content, self.template, dest, "/", build)
+
+        self.assertTrue(os.path.exists(os.path.join(dest, "good.html")))
+        self.assertFalse(os.path.exists(os.path.join(dest, "bad.html")))
+        self.assertEqual(len(build.errors), 1)
+        self.assertIn("1 page(s) failed", build.errors.report())
+
+        path = os.path.join(self.root, ".cache", "failed-pages.json")
+        build.errors.save(path)
+        self.assertEqual(
+            BuildErrors.load_failed_paths(path), [os.path.join(self.content, "bad.md")]
+        )
+        BuildErrors().save(path)
+        with open(path) as file:
+            self.assertEqual(json.load(file), [])
+
+    def test_stops_without_keep_going(self):
+        dest = os.path.join(self.root, "docs")
+        with self.assertRaises(BuildFailure):
+            generate_pages_recursive(self.content, self.template, dest, "/")
+
+
+if __name__ == "__main__":
+    unittest.main()
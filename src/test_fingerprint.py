@@ -0,0 +1,94 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
+
+import fingerprint
+from cache import CacheStore
+from fingerprint import (
+    HashCache,
+    fingerprint_directory,
+    fingerprinted_name,
+    git_blob_ids,
+)
+
+
+class TestFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write("index.css", "body {}")
+        self.write("images/tom.png", "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, text):
+        with open(os.path.join(self.static, rel_path), "w") as file:
+            file.write(text)
+
+    def test_fingerprinted_name(self):
+        self.assertEqual(
+            fingerprinted_name("images/tom.png", "0123456789abcdef"),
+            "images/tom.0123456789.png",
+        )
+
+    def test_fingerprint_directory(self):
+        cache = HashCache(os.path.join(self.tmp.name, "hashes.json"))
+        assets = fingerprint_directory(self.static, cache)
+        self.assertEqual(sorted(assets), ["images/tom.png", "index.css"])
+        self.assertRegex(assets["index.css"], r"^index\.[0-9a-f]{10}\.css$")
+
+        self.write("index.css", "body { color: red }")
+        changed = fingerprint_directory(self.static, cache)
+        self.assertNotEqual(changed["index.css"], assets["index.css"])
+        self.assertEqual(changed["images/tom.png"], assets["images/tom.png"])
+
+    def test_hash_cache_skips_unchanged_files(self):
+        path = os.path.join(self.tmp.name, "hashes.json")
+        cache = HashCache(path)
+        fingerprint_directory(self.static, cache)
+        cache.save()
+
+        with mock.patch.object(fingerprint, "file_hash") as file_hash:
+            fingerprint_directory(self.static, HashCache(path))
+        file_hash.assert_not_called()
+
+    def test_store_shares_hashes_by_content(self):
+        store = CacheStore(os.path.join(self.tmp.name, "store"))
+        index_css = os.path.join(self.static, "index.css")
+        blob_ids = {os.path.normpath(index_css): "blob-1"}
+        first = HashCache(os.path.join(self.tmp.name, "a.json"), store, blob_ids)
+        digest = first.hash(index_css)
+
+        # another runner: no local entries and a different mtime
+        os.utime(index_css, (1, 1))
+        second = HashCache(os.path.join(self.tmp.name, "b.json"), store, blob_ids)
+        with mock.patch.object(fingerprint, "file_hash") as file_hash:
+            self.assertEqual(second.hash(index_css), digest)
+        file_hash.assert_not_called()
+
+    @unittest.skipUnless(shutil.which("git"), "needs git")
+    def test_git_blob_ids(self):
+        def git(*args):
+            subprocess.run(["git", *args], cwd=self.tmp.name, capture_output=True)
+
+        git("init", "-q")
+        git("add", "static")
+        self.write("images/tom.png", "changed")
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        try:
+            blob_ids = git_blob_ids(["static"])
+        finally:
+            os.chdir(cwd)
+        # modified files are left to be hashed from disk
+        self.assertEqual(list(blob_ids), [os.path.join("static", "index.css")])
+        self.assertRegex(blob_ids[os.path.join("static", "index.css")], "^[0-9a-f]+$")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+from frontmatter import PageMeta, parse_frontmatter, scan_metadata
+
+
+class TestParseFrontmatter(unittest.TestCase):
+    def test_yaml_lite(self):
+        md = (
+            "---\n"
+            "title: Why Tom Bombadil Was a Mistake\n"
+            "date: 2024-05-01\n"
+            "tags: [tolkien, opinion]\n"
+            "draft: false\n"
+            "template: layouts/blog.html\n"
+            "---\n"
+            "# Heading\n"
+        )
+        meta, body, header_lines = parse_frontmatter(md)
+        self.assertEqual(
+            meta,
+            PageMeta(
+                title="Why Tom Bombadil Was a Mistake",
+                date="2024-05-01",
+                tags=["tolkien", "opinion"],
+                template="layouts/blog.html",
+            ),
+        )
+        self.assertEqual(body, "# Heading\n")
+        self.assertEqual(header_lines, 7)
+
+    def test_yaml_lite_block_list(self):
+        meta, _, _ = parse_frontmatter("---\ntags:\n  - a\n  - b\n---\n")
+        self.assertEqual(meta.tags, ["a", "b"])
+
+    def test_toml_lite(self):
+        md = '+++\ntitle = "Tom"\ntags = ["a", "b"]\ndraft = true\n+++\nbody'
+        meta, body, _ = parse_frontmatter(md)
+        self.assertEqual(meta.title, "Tom")
+        self.assertEqual(meta.tags, ["a", "b"])
+        self.assertTrue(meta.draft)
+        self.assertEqual(body, "body")
+
+    def test_no_frontmatter(self):
+        md = "# Title\n\n---\n"
+        self.assertEqual(parse_frontmatter(md), (PageMeta(), md, 0))
+
+    def test_unclosed_frontmatter_raises(self):
+        with self.assertRaises(ValueError):
+            parse_frontmatter("---\ntitle: x\n# Title")
+
+    def test_published(self):
+        meta = PageMeta(date="2024-05-01")
+        self.assertEqual(meta.published().isoformat(), "2024-05-01T00:00:00+00:00")
+
+
+class TestScanMetadata(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text):
+        path = os.path.join(self.tmp.name, "index.md")
+        with open(path, "w") as file:
+            file.write(text)
+        return path
+
+    def test_scan_frontmatter_only(self):
+        path = self.write("---\ntitle: Tom\ntags: a, b\n---\n" + "x\n\n" * 10000)
+        meta = scan_metadata(path)
+        self.assertEqual(meta.title, "Tom")
+        self.assertEqual(meta.tags, ["a", "b"])
+
+    def test_scan_falls_back_to_heading(self):
+        path = self.write("---\ndate: 2024-01-01\n---\n\nintro\n\n# The Title\n")
+        meta = scan_metadata(path)
+        self.assertEqual(meta.title, "The Title")
+        self.assertEqual(meta.date, "2024-01-01")
+
+    def test_scan_stops_at_limit(self):
+        path = self.write("x" * 100 + "\n" * 50 + "# Late title\n")
+        self.assertIsNone(scan_metadata(path, limit=64).title)
+        self.assertEqual(scan_metadata(path).title, "Late title")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+
+from buildcontext import BuildContext, OutputTarget
+from i18n import TranslationIndex, copy_fallbacks
+from template import LayoutCache
+
+
+class TestTranslationIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        for path in ("en/index.md", "en/blog/tom/index.md", "fr/index.md"):
+            full_path = os.path.join(self.content, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "w") as file:
+                file.write("# Page")
+        self.index = TranslationIndex(["en", "fr"], self.content, self.docs)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_translated_pages(self):
+        dests = [dest for _, dest in self.index.translated_pages()]
+        self.assertEqual(
+            dests,
+            [
+                os.path.join(self.docs, "blog", "tom", "index.html"),
+                os.path.join(self.docs, "index.html"),
+                os.path.join(self.docs, "fr", "index.html"),
+            ],
+        )
+
+    def test_fallbacks(self):
+        self.assertEqual(
+            self.index.fallbacks(),
+            [
+                (
+                    os.path.join(self.docs, "blog", "tom", "index.html"),
+                    os.path.join(self.docs, "fr", "blog", "tom", "index.html"),
+                )
+            ],
+        )
+
+    def test_alternates(self):
+        home = os.path.join(self.content, "fr", "index.md")
+        self.assertEqual(
+            self.index.alternates_html(home),
+            '<link rel="alternate" hreflang="en" href="/" />'
+            '<link rel="alternate" hreflang="fr" href="/fr/" />'
+            '<link rel="alternate" hreflang="x-default" href="/" />',
+        )
+        tom = os.path.join(self.content, "en", "blog", "tom", "index.md")
+        self.assertEqual(self.index.alternates_html(tom), "")
+
+    def test_copy_fallbacks_to_every_tree(self):
+        public = os.path.join(self.tmp.name, "public")
+        build = BuildContext(dest_root=self.docs, targets=[OutputTarget("/", public)])
+        for root in (self.docs, public):
+            os.makedirs(os.path.join(root, "blog", "tom"))
+            with open(os.path.join(root, "blog", "tom", "index.html"), "w") as file:
+                file.write(root)
+
+        self.assertEqual(copy_fallbacks(self.index.fallbacks(), build), 1)
+        for root in (self.docs, public):
+            with open(os.path.join(root, "fr", "blog", "tom", "index.html")) as file:
+                self.assertEqual(file.read(), root)
+
+    def test_layouts_ignore_language_dir(self):
+        layouts = os.path.join(self.tmp.name, "layouts")
+        os.makedirs(layouts)
+        with open(os.path.join(layouts, "blog.html"), "w") as file:
+            file.write("{{ Content }}")
+        cache = LayoutCache(layouts, self.content, languages=["en", "fr"])
+        source = os.path.join(self.content, "fr", "blog", "tom", "index.md")
+        self.assertEqual(
+            cache.layout_for(source, "template.html"),
+            os.path.join(layouts, "blog.html"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
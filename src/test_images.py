@@ -0,0 +1,133 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from images import ImagePipeline, read_image_size
+from markdown_blocks import RenderContext, markdown_to_html_node
+
+
+def png_bytes(width, height):
+    header = b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR"
+    return header + struct.pack(">II", width, height) + b"\x08\x06\x00\x00\x00"
+
+
+def jpeg_bytes(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof0 = b"\xff\xc0" + struct.pack(">HBHH", 11, 8, height, width) + b"\x01" * 6
+    return b"\xff\xd8" + app0 + sof0 + b"\xff\xd9"
+
+
+class TestReadImageSize(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as file:
+            file.write(data)
+        return path
+
+    def test_formats(self):
+        test_cases = [
+            ("a.png", png_bytes(640, 480), (640, 480)),
+            ("a.gif", b"GIF89a" + struct.pack("<HH", 32, 16) + b"\x00" * 8, (32, 16)),
+            ("a.jpg", jpeg_bytes(1024, 768), (1024, 768)),
+            ("a.txt", b"not an image at all", None),
+        ]
+        for name, data, expected in test_cases:
+            with self.subTest(name=name):
+                self.assertEqual(read_image_size(self.write(name, data)), expected)
+
+
+class TestImagePipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.cache = os.path.join(self.tmp.name, "cache")
+        os.makedirs(os.path.join(self.static, "images"))
+        os.makedirs(os.path.join(self.docs, "images"))
+        self.tom = os.path.join(self.static, "images", "tom.png")
+        with open(self.tom, "wb") as file:
+            file.write(png_bytes(1200, 800))
+        self.resized = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def resizer(self, src_path, dst_path, width):
+        self.resized.append(width)
+        with open(dst_path, "wb") as file:
+            file.write(png_bytes(width, width))
+
+    def test_injects_dimensions_and_real_alt(self):
+        images = ImagePipeline(self.static, self.docs, self.cache)
+        md = "![Tom Bombadil](/images/tom.png) and ![x](/images/missing.png)"
+        html = markdown_to_html_node(md, RenderContext(images=images)).to_html()
+        self.assertIn(
+            '<img src="/images/tom.png" alt="Tom Bombadil" width="1200" height="800">',
+            html,
+        )
+        self.assertIn('<img src="/images/missing.png" alt="x"></img>', html)
+
+    def test_variants_and_cache(self):
+        images = ImagePipeline(
+            self.static, self.docs, self.cache, self.resizer, [480, 960, 2000]
+        )
+        attributes = images.attributes("/images/tom.png")
+        digest = images.hashes.hash(self.tom)[:8]
+        self.assertEqual(
+            attributes["srcset"],
+            f"/images/tom-480w-{digest}.png 480w, /images/tom-960w-{digest}.png "
+            "960w, /images/tom.png 1200w",
+        )
+        self.assertTrue(
+            os.path.exists(os.path.join(self.docs, "images", f"tom-480w-{digest}.png"))
+        )
+        self.assertEqual(self.resized, [480, 960])
+        images.save()
+
+        rebuilt = ImagePipeline(
+            self.static, self.docs, self.cache, self.resizer, [480, 960, 2000]
+        )
+        self.assertEqual(rebuilt.attributes("/images/tom.png"), attributes)
+        self.assertEqual(self.resized, [480, 960])
+
+    def test_changed_image_gets_new_variant_names(self):
+        images = ImagePipeline(self.static, self.docs, self.cache, self.resizer, [480])
+        before = images.attributes("/images/tom.png")["srcset"]
+        images.save()
+        with open(self.tom, "wb") as file:
+            file.write(png_bytes(1000, 500))
+        os.utime(self.tom, (1, 1))
+        rebuilt = ImagePipeline(self.static, self.docs, self.cache, self.resizer, [480])
+        after = rebuilt.attributes("/images/tom.png")["srcset"]
+        self.assertNotEqual(before.split()[0], after.split()[0])
+        self.assertEqual(len(os.listdir(os.path.join(self.docs, "images"))), 2)
+
+    def test_page_bundle_image(self):
+        content = os.path.join(self.tmp.name, "content")
+        os.makedirs(os.path.join(content, "blog", "tom"))
+        source = os.path.join(content, "blog", "tom", "index.md")
+        photo = os.path.join(content, "blog", "tom", "photo.png")
+        with open(photo, "wb") as file:
+            file.write(png_bytes(1200, 600))
+        images = ImagePipeline(self.static, self.docs, self.cache, self.resizer, [480])
+        images.resources = {photo: os.path.join(self.docs, "blog", "tom", "photo.png")}
+        os.makedirs(os.path.join(self.docs, "blog", "tom"))
+        context = RenderContext(images=images, source_path=source)
+        html = markdown_to_html_node("![Tom](photo.png)", context).to_html()
+        self.assertIn('width="1200" height="600"', html)
+        self.assertIn('srcset="photo-480w-', html)
+        published = os.listdir(os.path.join(self.docs, "blog", "tom"))
+        self.assertTrue(published[0].startswith("photo-480w-"))
+        # without the page it is relative to, the image is left alone
+        self.assertEqual(images.attributes("photo.png"), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+from buildcontext import BuildContext
+from copystatic import generate_pages_recursive
+from frontmatter import PageMeta
+from journal import BuildJournal, entry_page
+from textnode import TextType
+
+
+class TestBuildJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "journal.jsonl")
+        self.dest = os.path.join(self.tmp.name, "index.html")
+        with open(self.dest, "w") as file:
+            file.write("<p>done</p>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def record_page(self, config="a"):
+        journal = BuildJournal(self.path, config).start()
+        links = [(TextType.LINK, "/blog/", 3)]
+        journal.record("index.md", "# Home", "Home", links, PageMeta(title="Home"))
+        journal.close()
+
+    def test_resume_from_journal(self):
+        self.record_page()
+        journal = BuildJournal(self.path, "a")
+        self.assertTrue(journal.load())
+        entry = journal.completed("index.md", "# Home", [self.dest])
+        title, links, meta = entry_page(entry)
+        self.assertEqual(title, "Home")
+        self.assertEqual(links, [(TextType.LINK, "/blog/", 3)])
+        self.assertEqual(meta, PageMeta(title="Home"))
+        self.assertEqual(journal.resumed, 1)
+
+    def test_changed_page_or_missing_output(self):
+        self.record_page()
+        journal = BuildJournal(self.path, "a")
+        journal.load()
+        self.assertIsNone(journal.completed("index.md", "# Changed", [self.dest]))
+        missing = os.path.join(self.tmp.name, "missing.html")
+        self.assertIsNone(journal.completed("index.md", "# Home", [missing]))
+
+    def test_other_config(self):
+        self.record_page()
+        self.assertFalse(BuildJournal(self.path, "b").load())
+
+    def test_torn_last_line(self):
+        self.record_page()
+        with open(self.path, "a") as file:
+            file.write('{"source": "bl')
+        journal = BuildJournal(self.path, "a")
+        self.assertTrue(journal.load())
+        self.assertEqual(list(journal.entries), ["index.md"])
+        journal.start().close()
+        with open(self.path) as file:
+            self.assertEqual(len(file.read().splitlines()), 2)
+
+    def test_resumed_build_skips_finished_pages(self):
+        content = os.path.join(self.tmp.name, "content")
+        docs = os.path.join(self.tmp.name, "docs")
+        os.makedirs(content)
+        for name in ("a", "b"):
+            with open(os.path.join(content, f"{name}.md"), "w") as file:
+                file.write(f"# {name}")
+        template = os.path.join(self.tmp.name, "template.html")
+        with open(template, "w") as file:
+            file.write("{{ Content }}")
+
+        build = BuildContext(dest_root=docs, journal=BuildJournal(self.path, "a"))
+        build.journal.start()
+        generate_pages_recursive(content, template, docs, "/", build)
+        build.journal.close()
+        os.remove(os.path.join(docs, "b.html"))
+
+        build = BuildContext(dest_root=docs, journal=BuildJournal(self.path, "a"))
+        self.assertTrue(build.journal.load())
+        build.journal.start()
+        generate_pages_recursive(content, template, docs, "/", build)
+        build.journal.close()
+        self.assertEqual(build.journal.resumed, 1)
+        self.assertTrue(os.path.exists(os.path.join(docs, "b.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -103,7 +103,7 @@ class TestLeafNode(unittest.TestCase):
     def test_leaf_to_html_special_characters(self):
         node = LeafNode("p", "Special & < > \" ' characters")
         html = node.to_html()
-        self.assertEqual(html, "<p>Special & < > \" ' characters</p>")
+        self.assertEqual(html, "<p>Special &amp; &lt; &gt; \" ' characters</p>")
 
     # Test with special characters in props
     def test_leaf_to_html_special_characters_in_props(self):
@@ -116,8 +116,8 @@ class TestLeafNode(unittest.TestCase):
             },
         )
         html = node.to_html()
-        self.assertIn('href="https://example.com?q=test&id=1"', html)
-        self.assertIn('data-info="some "quoted" text"', html)
+        self.assertIn('href="https://example.com?q=test&amp;id=1"', html)
+        self.assertIn('data-info="some &quot;quoted&quot; text"', html)
 
     # Test initialization with different parameter combinations
     def test_init_no_props(self):
@@ -217,6 +217,19 @@ class TestLeafNode(unittest.TestCase):
         node = LeafNode("p", " ")
         self.assertEqual(node.to_html(), "<p> </p>")
 
+    # Test code is escaped but otherwise kept verbatim
+    def test_leaf_to_html_code_escaped(self):
+        node = LeafNode("code", "if a < b && c:\n    print('<b>')\n")
+        self.assertEqual(
+            node.to_html(),
+            "<code>if a &lt; b &amp;&amp; c:\n    print('&lt;b&gt;')\n</code>",
+        )
+
+    # Test plain text leaves are returned untouched when nothing needs escaping
+    def test_leaf_to_html_no_special_characters_is_same_object(self):
+        text = "nothing to escape here"
+        self.assertIs(LeafNode(None, text).to_html(), text)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,129 @@
+import os
+import unittest
+
+from linkcheck import (
+    BrokenLink,
+    LinkChecker,
+    PageIndex,
+    PathIndex,
+    is_internal,
+    is_markdown_link,
+)
+from textnode import TextType
+
+
+class TestPathIndex(unittest.TestCase):
+    def test_is_internal(self):
+        test_cases = [
+            ("/blog/tom", True),
+            ("../tom/", True),
+            ("https://example.com/", False),
+            ("mailto:me@example.com", False),
+            ("#section", False),
+        ]
+        for url, expected in test_cases:
+            with self.subTest(url=url):
+                self.assertEqual(is_internal(url), expected)
+
+    def test_page_url_variants(self):
+        index = PathIndex.for_build(
+            "docs",
+            [os.path.join("docs", "index.html"), "docs/blog/tom/index.html"],
+            ["index.css", "images/tom.png"],
+        )
+        for path in ["/", "/index.html", "/blog/tom", "/blog/tom/", "/index.css"]:
+            with self.subTest(path=path):
+                self.assertIn(path, index)
+        self.assertIn("/images/tom.png", index)
+        self.assertNotIn("/blog", index)
+        self.assertNotIn("/images/missing.png", index)
+
+    def test_generated_files(self):
+        index = PathIndex.for_build(
+            "docs", ["docs/index.html"], [], ["feed.xml", "sitemap.xml"]
+        )
+        self.assertIn("/feed.xml", index)
+        self.assertIn("/sitemap.xml", index)
+        self.assertNotIn("/links.json", index)
+
+
+class TestPageIndex(unittest.TestCase):
+    def test_resolve(self):
+        index = PageIndex([("content/blog/tom/index.md", "docs/blog/tom/index.html")])
+        self.assertEqual(
+            index.resolve("content/index.md", "blog/tom/index.md"), "/blog/tom/"
+        )
+        self.assertEqual(
+            index.resolve("content/blog/a/index.md", "../tom/index.md#x"),
+            "/blog/tom/#x",
+        )
+        self.assertIsNone(index.resolve("content/index.md", "tom.md"))
+
+    def test_digest_changes_when_pages_move(self):
+        before = PageIndex([("content/a.md", "docs/a.html")])
+        after = PageIndex([("content/b/a.md", "docs/b/a.html")])
+        self.assertNotEqual(before.digest(), after.digest())
+
+    def test_is_markdown_link(self):
+        self.assertTrue(is_markdown_link("../tom/index.md"))
+        self.assertTrue(is_markdown_link("tom.md#intro"))
+        self.assertFalse(is_markdown_link("/blog/tom.md"))
+        self.assertFalse(is_markdown_link("https://example.com/a.md"))
+        self.assertFalse(is_markdown_link("/blog/tom"))
+
+
+class TestLinkChecker(unittest.TestCase):
+    def test_reports_broken_internal_links_with_lines(self):
+        index = PathIndex.for_build(
+            "docs",
+            ["docs/index.html", "docs/blog/tom/index.html"],
+            ["images/tom.png"],
+        )
+        checker = LinkChecker(index, "docs").start()
+        checker.submit(
+            "content/blog/tom/index.md",
+            "docs/blog/tom/index.html",
+            [
+                (TextType.LINK, "/", 3),
+                (TextType.IMAGE, "/images/tom.png", 5),
+                (TextType.LINK, "../glorfindel", 9),
+                (TextType.LINK, "https://example.com/missing", 11),
+                (TextType.IMAGE, "../../images/tom.png#x", 12),
+            ],
+        )
+        broken = checker.close()
+        self.assertEqual(
+            broken,
+            [
+                BrokenLink(
+                    "content/blog/tom/index.md", 9, TextType.LINK, "../glorfindel"
+                )
+            ],
+        )
+        self.assertEqual(checker.checked, 4)
+        self.assertEqual(
+            str(broken[0]),
+            "content/blog/tom/index.md:9: broken link ../glorfindel",
+        )
+
+    def test_listings_written_after_pages(self):
+        index = PathIndex.for_build("docs", ["docs/index.html"], [])
+        checker = LinkChecker(index, "docs").start()
+        checker.submit(
+            "content/index.md",
+            "docs/index.html",
+            [
+                (TextType.LINK, "/blog/", 3),
+                (TextType.LINK, "archive/2026/page/2/", 4),
+                (TextType.LINK, "/tags/missing/", 5),
+            ],
+        )
+        broken = checker.close(["/blog/", "/archive/2026/page/2/"])
+        self.assertEqual(
+            broken,
+            [BrokenLink("content/index.md", 5, TextType.LINK, "/tags/missing/")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
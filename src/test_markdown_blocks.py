@@ -1,12 +1,19 @@
+import glob
+import os
 import unittest
 
 from markdown_blocks import (
     BlockType,
+    RenderContext,
     block_to_block_type,
     extract_title,
     markdown_to_blocks,
+    markdown_to_blocks_with_lines,
+    markdown_to_html,
     markdown_to_html_node,
 )
+from linkcheck import PageIndex
+from textnode import TextType
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -274,6 +281,110 @@ the **same** even with inline stuff
         )
 
 
+class TestRenderContext(unittest.TestCase):
+    def test_markdown_to_blocks_with_lines(self):
+        md = "# Title\n\n\n\nfirst line\nsecond line\n\n- item"
+        self.assertEqual(
+            markdown_to_blocks_with_lines(md),
+            [(1, "# Title"), (5, "first line\nsecond line"), (8, "- item")],
+        )
+
+    def test_collects_links_and_images_with_lines(self):
+        md = "# Title\n\n![pic](/images/a.png)\n\nintro\nsee [home](/) now"
+        context = RenderContext()
+        markdown_to_html_node(md, context)
+        self.assertEqual(
+            context.links,
+            [
+                (TextType.IMAGE, "/images/a.png", 3),
+                (TextType.LINK, "/", 6),
+            ],
+        )
+
+    def test_context_does_not_change_output(self):
+        md = "# Title\n\n- [a](/a)\n- [b](/b)"
+        self.assertEqual(
+            markdown_to_html_node(md, RenderContext()).to_html(),
+            markdown_to_html_node(md).to_html(),
+        )
+
+    def test_resolves_markdown_links(self):
+        pages = PageIndex(
+            [
+                ("content/blog/tom/index.md", "docs/blog/tom/index.html"),
+                ("content/blog/majesty/index.md", "docs/blog/majesty/index.html"),
+            ]
+        )
+        context = RenderContext(pages=pages, source_path="content/blog/tom/index.md")
+        md = "see [it](../majesty/index.md#end)\n\n[gone](../gone.md)"
+        with self.assertLogs("sitegenerator", "WARNING") as logs:
+            html = markdown_to_html(md, context)
+        self.assertEqual(
+            html,
+            '<div><p>see <a href="/blog/majesty/#end">it</a></p>'
+            '<p><a href="../gone.md">gone</a></p></div>',
+        )
+        self.assertEqual(
+            context.links,
+            [
+                (TextType.LINK, "/blog/majesty/#end", 1),
+                (TextType.LINK, "../gone.md", 3),
+            ],
+        )
+        self.assertEqual(
+            logs.output,
+            [
+                "WARNING:sitegenerator:content/blog/tom/index.md:3: "
+                "unresolved link ../gone.md"
+            ],
+        )
+
+
+class TestDirectRenderer(unittest.TestCase):
+    # golden cases: the direct renderer must match the tree byte for byte
+    cases = [
+        "# Title\n\nA **bold** and _italic_ and `code` paragraph\nover two lines",
+        '## [Home](/) & ![alt <x>](/images/a.png "t")',
+        "> quote with a [link](/a?b=1&c=2)\n> second  line",
+        "- one\n- two **bold**\n\n1. first\n2. second\n3. `third`",
+        "```\n<b>keep</b>  this\n    indented\n```",
+        "plain   text\twith\n\nwhitespace   runs",
+        "###### deep heading\n\n1. one\n3. not a list",
+    ]
+
+    def assert_same(self, md, **kwargs):
+        tree_context = RenderContext()
+        direct_context = RenderContext()
+        expected = markdown_to_html_node(md, tree_context).to_html(**kwargs)
+        self.assertEqual(markdown_to_html(md, direct_context, **kwargs), expected)
+        self.assertEqual(direct_context.links, tree_context.links)
+
+    def test_matches_tree(self):
+        for md in self.cases:
+            for minify in (False, True):
+                with self.subTest(md=md, minify=minify):
+                    self.assert_same(md, minify=minify)
+
+    def test_matches_tree_for_site_content(self):
+        content = os.path.join(os.path.dirname(__file__), "..", "content")
+        paths = glob.glob(os.path.join(content, "**", "*.md"), recursive=True)
+        self.assertTrue(paths)
+        for path in paths:
+            with open(path) as file:
+                md = file.read()
+            with self.subTest(path=path):
+                self.assert_same(md)
+                self.assert_same(md, minify=True)
+
+    def test_same_errors(self):
+        for md in ["", "- `unclosed", "[](/empty)"]:
+            with self.subTest(md=md):
+                with self.assertRaises(ValueError):
+                    markdown_to_html_node(md).to_html()
+                with self.assertRaises(ValueError):
+                    markdown_to_html(md)
+
+
 class TestBlockToBlockType(unittest.TestCase):
     def test_block_to_block_types(self):
         block = "# heading"
@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+import unittest
+
+from htmlnode import LeafNode
+from markdown_blocks import markdown_to_html, markdown_to_html_node
+from memreport import CountInstances, MemoryReport
+from textnode import TextNode, TextType
+
+
+class TestMemoryReport(unittest.TestCase):
+    def test_counts_nodes_created(self):
+        report = MemoryReport().start()
+        try:
+            report.render("a.md", "# Hi **there**\n\n```\ncode\n```")
+        finally:
+            report.stop()
+        page = report.pages[0]
+        # the inline splitters make five TextNodes on the way to "Hi " and
+        # "there"; leaves "Hi ", "there" and <code>; div, h1 and pre
+        self.assertEqual(
+            (page.text_nodes, page.leaf_nodes, page.parent_nodes), (5, 3, 3)
+        )
+
+    def test_count_instances(self):
+        init = TextNode.__init__
+        with CountInstances(TextNode, LeafNode) as created:
+            TextNode("a", TextType.TEXT)
+            markdown_to_html_node("plain")
+        # "plain" passes through four TextNodes before it becomes one leaf
+        self.assertEqual(created.counts, {TextNode: 5, LeafNode: 1})
+        self.assertIs(TextNode.__init__, init)
+
+    def test_render_matches_direct_renderer(self):
+        markdown = "# Title\n\n- [a](/a)\n- _b_\n\n> quote"
+        report = MemoryReport().start()
+        try:
+            html = report.render("a.md", markdown)
+        finally:
+            report.stop()
+        self.assertEqual(html, markdown_to_html(markdown))
+        page = report.pages[0]
+        self.assertGreater(page.parse_peak, 0)
+        self.assertEqual(page.output_bytes, len(html))
+
+    def test_sorted_json_report(self):
+        report = MemoryReport().start()
+        try:
+            report.render("small.md", "hi")
+            report.render("large.md", "\n\n".join(f"- item {i}" for i in range(200)))
+        finally:
+            report.stop()
+        self.assertEqual(report.sorted_pages("nodes")[0].source_path, "large.md")
+        self.assertIn("large.md", report.table().splitlines()[1])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "memory.json")
+            report.write_json(path, "size")
+            with open(path) as file:
+                data = json.load(file)
+        self.assertEqual(data["sorted_by"], "size")
+        self.assertEqual(
+            [page["source"] for page in data["pages"]], ["large.md", "small.md"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
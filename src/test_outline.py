@@ -0,0 +1,75 @@
+import unittest
+
+from markdown_blocks import RenderContext, markdown_to_html, markdown_to_html_node
+from outline import Outline
+
+MARKDOWN = """# Title
+
+Some **bold** words here
+
+## Setup
+
+```
+code is not counted
+```
+
+### Setup
+
+## Setup & `run`
+
+- one two
+- three"""
+
+
+class TestOutline(unittest.TestCase):
+    def test_ids_and_counts_in_direct_renderer(self):
+        context = RenderContext(outline=Outline())
+        html = markdown_to_html(MARKDOWN, context)
+        self.assertIn('<h1 id="title">Title</h1>', html)
+        self.assertIn('<h2 id="setup">Setup</h2>', html)
+        self.assertIn('<h3 id="setup-1">Setup</h3>', html)
+        self.assertIn('<h2 id="setup-run">Setup &amp; <code>run</code></h2>', html)
+        self.assertEqual(context.outline.words, 13)
+        self.assertEqual(
+            [anchor for _, _, anchor in context.outline.headings],
+            ["title", "setup", "setup-1", "setup-run"],
+        )
+
+    def test_tree_matches_direct_renderer(self):
+        tree = markdown_to_html_node(MARKDOWN, RenderContext(outline=Outline()))
+        direct = markdown_to_html(MARKDOWN, RenderContext(outline=Outline()))
+        self.assertEqual(tree.to_html(), direct)
+
+    def test_no_ids_without_outline(self):
+        self.assertIn("<h2>Setup</h2>", markdown_to_html(MARKDOWN))
+
+    def test_toc_and_slots(self):
+        outline = Outline(words_per_minute=2)
+        for level, text in [(1, "T"), (3, "A"), (2, "B"), (3, "C"), (2, "B")]:
+            outline.add_heading(level, text)
+        outline.count_words("one two three four five")
+        self.assertEqual(
+            outline.slots(),
+            {
+                "WordCount": "5",
+                "ReadingTime": "2",
+                "TableOfContents": '<nav class="toc"><ul>'
+                '<li><a href="#a">A</a></li>'
+                '<li><a href="#b">B</a><ul><li><a href="#c">C</a></li></ul></li>'
+                '<li><a href="#b-1">B</a></li></ul></nav>',
+            },
+        )
+        skipped = Outline()
+        for level, text in [(2, "A"), (4, "B"), (3, "C")]:
+            skipped.add_heading(level, text)
+        self.assertEqual(
+            skipped.toc_html(),
+            '<nav class="toc"><ul><li><a href="#a">A</a><ul>'
+            '<li><a href="#b">B</a></li><li><a href="#c">C</a></li></ul></li></ul></nav>',
+        )
+        self.assertEqual(Outline().slots()["TableOfContents"], "")
+        self.assertEqual(Outline().slots()["ReadingTime"], "1")
+
+
+if __name__ == "__main__":
+    unittest.main()
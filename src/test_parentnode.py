@@ -48,6 +48,20 @@ class TestParentNode(unittest.TestCase):
             "<h2><b>Bold text</b>Normal text<i>italic text</i>Normal text</h2>",
         )
 
+    def test_to_html_minify_preserves_pre(self):
+        parent_node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode(None, "two  spaces\nand a newline ")]),
+                ParentNode("pre", [LeafNode("code", "keep  this\n  indented\n")]),
+            ],
+        )
+        self.assertEqual(
+            parent_node.to_html(minify=True),
+            "<div><p>two spaces and a newline </p>"
+            "<pre><code>keep  this\n  indented\n</code></pre></div>",
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
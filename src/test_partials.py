@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+
+from markdown_blocks import (
+    BlockType,
+    RenderContext,
+    block_to_block_type,
+    markdown_to_html,
+    markdown_to_html_node,
+)
+from partials import PartialCache
+from textnode import TextType
+
+
+class TestPartials(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.write("callout", "> **{{ kind }}:** {{ text }}")
+        self.write("footer", 'Read the [docs](/docs/)\n\n{{< callout kind="Note" >}}')
+        self.partials = PartialCache(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        with open(os.path.join(self.tmp.name, name + ".md"), "w") as file:
+            file.write(text)
+
+    def render(self, markdown):
+        return markdown_to_html(markdown, RenderContext(partials=self.partials))
+
+    def test_block_type(self):
+        block = '{{< callout kind="Note" text="hi" >}}'
+        self.assertEqual(block_to_block_type(block), BlockType.SHORTCODE)
+        self.assertEqual(block_to_block_type("{{< callout"), BlockType.PARAGRAPH)
+
+    def test_expands_with_arguments(self):
+        html = self.render('# Hi\n\n{{< callout kind="Tip" text="be kind" >}}')
+        self.assertEqual(
+            html,
+            "<div><h1>Hi</h1><blockquote><b>Tip:</b> be kind</blockquote></div>",
+        )
+
+    def test_direct_renderer_matches_tree(self):
+        markdown = 'Intro\n\n{{< footer >}}\n\n{{< callout kind="A" text="b" >}}'
+        tree = markdown_to_html_node(markdown, RenderContext(partials=self.partials))
+        self.assertEqual(tree.to_html(), self.render(markdown))
+
+    def test_rendered_once_per_arguments(self):
+        for _ in range(3):
+            self.render('{{< callout kind="Tip" text="x" >}}')
+        self.render('{{< callout kind="Tip" text="y" >}}')
+        self.assertEqual(self.partials.renders, 2)
+
+    def test_links_reported_at_shortcode_line(self):
+        context = RenderContext(partials=self.partials)
+        markdown_to_html("Intro\n\n{{< footer >}}", context)
+        self.assertEqual(context.links, [(TextType.LINK, "/docs/", 3)])
+
+    def test_digest_tracks_nested_partials(self):
+        uses_footer = self.partials.digest_for("{{< footer >}}")
+        uses_callout = self.partials.digest_for('{{< callout kind="A" >}}')
+        self.assertEqual(self.partials.digest_for("no partials"), "")
+
+        self.write("callout", "changed")
+        edited = PartialCache(self.tmp.name)
+        self.assertNotEqual(edited.digest_for("{{< footer >}}"), uses_footer)
+        self.assertNotEqual(edited.digest_for('{{< callout kind="A" >}}'), uses_callout)
+
+        self.write("callout", "> **{{ kind }}:** {{ text }}")
+        self.write("footer", "changed")
+        edited = PartialCache(self.tmp.name)
+        self.assertEqual(edited.digest_for('{{< callout kind="A" >}}'), uses_callout)
+
+    def test_shortcode_in_code_block_is_not_a_dependency(self):
+        markdown = '# Hi\n\n```\n{{< missing text="hi" >}}\n```'
+        self.assertEqual(self.partials.digest_for(markdown), "")
+        self.assertIn('{{&lt; missing text="hi" &gt;}}', self.render(markdown))
+
+    def test_errors(self):
+        self.write("loop", "{{< loop >}}")
+        with self.assertRaises(ValueError):
+            self.render("{{< loop >}}")
+        with self.assertRaises(ValueError):
+            self.render("{{< missing >}}")
+        with self.assertRaises(ValueError):
+            markdown_to_html("{{< callout >}}")
+
+
+if __name__ == "__main__":
+    unittest.main()
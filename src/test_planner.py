@@ -0,0 +1,102 @@
+import os
+import tempfile
+import time
+import unittest
+
+from planner import PageTimings, plan_build, scan_tree, url_to_output
+
+
+class TestPlanner(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.old = time.time() - 100
+        self.write("template.html", "t", self.old - 100)
+        self.write("content/index.md", "# Home", self.old)
+        self.write("content/blog/tom/index.md", "# Tom", self.old)
+        self.write("static/index.css", "body {}", self.old)
+        self.write("docs/index.html", "<p>home</p>")
+        self.write("docs/index.css", "body {}")
+        self.write("docs/gone/index.html", "<p>gone</p>")
+        self.write("docs/old.js", "x")
+        self.write("docs/sitemap.xml", "<urlset/>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, rel_path):
+        return os.path.join(self.root, rel_path)
+
+    def write(self, rel_path, text, mtime=None):
+        path = self.path(rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(text)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def plan(self, **kwargs):
+        return plan_build(
+            self.path("content"),
+            self.path("static"),
+            self.path("docs"),
+            [self.path("template.html")],
+            **kwargs,
+        )
+
+    def test_scan_tree(self):
+        files = scan_tree(self.path("content"))
+        self.assertEqual(sorted(files), ["blog/tom/index.md", "index.md"])
+        self.assertEqual(files["index.md"][0], len("# Home"))
+
+    def test_plan(self):
+        plan = self.plan()
+        self.assertEqual(plan.render, [self.path("content/blog/tom/index.md")])
+        self.assertEqual(plan.unchanged, [self.path("content/index.md")])
+        self.assertEqual(plan.delete_pages, ["gone/index.html"])
+        self.assertEqual(plan.copy, [])
+        self.assertEqual(plan.delete_assets, ["old.js"])
+
+    def test_newer_template_renders_everything(self):
+        self.write("template.html", "t2")
+        self.assertEqual(len(self.plan().render), 2)
+
+    def test_changed_asset_is_copied(self):
+        self.write("static/index.css", "body { color: red }", self.old)
+        self.assertEqual(self.plan().copy, ["index.css"])
+
+    def test_bundle_resources_and_ignored_files(self):
+        self.write("content/blog/tom/photo.png", "png", self.old)
+        self.write("content/blog/tom/.index.md.swp", "swap", self.old)
+        self.write("docs/blog/tom/photo.png", "png")
+        plan = self.plan()
+        self.assertEqual(plan.render, [self.path("content/blog/tom/index.md")])
+        self.assertEqual(plan.copy, [])
+        self.assertEqual(plan.delete_assets, ["old.js"])
+
+    def test_image_variants_are_kept(self):
+        self.write("docs/images/tom-480w-1a2b3c4d.png", "png")
+        self.write("docs/images/tom-480w.png", "png")
+        self.assertEqual(self.plan().delete_assets, ["images/tom-480w.png", "old.js"])
+
+    def test_manifest_and_listings(self):
+        manifest = {
+            "/": {"source": self.path("content/index.md"), "links": []},
+            "/old/": {"source": self.path("content/old/index.md"), "links": []},
+        }
+        self.assertEqual(self.plan(manifest=manifest).delete_pages, ["old/index.html"])
+        self.assertEqual(self.plan(listing_urls=["/gone/"]).delete_pages, [])
+        self.assertEqual(url_to_output("/"), "index.html")
+
+    def test_estimate_from_timings(self):
+        timings = PageTimings(self.path(".cache/timings.json"))
+        timings.record("other.md", 0.5)
+        self.assertEqual(self.plan(timings=timings).estimated_seconds, 0.5)
+        timings.record(self.path("content/blog/tom/index.md"), 2.0)
+        timings.save()
+        reloaded = PageTimings(self.path(".cache/timings.json"))
+        self.assertEqual(self.plan(timings=reloaded).estimated_seconds, 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
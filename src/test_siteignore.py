@@ -0,0 +1,104 @@
+import os
+import tempfile
+import time
+import unittest
+
+from buildcontext import BuildContext, OutputTarget
+from copystatic import sync_resources, walk_content
+from siteignore import DEFAULT_PATTERNS, IgnoreRules, load_ignore_rules
+
+
+class TestIgnoreRules(unittest.TestCase):
+    def test_name_patterns_match_anywhere(self):
+        rules = IgnoreRules(["*.swp", "notes"])
+        self.assertTrue(rules.ignored("blog/.index.md.swp"))
+        self.assertTrue(rules.ignored("blog/notes", is_dir=True))
+        self.assertFalse(rules.ignored("blog/index.md"))
+
+    def test_default_patterns(self):
+        rules = IgnoreRules(DEFAULT_PATTERNS)
+        for name in [".git", "index.md~", "index.md.swp", "a.swo", "x.tmp"]:
+            self.assertTrue(rules.ignored(f"blog/{name}"), name)
+        self.assertTrue(rules.ignored("#index.md#"))
+        self.assertFalse(rules.ignored("index.md"))
+        self.assertFalse(rules.ignored("c#.md"))
+
+    def test_anchored_and_directory_patterns(self):
+        rules = IgnoreRules(["/drafts/", "blog/*.txt", ""])
+        self.assertTrue(rules.ignored("drafts", is_dir=True))
+        self.assertFalse(rules.ignored("drafts"))
+        self.assertFalse(rules.ignored("blog/drafts", is_dir=True))
+        self.assertTrue(rules.ignored("blog/todo.txt"))
+        self.assertFalse(rules.ignored("todo.txt"))
+
+
+class TestWalkContent(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.write("content/index.md", "# Home")
+        self.write("content/blog/post/index.markdown", "# Post")
+        self.write("content/blog/post/photo.png", "png")
+        self.write("content/blog/post/index.md~", "backup")
+        self.write("content/blog/wip.md", "---\ndraft: true\n---\n# WIP")
+        self.write("content/scratch/index.md", "# Scratch")
+        self.write("content/.siteignore", "# local files\nscratch/\n\\#notes\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, rel_path):
+        return os.path.join(self.root, rel_path)
+
+    def write(self, rel_path, text):
+        path = self.path(rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(text)
+
+    def test_classifies_and_skips(self):
+        pages, resources = walk_content(self.path("content"), self.path("docs"))
+        self.assertEqual(
+            pages,
+            [
+                (
+                    self.path("content/blog/post/index.markdown"),
+                    self.path("docs/blog/post/index.html"),
+                ),
+                (self.path("content/index.md"), self.path("docs/index.html")),
+            ],
+        )
+        self.assertEqual(
+            resources,
+            [
+                (
+                    self.path("content/blog/post/photo.png"),
+                    self.path("docs/blog/post/photo.png"),
+                )
+            ],
+        )
+
+    def test_load_ignore_rules_keeps_defaults(self):
+        rules = load_ignore_rules(self.path("content"))
+        self.assertTrue(rules.ignored(".siteignore"))
+        self.assertTrue(rules.ignored("scratch", is_dir=True))
+        self.assertTrue(rules.ignored("#notes"))
+        self.assertFalse(rules.ignored("# local files"))
+
+    def test_sync_resources_to_every_target(self):
+        _, resources = walk_content(self.path("content"), self.path("docs"))
+        build = BuildContext(
+            dest_root=self.path("docs"),
+            targets=[OutputTarget("/mirror/", self.path("mirror"), None)],
+        )
+        self.assertEqual(sync_resources(resources, build), 2)
+        self.assertTrue(os.path.exists(self.path("mirror/blog/post/photo.png")))
+        self.assertEqual(sync_resources(resources, build), 0)
+
+        later = time.time() + 10
+        os.utime(self.path("content/blog/post/photo.png"), (later, later))
+        self.assertEqual(sync_resources(resources), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+from artifacts import PageRecord
+from buildcontext import BuildContext
+from copystatic import generate_listings
+from taxonomy import ListingState, TaxonomyIndex, listing_to_html, slugify
+from template import LayoutCache
+
+
+def post(name, day, tags):
+    updated = datetime(2024, 1, day, tzinfo=timezone.utc)
+    url = f"/blog/{name}/"
+    return PageRecord(name.title(), f"content{url}index.md", "", url, [], updated, tags)
+
+
+class TestTaxonomy(unittest.TestCase):
+    def setUp(self):
+        self.pages = [
+            post("tom", 3, ["tolkien", "Hot Takes"]),
+            post("majesty", 1, ["tolkien"]),
+            post("glorfindel", 2, []),
+            PageRecord(
+                "Home", "content/index.md", "", "/", [], post("x", 1, []).updated
+            ),
+        ]
+
+    def test_slugify(self):
+        self.assertEqual(slugify("Hot Takes!"), "hot-takes")
+        self.assertEqual(slugify("日本 語"), "日本-語")
+        self.assertEqual(slugify("snake_case"), "snake-case")
+
+    def test_colliding_and_empty_tag_slugs(self):
+        pages = [post("tom", 3, ["C#", "C++", "C", "!!", "中文"])]
+        urls = [listing.url for listing in TaxonomyIndex(pages).listings()]
+        tag_urls = [url for url in urls if url.startswith("/tags/")]
+        self.assertEqual(len(set(tag_urls)), 5)
+        self.assertIn("/tags/c/", tag_urls)
+        self.assertIn("/tags/中文/", tag_urls)
+        self.assertNotIn("/tags//", tag_urls)
+
+    def test_sorted_indexes(self):
+        index = TaxonomyIndex(self.pages)
+        self.assertEqual(
+            [p.url for p in index.by_date],
+            ["/blog/tom/", "/blog/glorfindel/", "/blog/majesty/"],
+        )
+        self.assertEqual(
+            [p.url for p in index.by_tag["tolkien"]], ["/blog/tom/", "/blog/majesty/"]
+        )
+        self.assertEqual(list(index.by_year), [2024])
+
+    def test_paginated_listings(self):
+        listings = TaxonomyIndex(self.pages).listings(page_size=2)
+        self.assertEqual(
+            [listing.url for listing in listings],
+            [
+                "/blog/",
+                "/blog/page/2/",
+                "/tags/hot-takes/",
+                "/tags/tolkien/",
+                "/archive/2024/",
+                "/archive/2024/page/2/",
+            ],
+        )
+        html = listing_to_html(listings[1])
+        self.assertIn('<a href="/blog/majesty/">Majesty</a>', html)
+        self.assertIn('<a href="/blog/">Newer</a>', html)
+        self.assertNotIn("Older", html)
+
+    def test_hand_written_page_wins(self):
+        blog_index = PageRecord("Blog", "", "", "/blog/", [], self.pages[0].updated)
+        pages = self.pages + [blog_index]
+        urls = [listing.url for listing in TaxonomyIndex(pages).listings()]
+        self.assertNotIn("/blog/", urls)
+
+
+class TestGenerateListings(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, "w") as file:
+            file.write("<title>{{ Title }}</title>{{ Content }}")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.state_path = os.path.join(self.tmp.name, "listings.json")
+        self.build = BuildContext(layouts=LayoutCache(self.tmp.name, self.tmp.name))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def generate(self, pages):
+        state = ListingState(self.state_path)
+        listings = TaxonomyIndex(pages).listings(page_size=1)
+        rendered = generate_listings(
+            listings, self.template, self.docs, "/", self.build, state
+        )
+        state.save()
+        return rendered
+
+    def test_only_changed_listings_are_rebuilt(self):
+        pages = [post("tom", 3, ["a"]), post("majesty", 1, ["b"])]
+        self.assertEqual(self.generate(pages), 6)
+        self.assertTrue(
+            os.path.exists(os.path.join(self.docs, "tags", "a", "index.html"))
+        )
+        self.assertEqual(self.generate(pages), 0)
+
+        # retitling one post touches its blog page, tag page and archive page
+        pages[1].title = "Majesty, revised"
+        self.assertEqual(self.generate(pages), 3)
+
+    def test_listings_that_are_gone_are_removed(self):
+        pages = [post("tom", 3, ["a"]), post("majesty", 1, ["b"])]
+        self.generate(pages)
+        self.generate(pages[:1])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "tags", "b")))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog", "page", "2")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "tags", "a")))
+        self.assertNotIn("/tags/b/", ListingState(self.state_path).digests)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import os
+import tempfile
+import unittest
+
+from template import LayoutCache, compile_template, minify_html, parse_layout
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render_slots(self):
+        template = compile_template("<title>{{ Title }}</title>{{ Content }}!")
+        self.assertEqual(template.slots, ["Title", "Content"])
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": "<p>x</p>"}),
+            "<title>Hi</title><p>x</p>!",
+        )
+
+    def test_unknown_slot_is_left_as_is(self):
+        template = compile_template("a {{ Missing }} b")
+        self.assertEqual(template.render({}), "a {{ Missing }} b")
+
+    def test_minify_html(self):
+        html = "<html>\n  <head>\n    <title>A   title</title>\n  </head>\n</html>\n"
+        self.assertEqual(
+            minify_html(html), "<html> <head> <title>A title</title> </head> </html>"
+        )
+
+    def test_minify_html_keeps_inline_spaces_and_code(self):
+        html = "<p><b>a</b> <i>b</i></p><script>\n// note\nrun()\n</script>"
+        self.assertEqual(minify_html(html), html)
+        html = "<style>\n  p {}\n</style>\n<textarea>\n a\n</textarea>"
+        self.assertEqual(minify_html(html), html.replace("</style>\n", "</style> "))
+
+    def test_minify_html_keeps_pre(self):
+        html = "<div>\n  <pre>\n  keep\n    me\n</pre>\n</div>"
+        self.assertEqual(
+            minify_html(html), "<div> <pre>\n  keep\n    me\n</pre> </div>"
+        )
+
+    def test_minified_template(self):
+        template = compile_template(
+            "<body>\n  <article>{{ Content }}</article>\n", True
+        )
+        self.assertEqual(template.literals, ["<body> <article>", "</article>"])
+
+
+class TestLayouts(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.layouts = os.path.join(self.tmp.name, "layouts")
+        self.content = os.path.join(self.tmp.name, "content")
+        os.makedirs(os.path.join(self.layouts, "blog"))
+        os.makedirs(os.path.join(self.content, "blog", "tom"))
+        self.base = self.write(
+            "base.html",
+            "<title>{% block title %}{{ Title }}{% endblock %}</title>"
+            "{% block body %}<article>{{ Content }}</article>{% endblock %}"
+            '{% include "footer.html" %}',
+        )
+        self.write(
+            "footer.html", "<footer>{% block footer %}site{% endblock %}</footer>"
+        )
+        self.write(
+            "blog.html",
+            '{% extends "base.html" %}'
+            "{% block body %}<main>{% block inner %}{{ Content }}{% endblock %}</main>"
+            "{% endblock %}{% block footer %}blog{% endblock %}",
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.layouts, name)
+        with open(path, "w") as file:
+            file.write(text)
+        return path
+
+    def cache(self):
+        return LayoutCache(self.layouts, self.content)
+
+    def test_parse_layout(self):
+        extends, nodes = parse_layout(
+            '{% extends "a.html" %}x{% block b %}y{% endblock %}'
+        )
+        self.assertEqual(extends, "a.html")
+        self.assertEqual(nodes, ["x", ("block", "b", ["y"])])
+
+    def test_parse_layout_errors(self):
+        for text in ["{% block a %}x", "{% endblock %}", "{% for x %}"]:
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    parse_layout(text)
+
+    def test_extends_blocks_and_includes(self):
+        template = self.cache().load(os.path.join(self.layouts, "blog.html"))
+        self.assertEqual(
+            template.render({"Title": "T", "Content": "C"}),
+            "<title>T</title><main>C</main><footer>blog</footer>",
+        )
+
+    def test_base_layout(self):
+        template = self.cache().load(self.base)
+        self.assertEqual(
+            template.render({"Title": "T", "Content": "C"}),
+            "<title>T</title><article>C</article><footer>site</footer>",
+        )
+
+    def test_layout_for_section(self):
+        cache = self.cache()
+        blog_page = os.path.join(self.content, "blog", "tom", "index.md")
+        home_page = os.path.join(self.content, "index.md")
+        self.assertEqual(
+            cache.layout_for(blog_page, "template.html"),
+            os.path.join(self.layouts, "blog.html"),
+        )
+        self.assertEqual(cache.layout_for(home_page, "template.html"), "template.html")
+
+    def test_compiled_once_and_shared_by_hash(self):
+        path = os.path.join(self.layouts, "blog.html")
+        first = self.cache().load(path)
+        self.assertIs(self.cache().load(path), first)
+
+        self.write("footer.html", "<footer>changed</footer>")
+        self.assertIsNot(self.cache().load(path), first)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -96,13 +96,13 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
         self.assertEqual(html_node.value, "This is a text node")
 
     def test_image(self):
-        node = TextNode("This is an image", TextType.IMAGE, "https://www.example.com")
+        node = TextNode("Tom Bombadil", TextType.IMAGE, "https://www.example.com")
         html_node = text_node_to_html_node(node)
         self.assertEqual(html_node.tag, "img")
         self.assertEqual(html_node.value, "")
         self.assertEqual(
             html_node.props,
-            {"src": "https://www.example.com", "alt": "This is an image"},
+            {"src": "https://www.example.com", "alt": "Tom Bombadil"},
         )
 
     def test_link(self):
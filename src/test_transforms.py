@@ -0,0 +1,136 @@
+import os
+import tempfile
+import unittest
+
+from buildcontext import BuildContext
+from cache import CacheStore
+from copystatic import generate_page
+from markdown_blocks import RenderContext, markdown_to_html, markdown_to_html_node
+from partials import PartialCache
+from transforms import (
+    CollectLinks,
+    HeadingClasses,
+    RewriteUrls,
+    Transform,
+    TransformPipeline,
+    load_transform,
+)
+
+
+class CountVisits(Transform):
+    def __init__(self, tags=None):
+        self.tags = tags
+        self.visited = []
+
+    def visit(self, node, context):
+        self.visited.append(node.tag)
+        return node
+
+
+class DropImages(Transform):
+    tags = ("img",)
+
+    def visit(self, node, context):
+        return None
+
+
+class TestTransformPipeline(unittest.TestCase):
+    def test_single_traversal_dispatch(self):
+        every = CountVisits()
+        headings = CountVisits(("h1", "h2"))
+        links = CountVisits(("a",))
+        pipeline = TransformPipeline([headings, every, links])
+        root = markdown_to_html_node("# Hi\n\n## Sub\n\nSee [a](/a/) and `x`")
+        self.assertIs(pipeline.apply(root), root)
+        self.assertEqual(
+            every.visited, ["h1", None, "h2", None, "p", None, "a", None, "code"]
+        )
+        self.assertEqual(headings.visited, ["h1", "h2"])
+        self.assertEqual(links.visited, ["a"])
+        # handlers run in registration order whether or not a tag is listed
+        self.assertEqual(pipeline.handlers["h1"], [headings.visit, every.visit])
+
+    def test_replace_and_drop(self):
+        pipeline = TransformPipeline(
+            [HeadingClasses("title"), RewriteUrls(str.upper), DropImages()]
+        )
+        root = markdown_to_html_node("# Hi\n\n[a](/a/) ![i](/i.png)")
+        html = pipeline.apply(root).to_html()
+        self.assertEqual(
+            html,
+            '<div><h1 class="title">Hi</h1><p><a href="/A/">a</a> </p></div>',
+        )
+        # the original tree is left as it was
+        self.assertEqual(
+            root.to_html(), markdown_to_html("# Hi\n\n[a](/a/) ![i](/i.png)")
+        )
+
+    def test_shared_partial_nodes_are_not_changed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "note.md"), "w") as file:
+                file.write("## Note")
+            partials = PartialCache(tmp)
+            pipeline = TransformPipeline([HeadingClasses("x")])
+            markdown = "{{< note >}}"
+            root = markdown_to_html_node(markdown, RenderContext(partials=partials))
+            self.assertIn('class="x"', pipeline.apply(root).to_html())
+            self.assertEqual(
+                markdown_to_html(markdown, RenderContext(partials=partials)),
+                "<div><h2>Note</h2></div>",
+            )
+
+    def test_collect_links(self):
+        collector = CollectLinks()
+        context = RenderContext(source_path="content/index.md")
+        root = markdown_to_html_node("[a](/a/) ![i](/i.png)", context)
+        TransformPipeline([collector]).apply(root, context)
+        self.assertEqual(collector.links, {"content/index.md": ["/a/", "/i.png"]})
+
+    def test_digest_follows_configuration(self):
+        first = TransformPipeline([HeadingClasses("a")]).digest()
+        self.assertEqual(first, TransformPipeline([HeadingClasses("a")]).digest())
+        self.assertNotEqual(first, TransformPipeline([HeadingClasses("b")]).digest())
+
+    def test_load_transform(self):
+        self.assertIsInstance(load_transform("transforms:CollectLinks"), CollectLinks)
+        for spec in ["transforms", "transforms:Missing", "transforms:HeadingClasses"]:
+            with self.assertRaises(ValueError):
+                load_transform(spec)
+
+
+class TestTransformedPages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "index.md")
+        with open(self.source, "w") as file:
+            file.write("# Home\n\n[a](/a/)")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, "w") as file:
+            file.write("{{ Content }}")
+        self.dest = os.path.join(self.tmp.name, "docs", "index.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def generate(self, build):
+        generate_page(self.source, self.template, self.dest, "/site/", build)
+        with open(self.dest) as file:
+            return file.read()
+
+    def test_transforms_apply_and_key_the_cache(self):
+        cache = CacheStore(os.path.join(self.tmp.name, "cache"))
+        plain = self.generate(BuildContext(cache=cache))
+        self.assertEqual(
+            plain, '<div><h1 id="home">Home</h1><p><a href="/site/a/">a</a></p></div>'
+        )
+        transforms = TransformPipeline([HeadingClasses("title")])
+        html = self.generate(BuildContext(cache=cache, transforms=transforms))
+        self.assertEqual(
+            html,
+            '<div><h1 id="home" class="title">Home</h1><p><a href="/site/a/">a</a></p></div>',
+        )
+        self.assertEqual(cache.misses, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
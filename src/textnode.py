@@ -28,18 +28,23 @@ class TextNode:
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
 
 
-def text_node_to_html_node(text_node):
+def text_node_to_leaf_parts(text_node):
+    # the (tag, value, props) a TextNode renders as
     if text_node.text_type == TextType.TEXT:
-        return LeafNode(None, text_node.text)
+        return None, text_node.text, None
     elif text_node.text_type == TextType.BOLD:
-        return LeafNode("b", text_node.text)
+        return "b", text_node.text, None
     elif text_node.text_type == TextType.ITALIC:
-        return LeafNode("i", text_node.text)
+        return "i", text_node.text, None
     elif text_node.text_type == TextType.CODE:
-        return LeafNode("code", text_node.text)
+        return "code", text_node.text, None
     elif text_node.text_type == TextType.LINK:
-        return LeafNode("a", text_node.text, {"href": text_node.url})
+        return "a", text_node.text, {"href": text_node.url}
     elif text_node.text_type == TextType.IMAGE:
-        return LeafNode("img", "", {"src": text_node.url, "alt": "This is an image"})
+        return "img", "", {"src": text_node.url, "alt": text_node.text}
     else:
         raise Exception("you need to provide a valid texttype")
+
+
+def text_node_to_html_node(text_node):
+    return LeafNode(*text_node_to_leaf_parts(text_node))
@@ -0,0 +1,168 @@
+import hashlib
+import importlib
+import inspect
+
+from htmlnode import LeafNode, ParentNode
+
+
+class Transform:
+    # a visitor over the rendered node tree. tags names the node tags it
+    # handles (None is a text leaf), or is None to see every node. visit
+    # returns the node to keep, a new node in its place, or None to drop
+    # it; nodes may be shared with the partial cache, so a visitor builds
+    # a replacement instead of changing a node in place.
+    tags = None
+
+    def visit(self, node, context):
+        return node
+
+    def key(self):
+        # whatever configures the transform, for build cache keys
+        return ""
+
+
+class TransformPipeline:
+    # runs every registered transform in a single walk of each page,
+    # dispatching each node through a tag -> handlers table built up front
+    def __init__(self, transforms=()):
+        self.transforms = []
+        self.handlers = {}
+        self.any_tag = []
+        self._digest = None
+        for transform in transforms:
+            self.register(transform)
+
+    def register(self, transform):
+        self.transforms.append(transform)
+        self._digest = None
+        if transform.tags is None:
+            # every tag seen so far and every later one gets it too
+            self.any_tag.append(transform.visit)
+            for handlers in self.handlers.values():
+                handlers.append(transform.visit)
+        else:
+            for tag in transform.tags:
+                if tag not in self.handlers:
+                    self.handlers[tag] = list(self.any_tag)
+                self.handlers[tag].append(transform.visit)
+        return transform
+
+    def __bool__(self):
+        return bool(self.transforms)
+
+    def digest(self):
+        # the code and configuration of every transform, in order
+        if self._digest is None:
+            digest = hashlib.sha256()
+            for transform in self.transforms:
+                cls = type(transform)
+                with open(inspect.getfile(cls), "rb") as file:
+                    source = file.read()
+                digest.update(hashlib.sha256(source).digest())
+                digest.update(f"{cls.__qualname__}\0{transform.key()}\n".encode())
+            self._digest = digest.hexdigest()
+        return self._digest
+
+    def apply(self, root, context=None):
+        # the page's <div> wrapper is not visited, only what it holds
+        children = self._visit_children(root, context)
+        if children is root.children:
+            return root
+        return ParentNode(root.tag, children, root.props)
+
+    def _visit(self, node, context):
+        for handler in self.handlers.get(node.tag, self.any_tag):
+            node = handler(node, context)
+            if node is None:
+                return None
+        if isinstance(node, ParentNode):
+            children = self._visit_children(node, context)
+            if children is not node.children:
+                node = ParentNode(node.tag, children, node.props)
+        return node
+
+    def _visit_children(self, node, context):
+        # the original list when nothing below changed, so untouched
+        # subtrees are never copied
+        children = None
+        for i, child in enumerate(node.children):
+            result = self._visit(child, context)
+            if result is not child and children is None:
+                children = node.children[:i]
+            if children is not None and result is not None:
+                children.append(result)
+        return node.children if children is None else children
+
+
+def load_transform(spec):
+    # "package.module:Name" names a Transform subclass, a factory or an
+    # instance, for --transform
+    module_name, found, attribute = spec.partition(":")
+    if not found or not module_name or not attribute:
+        raise ValueError(f"expected MODULE:NAME, got {spec!r}")
+    try:
+        transform = getattr(importlib.import_module(module_name), attribute)
+    except (ImportError, AttributeError) as e:
+        raise ValueError(f"cannot load transform {spec}: {e}") from e
+    if callable(transform) and not isinstance(transform, Transform):
+        try:
+            transform = transform()
+        except TypeError as e:
+            raise ValueError(f"cannot create transform {spec}: {e}") from e
+    if not isinstance(transform, Transform):
+        raise ValueError(f"{spec} is not a Transform")
+    return transform
+
+
+class HeadingClasses(Transform):
+    # class="..." on every heading, e.g. for a CSS framework
+    tags = ("h1", "h2", "h3", "h4", "h5", "h6")
+
+    def __init__(self, class_name):
+        self.class_name = class_name
+
+    def visit(self, node, context):
+        props = dict(node.props or {})
+        props["class"] = " ".join(filter(None, [props.get("class"), self.class_name]))
+        return ParentNode(node.tag, node.children, props)
+
+    def key(self):
+        return self.class_name
+
+
+class RewriteUrls(Transform):
+    # passes every link href and image src through a function, e.g. to
+    # point /downloads/ at a CDN
+    tags = ("a", "img")
+
+    def __init__(self, rewrite):
+        self.rewrite = rewrite
+
+    def visit(self, node, context):
+        name = "href" if node.tag == "a" else "src"
+        url = node.props.get(name) if node.props else None
+        if url is None:
+            return node
+        new_url = self.rewrite(url)
+        if new_url == url:
+            return node
+        return LeafNode(node.tag, node.value, dict(node.props, **{name: new_url}))
+
+    def key(self):
+        return self.rewrite.__qualname__
+
+
+class CollectLinks(Transform):
+    # the link and image targets of every rendered page, keyed by source
+    # path; pages reused from the build cache are not rendered or visited
+    tags = ("a", "img")
+
+    def __init__(self):
+        self.links = {}
+
+    def visit(self, node, context):
+        url = (node.props or {}).get("href" if node.tag == "a" else "src")
+        if url is not None:
+            source_path = context.source_path if context is not None else None
+            self.links.setdefault(source_path, []).append(url)
+        return node